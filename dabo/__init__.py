@@ -6,6 +6,7 @@ http://dabodev.com
 """
 import sys
 import os
+import types
 import locale
 import logging
 import logging.handlers
@@ -156,6 +157,7 @@ def setDbLogFile(fname, level=None):
 	set the log level. If the passed 'fname' is None, any existing file-based
 	logger will be closed.
 	"""
+	import dabo
 	if fname is None:
 		if dabo.dbFileLogHandler:
 			# Remove the existing handler
@@ -213,7 +215,46 @@ if importDebugger:
 	import __builtin__
 	__builtin__.debugo = __builtin__.debugout = debugout
 
-if implicitImports:
+class LazyImport(object):
+	"""
+	Placeholder for a module, or for an attribute of a module, that imports
+	it the first time the placeholder is called or one of its attributes is
+	used.
+
+	Placeholders can't be subclassed or used with isinstance(); import the
+	real object for that.
+	"""
+	def __init__(self, modName, attName=None):
+		object.__setattr__(self, "_modName", modName)
+		object.__setattr__(self, "_attName", attName)
+		object.__setattr__(self, "_target", None)
+
+	def _resolve(self):
+		target = self._target
+		if target is None:
+			__import__(self._modName)
+			target = sys.modules[self._modName]
+			if self._attName:
+				target = getattr(target, self._attName)
+			object.__setattr__(self, "_target", target)
+		return target
+
+	def __getattr__(self, att):
+		return getattr(self._resolve(), att)
+
+	def __setattr__(self, att, val):
+		setattr(self._resolve(), att, val)
+
+	def __call__(self, *args, **kwargs):
+		return self._resolve()(*args, **kwargs)
+
+	def __repr__(self):
+		if self._target is not None:
+			return repr(self._target)
+		return "<LazyImport of %s>" % ".".join(filter(None, (self._modName, self._attName)))
+
+
+if implicitImports and not lazyImports:
 	import dColors
 	import dEvents
 	import dabo.db
@@ -296,3 +337,58 @@ app.start()
 	os.chdir(currLoc)
 	print "Application '%s' has been created for you" % homedir
 
+
+def _implicitClass(name):
+	"""
+	Returns a property for the class of the same name as the 'name' module.
+	Importing a module puts it in its package's dict directly, so a property
+	is needed to return the class instead, as the eager imports do.
+	"""
+	modName = "dabo.%s" % name
+	def fget(self):
+		val = self.__dict__.get(name)
+		if val is None or val is sys.modules.get(modName):
+			__import__(modName)
+			val = getattr(sys.modules[modName], name)
+			self.__dict__[name] = self._module.__dict__[name] = val
+		return val
+	def fset(self, val):
+		self.__dict__[name] = self._module.__dict__[name] = val
+	return property(fget, fset)
+
+
+class _LazyModule(types.ModuleType):
+	"""
+	Takes the place of the dabo module in sys.modules when lazyImports is on,
+	and imports the names that implicitImports makes available the first time
+	they are used.
+	"""
+	_lazyModules = ("dColors", "dEvents", "db", "biz", "ui")
+	dApp = _implicitClass("dApp")
+	dPref = _implicitClass("dPref")
+
+	def __init__(self, mod):
+		super(_LazyModule, self).__init__(mod.__name__, mod.__doc__)
+		self.__dict__.update(mod.__dict__)
+		# The original module's dict holds the globals of the functions defined
+		# in it, so keep the module alive, and its dict in sync.
+		self.__dict__["_module"] = mod
+
+	def __getattr__(self, att):
+		if att not in self._lazyModules:
+			raise AttributeError("'module' object has no attribute '%s'" % att)
+		# Importing the module adds it to this module's dict.
+		__import__("dabo.%s" % att)
+		return self.__dict__[att]
+
+	def __setattr__(self, att, val):
+		super(_LazyModule, self).__setattr__(att, val)
+		self._module.__dict__[att] = val
+
+	def __delattr__(self, att):
+		super(_LazyModule, self).__delattr__(att)
+		self._module.__dict__.pop(att, None)
+
+
+if implicitImports and lazyImports:
+	sys.modules[__name__] = _LazyModule(sys.modules[__name__])
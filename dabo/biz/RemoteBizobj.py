@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-import pickle
 import os
 import time
 
@@ -8,12 +7,21 @@ from dabo.dLocalize import _
 import dabo.dConstants as kons
 from dabo.lib.connParser import importConnections
 import dabo.dException as dException
+from dabo.lib import deltaSync
+from dabo.lib.cacheStore import SQLiteCacheStore
 from dBizobj import dBizobj
 
 
 
+_allCursors = object()
+
+
+
 class RemoteBizobj(dBizobj):
 	cacheDir = None
+	# The CacheStore used to keep data between requests. If not set, a
+	# SQLiteCacheStore in the cache directory is created when first needed.
+	cacheStore = None
 
 	def _beforeInit(self):
 		return super(RemoteBizobj, self)._beforeInit()
@@ -37,6 +45,14 @@ class RemoteBizobj(dBizobj):
 			os.makedirs(cls.cacheDir)
 
 
+	@classmethod
+	def _getCacheStore(cls):
+		if cls.cacheStore is None:
+			cls._createCacheDir()
+			cls.cacheStore = SQLiteCacheStore(os.path.join(cls.cacheDir, "bizcache.db"))
+		return cls.cacheStore
+
+
 	def defineConnection(self):
 		"""You must define and create the connection in this method. Otherwise
 		an error will be raised. Pass the connection information to setConnectionParams();
@@ -50,23 +66,33 @@ class RemoteBizobj(dBizobj):
 
 
 	@classmethod
-	def load(cls, hashval, ds, pth):
+	def load(cls, hashval, ds, pth=None, cursorKey=_allCursors):
+		"""Creates a bizobj and restores the data cached for 'hashval'. If
+		'cursorKey' is passed, only the data for that cursor is loaded, and it
+		becomes the current cursor.
+		"""
 		biz = cls()
 		biz.DataSource = ds
 		biz.hashval = hashval
 
 		cls._createCacheDir(pth)
-		pth = os.path.join(cls.cacheDir, hashval)
-		if os.path.exists(pth):
-			f = file(pth)
-			kf, crsData = pickle.load(f)
-			f.close()
+		store = cls._getCacheStore()
+		if cursorKey is _allCursors:
+			crsData = store.getAll(hashval)
+		else:
+			cached = store.get(hashval, cursorKey)
+			if cached is None:
+				crsData = {}
+			else:
+				crsData = {cursorKey: cached}
+		# This is a dict with cursor keys as the keys, and
+		# values as a (keyfield, dataset, typedef) tuple.
+		for kk, (kf, data, typinfo) in crsData.items():
 			biz.KeyField = kf
-			# This is a dict with cursor keys as the keys, and
-			# values as a (dataset, typedef) tuple.
-			for kk, (ds, typinfo) in crsData.items():
-				tmpCursor = biz.createCursor(key=kk)
-				tmpCursor._storeData(ds, typinfo)
+			tmpCursor = biz.createCursor(key=kk)
+			tmpCursor._storeData(data, typinfo)
+		if crsData and (cursorKey is not _allCursors):
+			biz._CurrentCursor = cursorKey
 		return biz
 
 
@@ -94,16 +120,48 @@ class RemoteBizobj(dBizobj):
 		"""Store data info to the cache for the next time the same bizobj
 		is needed.
 		"""
-		self._createCacheDir()
-		pth = os.path.join(self.cacheDir, hashval)
-		f = file(pth, "w")
-		pd = {}
+		store = self._getCacheStore()
+		kf = self.KeyField
 		cursorDict = self._cursorDictReference()
 		for kk, cursor in cursorDict.items():
-			pd[kk] = (cursor.getDataSet(returnInternals=True), cursor.getDataTypes())
-		dataToStore = (self.KeyField, pd)
-		pickle.dump(dataToStore, f)
-		f.close()
+			store.put(hashval, kk, (kf, cursor.getDataSet(returnInternals=True),
+					cursor.getDataTypes()))
+
+
+	def getSyncFrame(self, sql, params, clientVersion):
+		"""Runs the client's query and returns a delta-sync frame for the results.
+
+		If 'clientVersion' matches the snapshot of what was last sent to this
+		client, the frame contains only the rows that changed since then;
+		otherwise it contains the full data set. Either way the new snapshot
+		is stored in the cache for the next request.
+		"""
+		self.storeRemoteSQL(sql)
+		if params is not None:
+			self.setParams(params)
+		self.requery()
+		records = self.getDataSet()
+		kf = self.KeyField
+		snapshot = self._loadSyncSnapshot()
+		if clientVersion and snapshot and (snapshot[0] == clientVersion):
+			snapshot, payload = deltaSync.computeDelta(snapshot, records, kf)
+			payload["types"] = self.getDataTypes()
+			kind = deltaSync.FRAME_DELTA
+		else:
+			snapshot = deltaSync.makeSnapshot(records, kf)
+			payload = {"version": snapshot[0], "data": records,
+					"types": self.getDataTypes(), "structure": self.getDataStructure()}
+			kind = deltaSync.FRAME_FULL
+		self._storeSyncSnapshot(snapshot)
+		return deltaSync.encodeFrame(kind, payload)
+
+
+	def _loadSyncSnapshot(self):
+		return self._getCacheStore().get("%s.sync" % self.hashval, None)
+
+
+	def _storeSyncSnapshot(self, snapshot):
+		self._getCacheStore().put("%s.sync" % self.hashval, None, snapshot)
 
 
 	def storeRemoteSQL(self, sql):
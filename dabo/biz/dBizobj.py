@@ -3,11 +3,14 @@ import types
 import re
 import warnings
 import time
+import weakref
+import functools
 import dabo
 import dabo.dConstants as kons
 from dabo.db.dCursorMixin import dCursorMixin
 from dabo.dLocalize import _
 from dabo.lib.utils import ustr
+from dabo.lib import metrics
 import dabo.dException as dException
 from dabo.dObject import dObject
 from dabo.lib.RemoteConnector import RemoteConnector
@@ -19,6 +22,25 @@ _scanExceptionId = None
 
 
 
+def _changesData(func):
+	"""
+	Decorator for the methods that can change any of the bizobj's data; the
+	data change listeners are told about the change after the method has run.
+	When these methods call each other, only the outermost call notifies.
+	"""
+	@functools.wraps(func)
+	def wrapper(self, *args, **kwargs):
+		self._dataChangeDepth += 1
+		try:
+			return func(self, *args, **kwargs)
+		finally:
+			self._dataChangeDepth -= 1
+			if not self._dataChangeDepth and self._dataChangeListeners:
+				self._notifyDataChange()
+	return wrapper
+
+
+
 class dBizobj(dObject):
 	""" The middle tier, where the business logic resides."""
 	# Class to instantiate for the cursor object
@@ -32,6 +54,12 @@ class dBizobj(dObject):
 		self.__att_try_setFieldVal = False
 		self._visitedKeys = set()
 		self._cascadeDeleteFromParent = True
+		# Objects to tell about data changes; see addDataChangeListener().
+		self._dataChangeListeners = weakref.WeakKeyDictionary()
+		self._dataChangeDepth = 0
+		# Parent link value used by the next requery, instead of the value in the
+		# current parent row. Set by the parent's scanRecords().
+		self._parentLinkOverride = None
 		# Collection of cursor objects. MUST be defined first.
 		self.__cursors = {}
 		# PK of the currently-selected cursor
@@ -468,6 +496,7 @@ class dBizobj(dObject):
 				del(dabo._bizTransactionToken)
 
 
+	@_changesData
 	def saveAll(self, startTransaction=True, saveTheChildren=True):
 		"""
 		Save changes to all rows in the bizobj, and (by default) the children.
@@ -516,6 +545,8 @@ class dBizobj(dObject):
 		self.afterSaveAll()
 
 
+	@metrics.timed("biz.save")
+	@_changesData
 	def save(self, startTransaction=True, saveTheChildren=True):
 		"""
 		Save any changes that have been made in the current row.
@@ -589,6 +620,7 @@ class dBizobj(dObject):
 		self.afterSave()
 
 
+	@_changesData
 	def cancelAll(self, ignoreNoRecords=None, cancelTheChildren=True):
 		"""
 		Cancel all changes made in all rows, including by default all children
@@ -611,6 +643,7 @@ class dBizobj(dObject):
 		self._addVisitedKey()
 
 
+	@_changesData
 	def cancel(self, ignoreNoRecords=None, cancelTheChildren=True):
 		"""
 		Cancel all changes to the current record and by default all children.
@@ -665,6 +698,7 @@ class dBizobj(dObject):
 		self.afterDeleteAllChildren()
 
 
+	@_changesData
 	def delete(self, startTransaction=True, inLoop=False):
 		"""Delete the current row of the data set."""
 		rp = self._RemoteProxy
@@ -718,6 +752,7 @@ class dBizobj(dObject):
 			raise
 
 
+	@_changesData
 	def deleteAll(self, startTransaction=True):
 		"""Delete all rows in the data set."""
 		rp = self._RemoteProxy
@@ -726,9 +761,12 @@ class dBizobj(dObject):
 		cursorKey = self.__currentCursorKey
 		startTransaction = startTransaction and self.beginTransaction()
 		try:
-			while self.RowCount > 0:
-				self.first()
-				self.delete(startTransaction=False, inLoop=True)
+			if self._canDeleteSetBased():
+				self._deleteAllRows()
+			else:
+				while self.RowCount > 0:
+					self.first()
+					self.delete(startTransaction=False, inLoop=True)
 			if startTransaction:
 				self.commitTransaction()
 
@@ -748,6 +786,133 @@ class dBizobj(dObject):
 		self._CurrentCursor = cursorKey
 
 
+	# Methods that deleteAll() can't bypass when deleting set-based. Children
+	# must not override any of them; this bizobj only must not override delete().
+	_rowDeleteMethods = ("delete", "deleteAll", "beforeDelete", "beforePointerMove",
+			"afterDelete", "afterChange", "onDeleteLastRecord")
+
+	def _overridesMethods(self, names):
+		"""Returns True if this object or its class replaces any of the dBizobj methods."""
+		cls = self.__class__
+		for name in names:
+			if name in self.__dict__:
+				return True
+			if getattr(cls, name).im_func is not getattr(dBizobj, name).im_func:
+				return True
+		return False
+
+
+	def _childLinkFields(self):
+		"""
+		Returns the (linkField, parentField) names relating this bizobj to its
+		parent, or None if either consists of more than one field.
+		"""
+		link = self.LinkField.replace(" ", "")
+		parentField = self.ParentLinkField.replace(" ", "") or self.Parent.KeyField
+		if not link or not isinstance(parentField, basestring) \
+				or "," in link or "," in parentField:
+			return None
+		return link.split(".")[-1], parentField
+
+
+	def _canDeleteSetBased(self, isChild=False):
+		"""
+		Returns True if deleteAll() can delete the records and their children
+		with one statement for each table, instead of one record at a time.
+		"""
+		if self._RemoteProxy or not self.KeyField:
+			return False
+		if self._overridesMethods(self._rowDeleteMethods if isChild else ("delete", )):
+			return False
+		if isChild and not (self.DataSource and self._childLinkFields()):
+			return False
+		if isChild and self._isScoped():
+			# A statement for the whole table would also delete the records the
+			# child doesn't query or show.
+			return False
+		logic = self.deleteChildLogic
+		for child in self._children:
+			if not child.CascadeDeleteFromParent:
+				continue
+			if logic == kons.REFINTEG_RESTRICT:
+				if not (child.DataSource and child._childLinkFields()):
+					return False
+				# Counting the whole table would miss unsaved new child records,
+				# and count the records the child doesn't query or show.
+				if child._isScoped() or child._isAnyChanged_fast(includeNewUnchanged=True):
+					return False
+			if logic == kons.REFINTEG_CASCADE and not child._canDeleteSetBased(True):
+				return False
+		return True
+
+
+	def _isScoped(self):
+		"""Returns True if the records shown may be only some of those related to the parent."""
+		return bool(self.UserSQL or self.getWhereClause() or self._isFiltered())
+
+
+	def _isFiltered(self):
+		"""Returns True if any of the cursors has a filter applied."""
+		return any([crs._records._sourceDataSet is not None
+				for crs in self._cursorDictReference().itervalues()])
+
+
+	def _deleteAllRows(self):
+		"""
+		Deletes all the records in the current cursor, and the child records as
+		determined by deleteChildLogic, using one statement for every table
+		and every _batchSize records. Called by deleteAll().
+		"""
+		cursor = self._CurrentCursor
+		rowCount = cursor.RowCount
+		if not rowCount:
+			return
+		# Give the hooks delete() would call a chance to stop the deletion.
+		for row in xrange(rowCount):
+			cursor.RowNumber = row
+			errMsg = self.beforeDelete()
+			if not errMsg:
+				errMsg = self.beforePointerMove()
+			if errMsg:
+				raise dException.BusinessRuleViolation(errMsg)
+		self._deleteChildRecords(lambda fld: [cursor.getFieldVal(fld, row)
+				for row in xrange(rowCount)])
+		cursor.deleteRows()
+		self.onDeleteLastRecord()
+		self.requeryAllChildren()
+
+
+	def _deleteChildRecords(self, getParentVals):
+		"""
+		Deletes or protects the child records of the records being deleted, as
+		determined by deleteChildLogic. 'getParentVals' is a function that returns
+		the values of the passed field in the records being deleted.
+		"""
+		logic = self.deleteChildLogic
+		if logic not in (kons.REFINTEG_RESTRICT, kons.REFINTEG_CASCADE):
+			return
+		for child in self._children:
+			if not child.CascadeDeleteFromParent:
+				continue
+			linkField, parentField = child._childLinkFields()
+			vals = list(set(getParentVals(parentField)) - set((None, )))
+			if not vals:
+				continue
+			crs = child._CurrentCursor
+			table = child.DataSource
+			if logic == kons.REFINTEG_RESTRICT:
+				if crs.countIn([linkField], vals, table):
+					raise dException.dException(
+							_("Deletion prohibited - there are related child records."))
+				continue
+			child._deleteChildRecords(lambda fld: crs.selectIn(fld, [linkField], vals, table))
+			crs.deleteIn([linkField], vals, table)
+			# The cached child cursors for the deleted parents are stale now.
+			cursors = child._cursorDictReference()
+			for val in vals:
+				cursors.pop(val, None)
+
+
 	def execute(self, sql, params=None):
 		"""Execute the sql on the cursor. Dangerous. Use executeSafe instead."""
 		self._syncWithCursors()
@@ -911,6 +1076,8 @@ class dBizobj(dObject):
 		return self.scanRows(func, range(rowCount), *args, **kwargs)
 
 
+	# scan() delegates to scanRows(), so both are timed here.
+	@metrics.timed("biz.scan")
 	def scanRows(self, func, rows, *args, **kwargs):
 		"""
 		Iterate over the specified rows and apply the passed function to each.
@@ -947,6 +1114,71 @@ class dBizobj(dObject):
 		return ret
 
 
+	def scanRecords(self, rows=None, reverse=None, children=False):
+		"""
+		Returns an iterator of record objects for the specified rows, or for all
+		rows if 'rows' is None. Unlike scan(), the record pointer is never moved,
+		so no navigation hooks are fired and no child bizobjs are requeried; this
+		makes it the fastest way to compute or update values in many records.
+
+		The records work like the Record property: fields can be read and set
+		as attributes or items, and changed values are tracked as usual, but
+		they refer to their own row instead of the current one. Setting a field
+		calls afterSetFieldVal() with the record's row number, except for child
+		records that don't belong to the child bizobj's current parent.
+
+		If 'reverse' is None, self.ScanReverse determines the order.
+
+		If 'children' is True, each record's getChildRecords() method returns
+		the records of a child bizobj that belong to that record. Child records
+		are only loaded when they are requested, and the child bizobjs stay on
+		their current parent.
+		"""
+		cursor = self._CurrentCursor
+		if rows is None:
+			rows = xrange(cursor.RowCount)
+		if reverse is None:
+			reverse = self.ScanReverse
+		if reverse:
+			rows = reversed(list(rows))
+		for row in rows:
+			yield _ScanRecord(self, cursor, row, children)
+
+
+	def _childCursorForRow(self, child, cursor, row):
+		"""
+		Returns the cursor of the child bizobj that belongs to the specified row
+		of 'cursor', requerying it if the child would be requeried when moving
+		to that row. The current cursor of the child isn't changed.
+		"""
+		fld = child.ParentLinkField
+		if fld:
+			flds = fld.replace(" ", "").split(",")
+			val = cursor.getFieldVal(flds, row)
+			if len(val) == 1:
+				val = val[0]
+			else:
+				val = tuple(val)
+		else:
+			val = cursor.pkExpression(cursor._records[row])
+		childCursors = child._cursorDictReference()
+		crs = childCursors.get(val)
+		if crs is not None:
+			if not (child.RequeryWithParent and child.cacheExpired(crs)) or crs.isChanged():
+				return crs
+		oldKey = child._CurrentCursorKey
+		child._CurrentCursor = val
+		try:
+			# Records that aren't saved yet can't have saved child records.
+			if fld or not cursor._newRecords.has_key(val):
+				child._parentLinkOverride = val
+				child.requery()
+		finally:
+			child._parentLinkOverride = None
+			child.setCurrentParent(oldKey)
+		return childCursors[val]
+
+
 	def scanKeys(self, func, keys, *args, **kwargs):
 		"""
 		Iterate over the specified keys (defined in KeyField) and apply
@@ -1151,6 +1383,7 @@ class dBizobj(dObject):
 		self.setFieldVal(field, valOrExpr)
 
 
+	@_changesData
 	def new(self, fieldVals=None, **kwargs):
 		"""
 		Create a new record and populate it with default values. Default
@@ -1199,6 +1432,8 @@ class dBizobj(dObject):
 			self.UserSQL = sql
 
 
+	@metrics.timed("biz.requery")
+	@_changesData
 	def requery(self, convertQMarks=False):
 		"""
 		Requery the data set.
@@ -1288,7 +1523,10 @@ class dBizobj(dObject):
 			# It's not necessary to requery if parent has no records
 			# or parent row is new and child is linked with parent PK.
 			# Use of setNonMatchChildFilterClause is no more necessary.
-			if not self.Parent.RowCount or \
+			if self._parentLinkOverride is not None:
+				# scanRecords() is loading the child records of a specific parent row.
+				ret = self._parentLinkOverride
+			elif not self.Parent.RowCount or \
 					(self.Parent.IsAdding and not self.ParentLinkField):
 				ret = tuple((None,)) * len(links)
 			else:
@@ -1332,6 +1570,7 @@ class dBizobj(dObject):
 		return ret
 
 
+	@_changesData
 	def sort(self, col, ordr=None, caseSensitive=True):
 		"""
 		Sort the rows based on values in a specified column.
@@ -1357,6 +1596,7 @@ class dBizobj(dObject):
 		self.__params = params
 
 
+	@_changesData
 	def filter(self, fld, expr, op="="):
 		"""
 		This takes a field name, an expression, and an optional operator, and applies that
@@ -1405,6 +1645,7 @@ class dBizobj(dObject):
 					pass
 
 
+	@_changesData
 	def filterByExpression(self, expr):
 		"""Allows you to filter by any valid Python expression.
 
@@ -1462,11 +1703,13 @@ class dBizobj(dObject):
 					self.__filterPKVirtual.append(self.getFieldVal(self.KeyField))
 
 
+	@_changesData
 	def removeFilter(self):
 		"""Remove the most recently applied filter."""
 		self._CurrentCursor.removeFilter()
 
 
+	@_changesData
 	def removeFilters(self):
 		"""Remove all applied filters, going back to the original data set."""
 		self._CurrentCursor.removeFilters()
@@ -1955,10 +2198,15 @@ class dBizobj(dObject):
 			self.afterChildRequery()
 
 
-	def cacheExpired(self):
-		"""This controls if a child requery is needed when a parent is requeried."""
+	def cacheExpired(self, cursor=None):
+		"""
+		This controls if a child requery is needed when a parent is requeried.
+		By default the current cursor is checked.
+		"""
 		if self._childCacheInterval:
-			last = self._CurrentCursor.lastRequeryTime
+			if cursor is None:
+				cursor = self._CurrentCursor
+			last = cursor.lastRequeryTime
 			if last:
 				return ((time.time() - last) > self._childCacheInterval)
 		return True
@@ -2045,6 +2293,12 @@ class dBizobj(dObject):
 		changed = self._CurrentCursor.setFieldVal(fld, val, row, pk)
 		if changed:
 			self.afterSetFieldVal(fld, row)
+			if self._dataChangeListeners and not self._dataChangeDepth:
+				if pk is not None:
+					row = self._CurrentCursor._getRowByPk(pk)
+				elif row is None:
+					row = self.RowNumber
+				self._notifyDataChange(row, fld)
 		return changed
 
 
@@ -2092,7 +2346,7 @@ class dBizobj(dObject):
 
 
 	def _dataToXML(self, level=None, rows=None):
-		self._xmlBody = ""
+		body = []
 		if level is None:
 			level = 0
 		def addToBody(txt, lvl=None):
@@ -2100,13 +2354,13 @@ class dBizobj(dObject):
 				txt = "\n".join(["%s%s" % ("\t" * lvl, ln) for ln in txt.splitlines()])
 				if txt and not txt.endswith("\n"):
 					txt += "\n"
-			self._xmlBody += txt
+			body.append(txt)
 		if rows is None:
 			self.scan(self._xmlForRow, level=level + 1, callback=addToBody)
 		else:
 			self.scanRows(self._xmlForRow, self.RowNumber, level=level + 1,
 					callback=addToBody)
-		return self._xmlBody
+		return "".join(body)
 
 
 	def _xmlForRow(self, level, callback):
@@ -2118,14 +2372,14 @@ class dBizobj(dObject):
 		rowTemplate = "<row>\n%s\n</row>\n"
 		childTemplate = """\n\t<child table="%s">\n%s\n\t</child>"""
 		childEmptyTemplate = """\n\t<child table="%s" />"""
-		kidXML = ""
+		kidXML = []
 		for kid in self._children:
 			kidstuff = kid._dataToXML(level=level + 1)
 			if kidstuff:
-				kidXML += childTemplate % (kid.DataSource, kidstuff)
+				kidXML.append(childTemplate % (kid.DataSource, kidstuff))
 			else:
-				kidXML += childEmptyTemplate % kid.DataSource
-		callback(rowTemplate % ("%s%s" % (xml, kidXML)), level)
+				kidXML.append(childEmptyTemplate % kid.DataSource)
+		callback(rowTemplate % ("%s%s" % (xml, "".join(kidXML))), level)
 
 
 	def getDataSet(self, flds=(), rowStart=0, rows=None, returnInternals=False):
@@ -2144,6 +2398,23 @@ class dBizobj(dObject):
 		return None
 
 
+	def getDataSetView(self, flds=(), rowStart=0, rows=None, returnInternals=False):
+		"""
+		Get a read-only view of the data set, without copying any rows.
+
+		Takes the same parameters as getDataSet(). The returned dDataSetView can
+		be iterated and indexed like a data set; call its copy() method when a
+		mutable snapshot is needed.
+		"""
+		cc = self._CurrentCursor
+		if cc is not None:
+			return cc.getDataSetView(
+				flds, rowStart, rows, returnInternals=returnInternals,
+				_rowChangeCallback=self._changeRowNumCallback)
+		return None
+
+
+	@_changesData
 	def appendDataSet(self, ds, updateInternals=False):
 		"""
 		Appends the rows in the passed dataset to this bizobj's dataset. No checking
@@ -2569,6 +2840,27 @@ class dBizobj(dObject):
 		self.afterPointerMove()
 
 
+	def addDataChangeListener(self, listener):
+		"""
+		Have the bizobj call listener.bizobjDataChanged(bizobj, row, field) when
+		its data changes. 'row' and 'field' identify a changed value; when they
+		are None, any of the data may have changed, for example after a requery
+		or sort, or after moving to another parent record. Only a weak reference
+		to the listener is kept.
+		"""
+		self._dataChangeListeners[listener] = None
+
+
+	def removeDataChangeListener(self, listener):
+		"""Stop telling the passed listener about data changes."""
+		self._dataChangeListeners.pop(listener, None)
+
+
+	def _notifyDataChange(self, row=None, field=None):
+		for listener in self._dataChangeListeners.keys():
+			listener.bizobjDataChanged(self, row, field)
+
+
 	def _addVisitedKey(self):
 		"""
 		The _visitedKeys set is used for optimization of cancelAll()
@@ -2805,6 +3097,7 @@ afterDelete() which is only called after a delete().""")
 			except KeyError:
 				return None
 
+	@_changesData
 	def _setCurrentCursor(self, val):
 		""" Sees if there is a cursor in the cursors dict with a key that matches
 		the current parent key. If not, creates one.
@@ -3442,6 +3735,84 @@ class _bizIterator(object):
 
 
 
+class _ScanRecord(object):
+	"""
+	Record object returned by dBizobj.scanRecords(). Fields of the row are
+	read and set through the cursor, so it doesn't matter which row is current.
+	"""
+	__slots__ = ("_bizobj", "_cursor", "_row", "_children", "_childCursors")
+
+	def __init__(self, bizobj, cursor, row, children=False):
+		setattr_ = super(_ScanRecord, self).__setattr__
+		setattr_("_bizobj", bizobj)
+		setattr_("_cursor", cursor)
+		setattr_("_row", row)
+		setattr_("_children", children)
+		setattr_("_childCursors", None)
+
+	def __getattr__(self, att):
+		# Only called for names that aren't attributes. Private and special
+		# names, such as the ones looked up by copy and pickle, aren't fields.
+		if att.startswith("_"):
+			raise AttributeError(att)
+		try:
+			return self._cursor.getFieldVal(att, self._row)
+		except dException.FieldNotFoundException:
+			raise AttributeError(att)
+
+	def __setattr__(self, att, val):
+		if att.startswith("_"):
+			super(_ScanRecord, self).__setattr__(att, val)
+		else:
+			self._setFieldVal(att, val)
+
+	def __getitem__(self, key):
+		try:
+			return self._cursor.getFieldVal(key, self._row)
+		except dException.FieldNotFoundException:
+			raise KeyError, key
+
+	def __setitem__(self, key, val):
+		try:
+			self._setFieldVal(key, val)
+		except dException.FieldNotFoundException:
+			raise KeyError, key
+
+	def _setFieldVal(self, fld, val):
+		cursor, bizobj = self._cursor, self._bizobj
+		# Child records of other parents aren't in the bizobj's current cursor,
+		# so the row number would mean nothing to the hook or the listeners.
+		if cursor.setFieldVal(fld, val, row=self._row) and cursor is bizobj._CurrentCursor:
+			bizobj.afterSetFieldVal(fld, self._row)
+			if bizobj._dataChangeListeners and not bizobj._dataChangeDepth:
+				bizobj._notifyDataChange(self._row, fld)
+
+	def getChildRecords(self, child):
+		"""
+		Returns a list of records of the passed child bizobj, or of the child
+		bizobj with the passed DataSource, that belong to this record.
+		"""
+		if not self._children:
+			raise dException.dException(
+					_("Child records are only available when scanRecords() is called with children=True"))
+		bizobj = self._bizobj
+		if isinstance(child, basestring):
+			ds = child
+			child = bizobj.getChildByDataSource(ds)
+			if child is None:
+				nm = bizobj.Name
+				raise ValueError(_("%(nm)s has no child with the DataSource '%(ds)s'") % locals())
+		childCursors = self._childCursors
+		if childCursors is None:
+			childCursors = {}
+			super(_ScanRecord, self).__setattr__("_childCursors", childCursors)
+		crs = childCursors.get(child)
+		if crs is None:
+			crs = childCursors[child] = bizobj._childCursorForRow(child, self._cursor, self._row)
+		return [_ScanRecord(child, crs, row, True) for row in xrange(crs.RowCount)]
+
+
+
 def _getBaseXML():
 	"""Template for exporting data to XML"""
 	return """<?xml version="1.0" encoding="%(encoding)s"?>
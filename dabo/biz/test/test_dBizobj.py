@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import unittest
+import copy
 import dabo
 import dabo.db
 import dabo.biz
@@ -269,6 +270,255 @@ insert into %s (cField, iField, nField) values (NULL, NULL, NULL)
 		self.assertEqual(bizMain.RowCount, 2)
 
 
+	def createFamily(self):
+		bizMain = self.biz
+		bizChild = dabo.biz.dBizobj(self.con)
+		bizChild.KeyField = "pk"
+		bizChild.DataSource = self.temp_child_table_name
+		bizChild.LinkField = "parent_fk"
+		bizChild2 = dabo.biz.dBizobj(self.con)
+		bizChild2.KeyField = "pk"
+		bizChild2.DataSource = self.temp_child2_table_name
+		bizChild2.LinkField = "parent_fk"
+		bizMain.addChild(bizChild)
+		bizChild.addChild(bizChild2)
+		bizMain.requery()
+		# A grandchild record that isn't related to any child record.
+		bizMain._CurrentCursor.AuxCursor.execute("insert into %s (parent_fk, cPart) "
+				"values (99, 'orphan')" % self.temp_child2_table_name)
+		return bizMain, bizChild, bizChild2
+
+
+	def countRecords(self, tableName):
+		aux = self.biz._CurrentCursor.AuxCursor
+		aux.execute("select count(*) as cnt from %s" % tableName)
+		return aux.Record.cnt
+
+
+	def testDeleteAllCascade(self):
+		bizMain, bizChild, bizChild2 = self.createFamily()
+		self.assertEqual(bizChild.RowCount, 2)
+		self.assertTrue(bizMain._canDeleteSetBased())
+		bizMain.new()
+		bizMain.deleteAll()
+		self.assertEqual(bizMain.RowCount, 0)
+		self.assertEqual(bizMain.RowNumber, -1)
+		self.assertEqual(bizChild.RowCount, 0)
+		self.assertEqual(self.countRecords(self.temp_table_name), 0)
+		self.assertEqual(self.countRecords(self.temp_child_table_name), 0)
+		# Only the grandchildren of the deleted child records are gone.
+		self.assertEqual(self.countRecords(self.temp_child2_table_name), 1)
+
+
+	def testDeleteAllRestrict(self):
+		bizMain, bizChild, bizChild2 = self.createFamily()
+		bizMain.deleteChildLogic = dabo.dConstants.REFINTEG_RESTRICT
+		self.assertRaises(dabo.dException.dException, bizMain.deleteAll)
+		self.assertEqual(bizMain.RowCount, 3)
+		self.assertEqual(self.countRecords(self.temp_table_name), 3)
+		bizMain.deleteChildLogic = dabo.dConstants.REFINTEG_IGNORE
+		bizMain.deleteAll()
+		self.assertEqual(self.countRecords(self.temp_table_name), 0)
+		self.assertEqual(self.countRecords(self.temp_child_table_name), 3)
+
+
+	def testDeleteAllRestrictScopedChild(self):
+		bizMain, bizChild, bizChild2 = self.createFamily()
+		bizMain.deleteChildLogic = dabo.dConstants.REFINTEG_RESTRICT
+		# Child records the child doesn't query don't prevent the deletion.
+		bizChild.setWhereClause("cInvNum = 'none'")
+		bizMain.requery()
+		self.assertFalse(bizMain._canDeleteSetBased())
+		bizMain.deleteAll()
+		self.assertEqual(self.countRecords(self.temp_table_name), 0)
+		self.assertEqual(self.countRecords(self.temp_child_table_name), 3)
+
+
+	def testDeleteAllRestrictNewChild(self):
+		bizMain, bizChild, bizChild2 = self.createFamily()
+		bizMain.deleteChildLogic = dabo.dConstants.REFINTEG_RESTRICT
+		bizMain._CurrentCursor.AuxCursor.execute("delete from %s" % self.temp_child_table_name)
+		bizMain.requery()
+		self.assertTrue(bizMain._canDeleteSetBased())
+		# An unsaved new child record prevents the deletion.
+		bizChild.new()
+		bizChild.setFieldVal("cInvNum", "IN00999")
+		self.assertFalse(bizMain._canDeleteSetBased())
+		self.assertRaises(dabo.dException.dException, bizMain.deleteAll)
+		self.assertEqual(self.countRecords(self.temp_table_name), 3)
+
+
+	def testDeleteAllScopedChild(self):
+		bizMain, bizChild, bizChild2 = self.createFamily()
+		bizChild.filter("cInvNum", "IN00455")
+		self.assertFalse(bizMain._canDeleteSetBased())
+		bizChild.removeFilters()
+		self.assertTrue(bizMain._canDeleteSetBased())
+		# Only the records the child queries may be deleted.
+		bizChild.setWhereClause("cInvNum <> 'IN00455'")
+		bizMain.requery()
+		self.assertFalse(bizMain._canDeleteSetBased())
+		bizMain.deleteAll()
+		self.assertEqual(self.countRecords(self.temp_table_name), 0)
+		self.assertEqual(self.countRecords(self.temp_child_table_name), 1)
+
+
+	def testDeleteAllHooks(self):
+		bizMain, bizChild, bizChild2 = self.createFamily()
+		bizMain.beforeDelete = lambda: "Not allowed"
+		self.assertTrue(bizMain._canDeleteSetBased())
+		self.assertRaises(dabo.dException.BusinessRuleViolation, bizMain.deleteAll)
+		self.assertEqual(self.countRecords(self.temp_table_name), 3)
+		del bizMain.beforeDelete
+		deleted = []
+		def beforeDelete():
+			deleted.append(bizChild2.Record.pk)
+			return ""
+		bizChild2.beforeDelete = beforeDelete
+		# Hooks of child bizobjs need the records to be deleted one at a time.
+		self.assertFalse(bizMain._canDeleteSetBased())
+		bizMain.deleteAll()
+		self.assertEqual(sorted(deleted), [1, 2, 3, 4])
+		self.assertEqual(self.countRecords(self.temp_child2_table_name), 1)
+
+
+	def testScanRecords(self):
+		biz = self.biz
+		biz.RowNumber = 1
+		moves = []
+		biz.afterPointerMove = lambda: moves.append(biz.RowNumber)
+		setVals = []
+		biz.afterSetFieldVal = lambda fld, row: setVals.append((fld, row))
+		recs = list(biz.scanRecords())
+		self.assertEqual([rec.cField for rec in recs],
+				["Paul Keith McNett", "Edward Leafe", "Carl Karsten"])
+		self.assertEqual([rec["pk"] for rec in biz.scanRecords(reverse=True)], [3, 2, 1])
+		self.assertEqual([rec.pk for rec in biz.scanRecords(rows=[2, 0])], [3, 1])
+		for rec in recs:
+			rec.iField = rec.iField + 1
+		recs[0]["cField"] = "Paul McNett"
+		self.assertRaises(KeyError, recs[0].__getitem__, "bogus")
+		self.assertRaises(AttributeError, getattr, recs[0], "bogus")
+		self.assertRaises(AttributeError, getattr, recs[0], "_bogus")
+		self.assertFalse(hasattr(recs[0], "__copy__"))
+		rec = copy.copy(recs[2])
+		self.assertEqual(rec.cField, "Carl Karsten")
+		self.assertEqual(biz.RowNumber, 1)
+		self.assertEqual(moves, [])
+		self.assertEqual(setVals, [("iField", 0), ("iField", 1), ("iField", 2),
+				("cField", 0)])
+		# Setting a field to its current value doesn't call the hook.
+		recs[1].cField = recs[1].cField
+		self.assertEqual(len(setVals), 4)
+		# The changes are tracked like any other change.
+		self.assertEqual(biz.getFieldVal("iField", row=2), 10224)
+		self.assertEqual(biz.oldVal("cField", row=0), "Paul Keith McNett")
+		self.assertEqual(sorted(biz.getChangedRows()), [0, 1, 2])
+		biz.cancelAll()
+		self.assertEqual(biz.getFieldVal("iField", row=0), 23)
+		self.assertRaises(dabo.dException.dException, recs[0].getChildRecords, "child")
+
+
+	def testScanRecordsChildren(self):
+		bizMain, bizChild, bizChild2 = self.createFamily()
+		requeried = []
+		bizChild.afterRequery = lambda: requeried.append(bizChild.getParentLinkValue())
+		self.assertEqual(bizChild.getParentLinkValue(), 1)
+		counts = {}
+		parts = []
+		for rec in bizMain.scanRecords(children=True):
+			childRecs = rec.getChildRecords(bizChild)
+			counts[rec.pk] = len(childRecs)
+			for childRec in childRecs:
+				parts.extend(grandRec.cPart for grandRec in childRec.getChildRecords("grandchild"))
+		self.assertEqual(counts, {1: 2, 2: 0, 3: 1})
+		self.assertEqual(sorted(parts), ["9930", "fldk-333", "hhfg-234", "pkd-8878"])
+		# The children are still on the records of the current parent row.
+		self.assertEqual(bizMain.RowNumber, 0)
+		self.assertEqual(bizChild._CurrentCursorKey, 1)
+		self.assertEqual(bizChild.RowCount, 2)
+		self.assertEqual(bizChild.Record.cInvNum, "IN00023")
+		self.assertEqual(bizChild2._CurrentCursorKey, 1)
+		self.assertEqual(bizChild2.RowCount, 2)
+		# Changes made through the child records are kept and saved.
+		rec = list(bizMain.scanRecords(children=True))[2]
+		rec.getChildRecords("child")[0].cInvNum = "IN99999"
+		del requeried[:]
+		rec = list(bizMain.scanRecords(children=True))[2]
+		self.assertEqual(rec.getChildRecords("child")[0].cInvNum, "IN99999")
+		self.assertEqual(requeried, [])
+		self.assertRaises(ValueError, rec.getChildRecords, "bogus")
+		bizMain.saveAll()
+		bizMain.RowNumber = 2
+		self.assertEqual(bizChild.Record.cInvNum, "IN99999")
+
+
+	def testDataChangeListener(self):
+		biz = self.biz
+		class Listener(object):
+			def __init__(self):
+				self.changes = []
+			def bizobjDataChanged(self, bizobj, row, field):
+				self.changes.append((row, field))
+		listener = Listener()
+		biz.addDataChangeListener(listener)
+		biz.setFieldVal("cField", "Changed", row=2)
+		biz.Record.iField = 5
+		# Setting an unchanged value doesn't count.
+		biz.Record.iField = 5
+		self.assertEqual(listener.changes, [(2, "cField"), (0, "iField")])
+		del listener.changes[:]
+		biz.sort("cField")
+		biz.filter("iField", 5)
+		biz.removeFilters()
+		biz.cancelAll()
+		self.assertEqual(len(listener.changes), 4)
+		self.assertEqual(set(listener.changes), set([(None, None)]))
+		for rec in biz.scanRecords():
+			rec.iField = 0
+		self.assertEqual(listener.changes[4:], [(0, "iField"), (1, "iField"), (2, "iField")])
+		biz.removeDataChangeListener(listener)
+		biz.requery()
+		self.assertEqual(len(listener.changes), 7)
+		# Listeners are only referenced weakly.
+		biz.addDataChangeListener(Listener())
+		self.assertEqual(len(biz._dataChangeListeners), 0)
+
+
+	def testInsertReturning(self):
+		self.biz._CurrentCursor.execute("create table defaults (pk INTEGER PRIMARY KEY "
+				"AUTOINCREMENT, cField CHAR default 'none', iField INT default 7)")
+		def saveNew(returning):
+			biz = dabo.biz.dBizobj(self.con)
+			biz.KeyField = "pk"
+			biz.DataSource = "defaults"
+			# Leave the fields NULL, so that the database fills in its defaults.
+			biz.DefaultValues = None
+			biz.requery()
+			crs = biz._CurrentCursor
+			crs.BackendObject.insertReturning = returning
+			lastInsertIDs = []
+			getLastInsertID = crs.AuxCursor.getLastInsertID
+			def trackLastInsertID():
+				lastInsertIDs.append(True)
+				return getLastInsertID()
+			crs.AuxCursor.getLastInsertID = trackLastInsertID
+			biz.new()
+			biz.Record.cField = "set"
+			biz.new()
+			biz.Record.iField = 3
+			biz.saveAll()
+			self.assertEqual(bool(lastInsertIDs), not returning)
+			return list(biz.getDataSet(flds=("pk", "cField", "iField")))
+		# The generated PKs and the default values are filled in either way.
+		self.assertEqual(saveNew(True), [{"pk": 1, "cField": "set", "iField": 7},
+				{"pk": 2, "cField": "none", "iField": 3}])
+		self.assertEqual(saveNew(False), [{"pk": 1, "cField": "set", "iField": 7},
+				{"pk": 2, "cField": "none", "iField": 3},
+				{"pk": 3, "cField": "set", "iField": 7},
+				{"pk": 4, "cField": "none", "iField": 3}])
+
+
 	def testSaveNewUnchanged(self):
 		"""See ticket #1101"""
 		bizMain = self.biz
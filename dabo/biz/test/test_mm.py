@@ -335,6 +335,73 @@ class Test_Many_To_Many(unittest.TestCase):
 
 
 
+	def test_batched_associate(self):
+		"""Associating more values than fit in one 'in' clause works, and is idempotent."""
+		pbiz = self.person_biz
+		cbiz = self.company_biz
+		pbiz.seek("Leafe", "last_name")
+		leafe_pk = pbiz.getPK()
+		names = ["Company %s" % num for num in range(1200)] + ["Acme Manufacturing", "Company 5"]
+		pbiz.mmAssociateValues(cbiz, "company", names)
+		self.assertEqual(self.reccount("company"), 1201)
+		self.assertEqual(self.reccount("employees", "person_id = %s" % leafe_pk), 1201)
+		pbiz.mmAssociateValues(cbiz, "company", names)
+		self.assertEqual(self.reccount("company"), 1201)
+		self.assertEqual(self.reccount("employees", "person_id = %s" % leafe_pk), 1201)
+		pbiz.mmDissociateValues(cbiz, "company", names[:1000] + ["Nonexistent"])
+		self.assertEqual(self.reccount("employees", "person_id = %s" % leafe_pk), 201)
+		# Dissociating doesn't add values to the other table.
+		self.assertEqual(self.reccount("company"), 1201)
+
+
+	def test_full_associate_keeps_existing(self):
+		"""mmSetFullAssociation() only changes the association records that differ."""
+		pbiz = self.person_biz
+		fbiz = self.fan_club_biz
+		pbiz.seek("Leafe", "last_name")
+		pbiz.mmAssociateValues(fbiz, "performer", ["Ramones", "Green Day", "The Clash"])
+		self.crs.execute("select pkid from membership where fan_club_id = "
+				"(select pkid from fan_club where performer = 'Ramones')")
+		ramones_pk = self.crs.Record.pkid
+		pbiz.mmSetFullAssociation(fbiz, "performer", ["Ramones", "Wire"])
+		self.assertEqual(self.reccount("membership"), 2)
+		self.assertEqual(self.reccount("membership", "pkid = %s" % ramones_pk), 1)
+		recs = pbiz.mmGetAssociatedValues(fbiz, "performer")
+		self.assertEqual(sorted(rec["performer"] for rec in recs), ["Ramones", "Wire"])
+
+
+	def test_batched_insert_fails(self):
+		"""A failed bulk insert raises the proper error."""
+		pbiz = self.person_biz
+		rbiz = self.restricted_biz
+		pbiz.addMMBizobj(rbiz, "rest_alloc", "person_id", "restricted_id")
+		self.assertRaises(dException.DBQueryException, pbiz.mmAssociateValues,
+				rbiz, "regular", ["test", "another"])
+		pbiz.removeMMBizobj(rbiz)
+
+
+	def test_case_insensitive_collation(self):
+		"""Values the backend compares equal aren't inserted again under another spelling."""
+		self.crs.execute("create table tag (pkid INTEGER PRIMARY KEY AUTOINCREMENT, "
+				"tag TEXT COLLATE NOCASE)")
+		self.crs.execute("create table tagging (pkid INTEGER PRIMARY KEY AUTOINCREMENT, "
+				"person_id INT, tag_id INT)")
+		self.crs.execute("insert into tag (tag) values ('Python')")
+		tbiz = dabo.biz.dBizobj(self.conn)
+		tbiz.KeyField = "pkid"
+		tbiz.DataSource = "tag"
+		pbiz = self.person_biz
+		pbiz.addMMBizobj(tbiz, "tagging", "person_id", "tag_id")
+		pbiz.seek("Leafe", "last_name")
+		pbiz.mmAssociateValues(tbiz, "tag", ["python", "New", "NEW", "Other"])
+		self.assertEqual(self.reccount("tag"), 3)
+		self.assertEqual(self.reccount("tagging"), 3)
+		pbiz.mmAssociateValues(tbiz, "tag", ["PYTHON", "other", "Third"])
+		self.assertEqual(self.reccount("tag"), 4)
+		self.assertEqual(self.reccount("tagging"), 4)
+		pbiz.removeMMBizobj(tbiz)
+
+
 if __name__ == "__main__":
 	suite = unittest.TestLoader().loadTestsFromTestCase(Test_Many_To_Many)
 	unittest.TextTestRunner(verbosity=2).run(suite)
@@ -1,21 +1,15 @@
 # -*- coding: utf-8 -*-
-import ConfigParser
 from cStringIO import StringIO
 import datetime
 import glob
 import imp
 import inspect
-import json
 import locale
 import logging
 import os
-import shutil
 import sys
-import tempfile
-import urllib2
 import warnings
 from xml.sax._exceptions import SAXParseException
-from zipfile import ZipFile
 
 import dabo
 import dabo.dException as dException
@@ -30,6 +24,14 @@ from dSecurityManager import dSecurityManager
 from dabo.lib.utils import ustr
 from dabo.lib.utils import cleanMenuCaption
 
+# These are only needed for web updates, remote apps and temp files, so
+# they aren't imported until they are first used.
+json = dabo.LazyImport("json")
+shutil = dabo.LazyImport("shutil")
+tempfile = dabo.LazyImport("tempfile")
+urllib2 = dabo.LazyImport("urllib2")
+ZipFile = dabo.LazyImport("zipfile", "ZipFile")
+
 
 
 class Collection(list):
@@ -412,6 +414,8 @@ try again when it is running.
 		self._persistMRU()
 		self.uiApp.finish()
 		self.closeConnections()
+		from dabo.db.dConnectionMonitor import stopConnectionMonitor
+		stopConnectionMonitor()
 		self._tempFileHolder.release()
 		dabo.log.info(_("Application finished."))
 		self._finished = True
@@ -908,10 +912,19 @@ try again when it is running.
 
 		dbDirs = set((hd, os.path.join(hd, "db"), os.path.join(hd, "data"),
 				pth, os.path.join(pth, "db"), os.path.join(pth, "data")))
+		# Files that haven't changed since they were last read aren't parsed
+		# until one of their connections is requested in getConnectionByName().
+		nameCache = self._getConnectionNameCache()
 		for dbDir in dbDirs:
 			if os.path.exists(dbDir) and os.path.isdir(dbDir):
 				files = glob.glob(os.path.join(dbDir, "*.cnxml"))
 				for f in files:
+					names = nameCache and nameCache.getNames(f)
+					if names is not None:
+						for kk in names:
+							connDefs.pop(kk, None)
+							self.dbConnectionNameToFiles[kk] = f
+						continue
 					try:
 						cn = self.getConnectionsFromFile(f)
 					except Exception as ex:
@@ -922,6 +935,10 @@ try again when it is running.
 						connDefs.update(cn)
 						for kk in cn:
 							self.dbConnectionNameToFiles[kk] = f
+						if nameCache:
+							nameCache.setNames(f, cn.keys())
+		if nameCache:
+			nameCache.save()
 		# Import any python code connection definitions (the "old" way).
 		try:
 			import dbConnectionDefs
@@ -939,7 +956,21 @@ try again when it is running.
 			self.dbConnectionDefs[k] = v
 
 		dabo.log.info(_("%s database connection definition(s) loaded.")
-			% (len(self.dbConnectionDefs)))
+			% (len(self.getConnectionNames())))
+
+
+	def _getConnectionNameCache(self):
+		"""
+		Returns the cache of the connection names defined in .cnxml files,
+		or None if caching is disabled by dabo.cacheConnectionNames or there
+		is no user data directory.
+		"""
+		if not dabo.cacheConnectionNames:
+			return None
+		dataDir = dabo.lib.utils.getUserAppDataDirectory()
+		if dataDir is None:
+			return None
+		return connParser.ConnectionNameCache(os.path.join(dataDir, "connectionNames.json"))
 
 
 	def _initModuleNames(self):
@@ -1021,6 +1052,8 @@ try again when it is running.
 		then an exception is raised.
 		"""
 		if not connName in self.dbConnections:
+			if connName not in self.dbConnectionDefs:
+				self._loadConnectionDefs(connName)
 			if connName in self.dbConnectionDefs:
 				ci = self.dbConnectionDefs[connName]
 				self.dbConnections[connName] = dabo.db.dConnection(ci)
@@ -1032,9 +1065,29 @@ try again when it is running.
 		return ret
 
 
+	def _loadConnectionDefs(self, connName):
+		"""
+		Reads the definitions from the .cnxml file that defines 'connName',
+		when it wasn't parsed at startup because it hadn't changed.
+		"""
+		connFile = self.dbConnectionNameToFiles.get(connName)
+		if not connFile or not connFile.endswith(".cnxml"):
+			return
+		try:
+			connDefs = self.getConnectionsFromFile(connFile)
+		except Exception as ex:
+			uex = ustr(ex)
+			dabo.log.error(_("Error loading database connection "
+					"info from file %(connFile)s:\n%(uex)s") % locals())
+			return
+		for k, v in connDefs.items():
+			if self.dbConnectionNameToFiles.get(k) == connFile:
+				self.dbConnectionDefs.setdefault(k, v)
+
+
 	def getConnectionNames(self):
 		"""Returns a list of all defined connection names"""
-		return self.dbConnectionDefs.keys()
+		return list(set(self.dbConnectionDefs).union(self.dbConnectionNameToFiles))
 
 
 	def closeConnections(self):
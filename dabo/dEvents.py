@@ -586,6 +586,20 @@ class SlidePanelCaptionClick(dEvent):
 	appliesToClass = classmethod(appliesToClass)
 
 
+class ConnectionUnhealthy(dEvent):
+	"""Occurs when a keep-alive check on a database connection fails.
+
+	Raised by the backend object and by the application. The EventData
+	contains the 'backend' object and the 'error' that was raised. Handlers
+	are called from the connection monitor's thread.
+	"""
+	def appliesToClass(eventClass, objectClass):
+		from dabo.dApp import dApp
+		from dabo.db.dBackend import dBackend
+		return issubclass(objectClass, (dApp, dBackend))
+	appliesToClass = classmethod(appliesToClass)
+
+
 class RowNumChanged(DataEvent):
 	"""Occurs when the RowNumber of the PrimaryBizobj of the dForm has changed."""
 	pass
@@ -22,7 +22,11 @@ if _defaultEncoding is None:
 	_defaultEncoding = dabo.getEncoding()
 
 _domains = {}
-_currentTrans = None
+# The merged message catalog for the current language and installed domains,
+# or None before install() is called. Catalogs are built once per combination
+# of domains and languages, and kept in _catalogCache.
+_catalog = None
+_catalogCache = {}
 
 _languageAliases = {
 		"catalan": "ca", "català":"ca",
@@ -55,15 +59,86 @@ _languageAliases = {
 def _(s):
 	"""Return the localized translation of s, or s if translation not possible."""
 	try:
-		return _currentTrans(s)
-	except TypeError:
+		ret = _catalog.get(s)
+	except (AttributeError, TypeError):
+		# Either no catalog is installed, or s can't be looked up.
 		return s
+	if ret is None:
+		return unicode(s)
+	return ret
 
 
 def n_(s):
 	return s
 
 
+def lazy_(s):
+	"""
+	Return an object that is translated each time it is rendered, so that
+	strings created before install() or setLanguage() is called still show
+	in the current language.
+	"""
+	return LazyTranslation(s)
+
+
+class LazyTranslation(object):
+	"""
+	A translatable string whose lookup is deferred until it is converted to
+	a string, formatted, or used like one. Create these with lazy_().
+
+	Note that _() is a single dict lookup, which is cheaper than creating one
+	of these objects; only use them for strings that have to follow language
+	changes, such as module-level constants.
+
+	Like the strings they translate to, these objects compare and hash by
+	their translated text, so their hash changes with the language: don't
+	keep them in sets or as dict keys across calls to setLanguage().
+	"""
+	__slots__ = ("msg", )
+
+	def __init__(self, msg):
+		self.msg = msg
+
+	def __unicode__(self):
+		return _(self.msg)
+
+	def __str__(self):
+		val = _(self.msg)
+		if isinstance(val, unicode):
+			val = val.encode(_defaultEncoding or "utf-8")
+		return val
+
+	def __repr__(self):
+		return "lazy_(%r)" % self.msg
+
+	def __len__(self):
+		return len(_(self.msg))
+
+	def __mod__(self, args):
+		return _(self.msg) % args
+
+	def __add__(self, other):
+		return _(self.msg) + other
+
+	def __radd__(self, other):
+		return other + _(self.msg)
+
+	def __eq__(self, other):
+		if isinstance(other, LazyTranslation):
+			other = _(other.msg)
+		return _(self.msg) == other
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __hash__(self):
+		return hash(_(self.msg))
+
+	def __getattr__(self, att):
+		# String methods such as format(), strip() or splitlines().
+		return getattr(_(self.msg), att)
+
+
 def install(domain="dabo", localedir=None, unicode_mo=True):
 	"""Install the gettext translation service for the passed domain.
 
@@ -87,16 +162,29 @@ def isValidDomain(domain, localedir):
 def setLanguage(lang=None, charset=None):
 	"""Change the language that strings get translated to, for all installed domains.
 	NOTE: rather than call the install() method of the gettext.translation objects,
-	which would globally bind the '_' name, we'll just set the '_currentTrans'
-	name to the translation object.
+	which would globally bind the '_' name, we'll just set the '_catalog' name to
+	the merged catalogs of the translation objects.
 	"""
-	from dabo.lib.utils import ustr
-	global _domains, _currentTrans
+	global _catalog
 	lang = _languageAliases.get(lang.lower(), lang)
 
 	if lang is not None and isinstance(lang, basestring):
 		lang = [lang]
 
+	key = (tuple(sorted(_domains.items())), tuple(lang or ()))
+	catalog = _catalogCache.get(key)
+	if catalog is None:
+		catalog = _catalogCache[key] = _buildCatalog(lang, charset)
+	_catalog = catalog
+
+
+def _buildCatalog(lang, charset):
+	"""
+	Return a dict of all the messages for the passed languages in the installed
+	domains. Messages from the application's domains take precedence over Dabo's,
+	just as they would with the translation objects' fallbacks.
+	"""
+	translations = []
 	daboTranslation = None
 	daboLocaleDir = _domains.get("dabo", None)
 	if daboLocaleDir:
@@ -104,6 +192,7 @@ def setLanguage(lang=None, charset=None):
 			daboTranslation = gettext.translation("dabo", daboLocaleDir, languages=lang, codeset=charset)
 		except IOError:
 			# No translation file found
+			from dabo.lib.utils import ustr
 			dabo.log.error("""
 No translation file found for domain 'dabo'.
     Locale dir = %s
@@ -111,23 +200,31 @@ No translation file found for domain 'dabo'.
     Codeset = %s """ % (daboLocaleDir, ustr(lang), charset))
 			# Default to US English
 			daboTranslation = gettext.translation("dabo", daboLocaleDir, languages=["en"], codeset=charset)
-		_currentTrans = daboTranslation.ugettext
 
 	for domain, localedir in _domains.items():
 		if domain == "dabo":
 			continue  ## already handled separately above
 		try:
-			translation = gettext.translation(domain, localedir, languages=lang, codeset=charset)
+			translations.append(gettext.translation(domain, localedir, languages=lang, codeset=charset))
 		except IOError:
+			from dabo.lib.utils import ustr
 			dabo.log.error("No translation found for domain '%s' and language %s." % (domain, lang))
 			dabo.log.error("""
 No translation file found for domain '%s'.
     Locale dir = %s
     Languages = %s
-    Codeset = %s """ % (domain, daboLocaleDir, ustr(lang), charset))
-		if daboTranslation:
-			translation.add_fallback(daboTranslation)
-		_currentTrans = translation.ugettext
+    Codeset = %s """ % (domain, localedir, ustr(lang), charset))
+	if daboTranslation:
+		translations.append(daboTranslation)
+
+	catalog = {}
+	for translation in translations:
+		# Each translation may have fallbacks for the less specific languages.
+		while translation is not None:
+			for msg, trans in getattr(translation, "_catalog", {}).iteritems():
+				catalog.setdefault(msg, trans)
+			translation = getattr(translation, "_fallback", None)
+	return catalog
 
 
 def getDaboLocaleDir():
@@ -73,8 +73,9 @@ class dPref(object):
 			if cxn:
 				self._cxn = cxn
 			else:
-				self._cxn = dabo.db.dConnection(connectInfo={"DbType": "SQLite", "Database": db},
-						forceCreate=True)
+				connectInfo = {"DbType": "SQLite", "Database": db}
+				connectInfo.update(dabo.preferenceDbOptions)
+				self._cxn = dabo.db.dConnection(connectInfo=connectInfo, forceCreate=True)
 			self._cursor = self._cxn.getDaboCursor()
 			self._cursor.IsPrefCursor = True
 			# Make sure that the table exists
@@ -34,7 +34,8 @@ from dConnection import dConnection
 from dCursorMixin import dCursorMixin
 from dConnectInfo import dConnectInfo
 from dTable import dTable
-from dDataSet import dDataSet
+from dDataSet import dDataSet, dDataSetView, dRecordList
+from dQueryStats import dQueryStats, queryStats
 import dabo
 from dabo.dException import FieldNotFoundException
 
@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 import sys
+import threading
 import time
 import re
 import datetime
-import threading
 import decimal
 import dabo
 from dabo.dLocalize import _
@@ -24,6 +24,10 @@ class dBackend(dObject):
 	nameEnclosureChar = '"'
 	# The character used in sql to represent parameters to be substituted
 	paramPlaceholder = "%s"
+	# The query sent to keep idle connections alive and check their health
+	keepAliveSQL = "select 1"
+	# Can insert statements return values of the new row in a RETURNING clause?
+	insertReturning = False
 
 	def __init__(self):
 		self._baseClass = dBackend
@@ -33,6 +37,9 @@ class dBackend(dObject):
 		# Reference to the cursor that is using this object
 		self._cursor = None
 		self.lastExecuteTime = time.time() # For keep alive interval
+		# Held by the cursors while they execute queries, and by the connection
+		# monitor's thread while it checks the connection.
+		self._connectionLock = threading.RLock()
 
 
 	def isValidModule(self):
@@ -171,6 +178,16 @@ class dBackend(dObject):
 			return None
 
 
+	def getInsertReturningClause(self, fields, autoQuote=True):
+		"""
+		Return the clause added to an insert statement to have it return the
+		values of the passed fields in the new row. Only used by backends that
+		set 'insertReturning' to True.
+		"""
+		return " returning %s" % ", ".join([self.encloseNames(fld, autoQuote)
+				for fld in fields])
+
+
 	def getTables(self, cursor, includeSystemTables=False):
 		"""
 		Return a tuple of the tables in the current database.
@@ -617,42 +634,35 @@ class dBackend(dObject):
 	###########################################
 
 	def _applyKeepAlive(self):
-		"""Start a thread to keep the connection alive."""
-
-		class WorkerThread(threading.Thread):
-			def __init__(self, backendObj):
-				threading.Thread.__init__(self)
-				self._toStop = False
-				self.backendObj = backendObj
-
-			def run(self):
-				kal = self.backendObj.KeepAliveInterval
-				app = self.backendObj.Application
-
-				while self.backendObj._connection is None:
-				    time.sleep(5)
-
-				con = self.backendObj._connection
-				cur = con.cursor()
-
-				while True:
-					time.sleep(5)
-
-					if kal is None or not app or getattr(app, "_finished", False):
-						self._toStop = True
-					if self._toStop:
-						return
-
-					if time.time() - self.backendObj.lastExecuteTime > kal:
-						cur.execute("select 1")
-						self.backendObj.lastExecuteTime = time.time()
-
-		existingThread = getattr(self, "_keepAliveThread", None)
-		if existingThread:
-			existingThread._toStop = True
-		if self.KeepAliveInterval is not None:
-			wt = self._keepAliveThread = WorkerThread(self)
-			wt.start()
+		"""Register with the connection monitor to keep the connection alive."""
+		from dConnectionMonitor import getConnectionMonitor
+		mon = getConnectionMonitor()
+		if self.KeepAliveInterval is None:
+			mon.unregister(self)
+		else:
+			mon.register(self)
+
+
+	def checkConnection(self):
+		"""
+		Sends the keepAliveSQL query on a cursor of its own, so that the main
+		cursor's results are not disturbed. Called by the connection monitor;
+		raises the dbapi error if the connection has failed. When a cursor is
+		executing a query, the connection is in use and isn't checked.
+		"""
+		lock = self._connectionLock
+		if not lock.acquire(False):
+			return
+		try:
+			cur = self._connection.cursor()
+			try:
+				cur.execute(self.keepAliveSQL)
+				cur.fetchall()
+			finally:
+				cur.close()
+		finally:
+			lock.release()
+
 
 	def _getEncoding(self):
 		"""Get backend encoding."""
@@ -45,6 +45,12 @@ class dConnectInfo(dObject):
 
 	If you are running a remote app, should set the RemoteHost property instead of Host. The
 	DbType will be "web".
+
+	Any other keys in the dict are stored in CustomParameters, and passed on to
+	the backend when connecting. SQLite, for example, accepts tuning settings::
+
+		connDict = {"DbType": "SQLite", "Database": "local.db",
+			"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000}
 	"""
 	def __init__(self, connInfo=None, **kwargs):
 		self._baseClass = dConnectInfo
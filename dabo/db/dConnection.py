@@ -37,6 +37,8 @@ class dConnection(dObject):
 
 
 	def close(self):
+		# Stop any keep-alive checks before closing the connection.
+		self.getBackendObject().KeepAliveInterval = None
 		self._connection.close()
 
 
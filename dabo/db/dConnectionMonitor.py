@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+import heapq
+import itertools
+import threading
+import time
+import weakref
+import dabo
+from dabo.dLocalize import _
+import dabo.dEvents as dEvents
+
+
+
+class dConnectionMonitor(object):
+	"""
+	Sends the keep-alive queries and health checks for every backend object
+	that has a KeepAliveInterval, using a single background thread.
+
+	Each registered backend has an entry in a heap ordered by the time its
+	next check is due, so the thread sleeps until the earliest one. A backend
+	that has executed a query within its interval doesn't need a keep-alive
+	query, so its check is simply moved back. When a check fails, the
+	ConnectionUnhealthy event is raised on the backend and on the application.
+
+	There is normally one monitor per process, returned by getConnectionMonitor().
+	Backends register themselves when their KeepAliveInterval is set, and the
+	application stops the monitor in dApp.finish().
+	"""
+	# Seconds to wait before checking again on a backend that isn't connected yet.
+	connectWait = 5
+
+	def __init__(self):
+		self._heap = []
+		# Maps id(backend) to its current heap entry. Entries are lists of
+		# [dueTime, sequence, backendRef, active]; replaced entries are
+		# marked inactive and discarded when they reach the top of the heap.
+		self._entries = {}
+		self._sequence = itertools.count()
+		self._condition = threading.Condition()
+		self._thread = None
+		# Incremented by stop(), so that a stopped thread exits even if a new
+		# one has been started in the meantime.
+		self._generation = 0
+
+
+	def register(self, backend):
+		"""Schedules keep-alive checks for 'backend', using its KeepAliveInterval.
+		Registering a backend again just reschedules it.
+		"""
+		interval = backend.KeepAliveInterval
+		if interval is None:
+			self.unregister(backend)
+			return
+		with self._condition:
+			self._schedule(backend, backend.lastExecuteTime + interval)
+			if self._thread is None:
+				self._thread = threading.Thread(target=self._run,
+						args=(self._generation, ), name="dConnectionMonitor")
+				self._thread.setDaemon(True)
+				self._thread.start()
+			self._condition.notify()
+
+
+	def unregister(self, backend):
+		"""Stops the checks for 'backend'."""
+		with self._condition:
+			entry = self._entries.pop(id(backend), None)
+			if entry:
+				entry[3] = False
+
+
+	def stop(self, timeout=None):
+		"""Stops the monitor thread, and removes all registered backends."""
+		with self._condition:
+			self._generation += 1
+			self._heap = []
+			self._entries.clear()
+			thread = self._thread
+			self._thread = None
+			self._condition.notifyAll()
+		if thread and thread is not threading.currentThread():
+			thread.join(timeout)
+
+
+	def _schedule(self, backend, due):
+		"""Adds a heap entry for the backend. Must be called with the lock held."""
+		key = id(backend)
+		old = self._entries.get(key)
+		if old:
+			old[3] = False
+		def cleanup(ref, key=key):
+			with self._condition:
+				entry = self._entries.get(key)
+				if entry and entry[2] is ref:
+					del self._entries[key]
+		entry = [due, self._sequence.next(), weakref.ref(backend, cleanup), True]
+		self._entries[key] = entry
+		heapq.heappush(self._heap, entry)
+
+
+	def _nextDue(self, generation):
+		"""Waits for the next due backend and returns a (backend, entry) tuple,
+		or (None, None) when the monitor is stopped. Must be called with the
+		lock held.
+		"""
+		while self._generation == generation:
+			heap = self._heap
+			while heap and not heap[0][3]:
+				heapq.heappop(heap)
+			if not heap:
+				self._condition.wait()
+				continue
+			wait = heap[0][0] - time.time()
+			if wait > 0:
+				self._condition.wait(wait)
+				continue
+			entry = heapq.heappop(heap)
+			backend = entry[2]()
+			if backend is not None:
+				return backend, entry
+		return None, None
+
+
+	def _run(self, generation):
+		while True:
+			with self._condition:
+				backend, entry = self._nextDue(generation)
+				if backend is None:
+					return
+			interval = backend.KeepAliveInterval
+			if interval is None:
+				self.unregister(backend)
+				continue
+			if backend._connection is None:
+				due = time.time() + min(interval, self.connectWait)
+			else:
+				idle = time.time() - backend.lastExecuteTime
+				if idle >= interval:
+					self._check(backend)
+				due = backend.lastExecuteTime + interval
+			with self._condition:
+				# Skip backends that were unregistered or rescheduled during the check.
+				if self._entries.get(id(backend)) is entry:
+					self._schedule(backend, max(due, time.time() + 1))
+			backend = entry = None
+
+
+	def _check(self, backend):
+		try:
+			backend.checkConnection()
+		except Exception, e:
+			dabo.log.error(_("Connection health check failed: %s") % e)
+			eventData = {"backend": backend, "error": e}
+			backend.raiseEvent(dEvents.ConnectionUnhealthy, eventData=eventData)
+			app = dabo.dAppRef
+			if app is not None:
+				app.raiseEvent(dEvents.ConnectionUnhealthy, eventData=eventData)
+		else:
+			backend.lastExecuteTime = time.time()
+
+
+	def _getBackendCount(self):
+		with self._condition:
+			return len(self._entries)
+
+
+	def _getIsRunning(self):
+		thread = self._thread
+		return thread is not None and thread.isAlive()
+
+
+	BackendCount = property(_getBackendCount, None, None,
+			_("Number of backend objects being monitored  (read-only) (int)"))
+
+	IsRunning = property(_getIsRunning, None, None,
+			_("Is the monitor thread running?  (read-only) (bool)"))
+
+
+
+_monitor = None
+_monitorLock = threading.Lock()
+
+def getConnectionMonitor():
+	"""Returns the process-wide dConnectionMonitor, creating it if needed."""
+	global _monitor
+	with _monitorLock:
+		if _monitor is None:
+			_monitor = dConnectionMonitor()
+		return _monitor
+
+
+def stopConnectionMonitor():
+	"""Stops the process-wide monitor, if one has been created."""
+	if _monitor is not None:
+		_monitor.stop(timeout=5)
@@ -2,6 +2,7 @@
 # dabo/db/dCursorMixin
 
 import datetime
+import logging
 import time
 import re
 from decimal import Decimal
@@ -12,8 +13,10 @@ from dabo.dLocalize import _
 import dabo.dException as dException
 from dabo.dObject import dObject
 from dNoEscQuoteStr import dNoEscQuoteStr
-from dabo.db.dDataSet import dDataSet
+from dabo.db.dDataSet import dDataSet, dDataSetView, dRecordList
+from dabo.db.dQueryStats import queryStats
 from dabo.lib import dates
+from dabo.lib import metrics
 from dabo.lib.utils import noneSortKey, caseInsensitiveSortKey
 from dabo.lib.utils import ustr
 
@@ -26,6 +29,8 @@ class dCursorMixin(dObject):
 	_call_initProperties = False
 	# Make these class attributes, so that they are shared among all instances
 	_fieldStructure = {}
+	# Largest number of values the batched methods put in one 'in' clause.
+	_batchSize = 500
 
 	def __init__(self, sql="", *args, **kwargs):
 		self._convertStrToUnicode = True
@@ -96,7 +101,10 @@ class dCursorMixin(dObject):
 		# it will be a separate object.
 		self.sqlManager = self
 		# Attribute that holds the data of the cursor
-		self._records = dDataSet()
+		self._records = dRecordList()
+		# True when a dDataSetView may still refer to self._records; see
+		# _getMutableRecords().
+		self._recordsViewed = False
 		# Attribute that holds the current row number
 		self.__rownumber = -1
 		# Data structure info
@@ -316,7 +324,12 @@ class dCursorMixin(dObject):
 		return field_val
 
 
-	def _dblogExecute(self, msg, sql="", params=None, log=dabo.dbActivityLog.info):
+	def _dblogExecute(self, msg, sql="", params=None, log=None):
+		if log is None:
+			# Don't bother formatting the message if it would be discarded.
+			if not dabo.dbActivityLog.isEnabledFor(logging.INFO):
+				return
+			log = dabo.dbActivityLog.info
 		if params is None:
 			params = tuple()
 		if sql:
@@ -337,6 +350,12 @@ class dCursorMixin(dObject):
 
 	def execute(self, sql, params=None, errorClass=None, convertQMarks=False):
 		"""Execute the sql, and populate the DataSet if it is a select statement."""
+		# The connection monitor's thread sends its queries on the same connection.
+		with self.BackendObject._connectionLock:
+			return self._execute(sql, params, errorClass, convertQMarks)
+
+
+	def _execute(self, sql, params, errorClass, convertQMarks):
 		# The idea here is to let the super class do the actual work in
 		# retrieving the data. However, many cursor classes can only return
 		# row information as a list, not as a dictionary. This method will
@@ -347,6 +366,7 @@ class dCursorMixin(dObject):
 			sql = self._qMarkToParamPlaceholder(sql)
 		# Some backends, notably Firebird, require that fields be specially marked.
 		sql = self.processFields(sql)
+		startTime = queryStats._enabled and not self.IsPrefCursor and time.time()
 		try:
 			if params:
 				res = self.superCursor.execute(self, sql, params)
@@ -357,29 +377,7 @@ class dCursorMixin(dObject):
 				if not self.IsPrefCursor:
 					self._dblogExecute("execute()", sql)
 		except Exception, e:
-			# There can be cases where errors are expected. In those cases, the
-			# calling routine will pass the class of the expected error, and will
-			# handle it appropriately.
-			if errorClass is not None and isinstance(e, errorClass):
-				raise e
-			self._dblogExecute("execute() FAILED", sql, params)
-
-			# Database errors need to be decoded from database encoding.
-			try:
-				errMsg = unicode(str(e), self.Encoding)
-			except UnicodeError:
-				errMsg = ustr(e)
-			# If this is due to a broken connection, let the user know.
-			# Different backends have different messages, but they
-			# should all contain the string 'connect' in them.
-			if "connect" in errMsg.lower():
-				raise dException.ConnectionLostException(errMsg)
-			elif "access" in errMsg.lower():
-				raise dException.DBNoAccessException(errMsg)
-			else:
-				errMsg = _("DBQueryException encountered in execute(): %s") % errMsg
-				self._dblogExecute(errMsg, sql)
-				raise dException.DBQueryException(errMsg)
+			self._raiseExecuteError(e, "execute()", sql, params, errorClass)
 
 		# Set the last execute time in case there is a Keep Alive Interval
 		self.BackendObject.lastExecuteTime = time.time()
@@ -394,6 +392,9 @@ class dCursorMixin(dObject):
 		if sql.split(None, 1)[0].lower() not in ("select", "pragma"):
 			# No need to massage the data for DML commands
 			self._records = dDataSet(tuple())
+			if startTime:
+				queryStats.record("execute", sql, params, time.time() - startTime,
+						getattr(self, "rowcount", -1), self)
 			return res
 
 		try:
@@ -418,12 +419,75 @@ class dCursorMixin(dObject):
 				tmpRows.append(dic)
 			_records = tmpRows
 
-		self._records = dDataSet(_records)
+		self._records = dRecordList(_records)
 		# This will handle bounds issues
 		self.RowNumber = self.RowNumber
+		if startTime:
+			queryStats.record("execute", sql, params, time.time() - startTime,
+					len(_records), self)
 		return res
 
 
+	def executemany(self, sql, paramsList, errorClass=None, convertQMarks=False):
+		"""
+		Execute the sql, which should be a DML statement, once for every
+		sequence of parameters in 'paramsList'.
+		"""
+		with self.BackendObject._connectionLock:
+			return self._executemany(sql, paramsList, errorClass, convertQMarks)
+
+
+	def _executemany(self, sql, paramsList, errorClass, convertQMarks):
+		if isinstance(sql, unicode):
+			sql = sql.encode(self.Encoding)
+		if convertQMarks:
+			sql = self._qMarkToParamPlaceholder(sql)
+		sql = self.processFields(sql)
+		paramsList = list(paramsList)
+		startTime = queryStats._enabled and not self.IsPrefCursor and time.time()
+		try:
+			res = self.superCursor.executemany(self, sql, paramsList)
+			if not self.IsPrefCursor:
+				self._dblogExecute("executemany() (%s rows)" % len(paramsList), sql,
+						paramsList[:1] and paramsList[0])
+		except Exception, e:
+			self._raiseExecuteError(e, "executemany()", sql, paramsList[:1] and paramsList[0],
+					errorClass)
+		self.BackendObject.lastExecuteTime = time.time()
+		self._records = dDataSet(tuple())
+		if startTime:
+			queryStats.record("executemany", sql, None, time.time() - startTime,
+					len(paramsList), self)
+		return res
+
+
+	def _raiseExecuteError(self, e, msg, sql, params, errorClass=None):
+		"""Logs the failure of execute() or executemany(), and raises the matching dException."""
+		# There can be cases where errors are expected. In those cases, the
+		# calling routine will pass the class of the expected error, and will
+		# handle it appropriately.
+		if errorClass is not None and isinstance(e, errorClass):
+			raise e
+		self._dblogExecute("%s FAILED" % msg, sql, params)
+
+		# Database errors need to be decoded from database encoding.
+		try:
+			errMsg = unicode(str(e), self.Encoding)
+		except UnicodeError:
+			errMsg = ustr(e)
+		# If this is due to a broken connection, let the user know.
+		# Different backends have different messages, but they
+		# should all contain the string 'connect' in them.
+		if "connect" in errMsg.lower():
+			raise dException.ConnectionLostException(errMsg)
+		elif "access" in errMsg.lower():
+			raise dException.DBNoAccessException(errMsg)
+		else:
+			errMsg = _("DBQueryException encountered in %(msg)s: %(errMsg)s") % locals()
+			self._dblogExecute(errMsg, sql)
+			raise dException.DBQueryException(errMsg)
+
+
 	def executeSafe(self, sql, params=None):
 		"""
 		Execute the passed SQL using an auxiliary cursor.
@@ -482,6 +546,7 @@ class dCursorMixin(dObject):
 
 
 	def requery(self, params=None, convertQMarks=False):
+		startTime = queryStats._enabled and time.time()
 		currSQL = self.CurrentSQL
 		newQuery = (self._lastSQL != currSQL)
 		self._lastSQL = currSQL
@@ -509,6 +574,9 @@ class dCursorMixin(dObject):
 			except dException.NoRecordsException:
 				# No big deal
 				pass
+		if startTime:
+			queryStats.record("requery", currSQL, params, time.time() - startTime,
+					self.RowCount, self)
 		return True
 
 
@@ -527,6 +595,7 @@ class dCursorMixin(dObject):
 			target._types[field_alias] = dabo.db.getPythonType(field_type)
 
 
+	@metrics.timed("cursor.sort")
 	def sort(self, col, ordr=None, caseSensitive=True):
 		"""
 		Sort the result set on the specified column in the specified order. If the sort
@@ -651,9 +720,8 @@ class dCursorMixin(dObject):
 			sortKey = noneSortKey
 		sortList.sort(key=sortKey, reverse=(ordr == "DESC"))
 
-		# Extract the rows into a new list, then convert them back to the _records tuple
-		newRows = [elem[1] for elem in sortList]
-		self._records = dDataSet(newRows)
+		# Extract the rows into a new list to hold the records
+		self._records = dRecordList([elem[1] for elem in sortList])
 
 		# restore the RowNumber
 		self.moveToPK(currRowKey)
@@ -690,13 +758,13 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
 		colTemplate = """			<column name="%s" type="%s">%s</column>"""
 
-		rowXML = ""
+		rowXML = []
 		for rec in self._records:
 			recInfo = [ colTemplate % (k, self.getType(v), self.escape(v))
 					for k, v in rec.items() ]
-			rowXML += rowTemplate % "\n".join(recInfo)
+			rowXML.append(rowTemplate % "\n".join(recInfo))
 		return base % (self.Encoding, self.AutoPopulatePK, self.KeyField,
-				self.Table, rowXML)
+				self.Table, "".join(rowXML))
 
 
 	def _xmlForRow(self, row=None):
@@ -779,9 +847,9 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 			return recKey in self._mementos or (includeNewUnchanged and recKey in self._newRecords)
 
 
-	def setNewFlag(self):
+	def setNewFlag(self, row=None):
 		"""
-		Set the current record to be flagged as a new record.
+		Set the current record, or the passed row, to be flagged as a new record.
 
 		dBizobj will automatically call this method as appropriate, but if you are
 		using dCursor without a proxy dBizobj, you'll need to manually call this
@@ -794,22 +862,27 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 			cursor.setNewFlag()
 
 		"""
+		if row is None:
+			row = self.RowNumber
 		pk = None
 		if self.KeyField:
-			pk = self.getPK()
+			pk = self.getPK(row)
 			self._newRecords[pk] = None
 		# Add the 'new record' flag
-		self._records[self.RowNumber][kons.CURSOR_TMPKEY_FIELD] = pk
+		self._records[row][kons.CURSOR_TMPKEY_FIELD] = pk
 
 
-	def genTempAutoPK(self):
+	def genTempAutoPK(self, row=None):
 		"""
-		Create a temporary PK for a new record. Set the key field to this
-		value, and also create a temp field to hold it so that when saving the
-		new record, child records that are linked to this one can be updated
-		with the actual PK value.
+		Create a temporary PK for a new record, which is the current record
+		unless a row is passed. Set the key field to this value, and also
+		create a temp field to hold it so that when saving the new record,
+		child records that are linked to this one can be updated with the
+		actual PK value.
 		"""
-		rec = self._records[self.RowNumber]
+		if row is None:
+			row = self.RowNumber
+		rec = self._records[row]
 		kf = self.KeyField
 		try:
 			if isinstance(kf, tuple):
@@ -1149,10 +1222,16 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
 
 	def mmAssociateValues(self, otherField, listOfValues):
-		keyField = self.KeyField
-		pk = self.getPK()
-		for val in listOfValues:
-			self.mmAddToBoth(keyField, pk, otherField, val)
+		"""
+		Associates every value in 'listOfValues' in the 'other' table of a M-M
+		relationship with the current record. Values that don't exist in the
+		other table are added. Existing associations are left unchanged.
+		"""
+		otherPKs = self._mmLookupPKs(otherField, listOfValues, self._mmOtherTable,
+				self._mmOtherPKCol)
+		thisPK = self.getPK()
+		self._mmInsertAssociations(thisPK,
+				set(otherPKs.values()) - self._mmAssociatedPKs(thisPK, otherPKs.values()))
 
 
 	def mmDissociateValue(self, otherField, otherVal):
@@ -1170,28 +1249,9 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 		in the 'other' table of a M-M relationship. If no such association exists,
 		nothing happens.
 		"""
-		thisTable = self.Table
-		otherTable = self._mmOtherTable
-		thisPK = self.getPK()
-		for otherVal in listOfValues:
-			otherPK = self.lookupPKWithAdd(otherField, otherVal, otherTable, self._mmOtherPKCol)
-			aux = self.AuxCursor
-			sql = self._qMarkToParamPlaceholder("delete from %s where %s = ? and %s = ?"
-					% (self._assocTable, self._assocPKColThis, self._assocPKColOther))
-			try:
-				dabo.dbActivityLog.info("mmDissociateValues() SQL: %s, PARAMS: %s" % (
-						sql.decode(self.Encoding).replace("\n", " "), str((self._assocTable,
-					self._assocPKColThis, self._assocPKColOther))))
-			except StandardError:
-				# A problem with writing to the log, most likely due to encoding issues
-				try:
-					dabo.dbActivityLog.info("mmDissociateValues() SQL (failed to log PARAMS): %r" % sql)
-				except StandardError:
-					dabo.dbActivityLog.info("mmDissociateValues() (failed to log SQL and PARAMS)")
-			try:
-				aux.execute(sql, (thisPK, otherPK))
-			except dException.NoRecordsException:
-				pass
+		otherPKs = self._mmLookupPKs(otherField, listOfValues, self._mmOtherTable,
+				self._mmOtherPKCol, add=False)
+		self._mmDeleteAssociations(self.getPK(), otherPKs.values())
 
 
 	def mmDissociateAll(self):
@@ -1218,8 +1278,136 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 		Adds and/or removes association records so that the current record
 		is associated with every item in listOfValues, and none other.
 		"""
-		self.mmDissociateAll()
-		self.mmAssociateValues(otherField, listOfValues)
+		otherPKs = set(self._mmLookupPKs(otherField, listOfValues, self._mmOtherTable,
+				self._mmOtherPKCol).values())
+		thisPK = self.getPK()
+		current = self._mmAssociatedPKs(thisPK)
+		self._mmDeleteAssociations(thisPK, current - otherPKs)
+		self._mmInsertAssociations(thisPK, otherPKs - current)
+
+
+	def _mmKey(self, val):
+		"""Returns the value for comparing passed values with those from the backend."""
+		if isinstance(val, str):
+			try:
+				return val.decode(self.Encoding)
+			except UnicodeError:
+				pass
+		return val
+
+
+	def _mmLookupPKs(self, field, listOfValues, tbl, pkCol, add=True):
+		"""
+		Returns a dict that maps each value in 'listOfValues' to the PK of the record
+		in 'tbl' whose 'field' column contains that value. This takes one query for
+		every _batchSize values. If 'add' is True, the values that aren't found
+		are inserted into the table, as lookupPKWithAdd() would; otherwise they
+		are left out of the dict.
+		"""
+		aux = self.AuxCursor
+		vals = []
+		seen = set()
+		for val in listOfValues:
+			key = self._mmKey(val)
+			if key not in seen:
+				seen.add(key)
+				vals.append(key)
+		ret = {}
+		def fold(val):
+			return val.lower() if isinstance(val, basestring) else val
+		def lookup(vals):
+			# Returns the case-folded values of all the rows found, and of those
+			# that don't match any of the values exactly.
+			requested = set(vals)
+			found = set()
+			unmatched = set()
+			for chunk in self._chunks(vals):
+				sql = "select %s, %s from %s where %s in (%s)" % (pkCol, field, tbl, field,
+						", ".join(["?"] * len(chunk)))
+				aux.execute(sql, tuple(chunk), convertQMarks=True)
+				for row in xrange(aux.RowCount):
+					key = self._mmKey(aux.getFieldVal(field, row))
+					found.add(fold(key))
+					if key in requested:
+						ret.setdefault(key, aux.getFieldVal(pkCol, row))
+					else:
+						unmatched.add(fold(key))
+			return found, unmatched
+		found, unmatched = lookup(vals)
+		missing = [val for val in vals if val not in ret]
+		check = [val for val in missing if fold(val) in found]
+		if check or unmatched:
+			# The backend may have matched some of the values under a different
+			# spelling, for example because of a case-insensitive collation. Those
+			# can't be told apart in the results above, so look them up one at a
+			# time with the backend's own comparison before inserting anything.
+			# If a row differs by more than case from every value, check them all.
+			if not unmatched <= set(fold(val) for val in missing):
+				check = missing
+			sql = "select %s from %s where %s = ?" % (pkCol, tbl, field)
+			for val in check:
+				aux.execute(sql, (val, ), convertQMarks=True)
+				if aux.RowCount:
+					ret[val] = aux.getFieldVal(pkCol)
+			missing = [val for val in missing if val not in ret]
+		if not (missing and add):
+			return ret
+		folded = set([fold(val) for val in missing])
+		if len(folded) < len(missing):
+			# Some of the new values may be the same to the backend; insert them
+			# one at a time, so that each sees the ones added before it.
+			for val in missing:
+				ret[val] = self.lookupPKWithAdd(field, val, tbl, pkCol)
+			return ret
+		aux.executemany("insert into %s (%s) values (?)" % (tbl, field),
+				[(val, ) for val in missing], convertQMarks=True)
+		lookup(missing)
+		for val in missing:
+			if val not in ret:
+				ret[val] = self.lookupPKWithAdd(field, val, tbl, pkCol)
+		return ret
+
+
+	def _mmAssociatedPKs(self, thisPK, otherPKs=None):
+		"""
+		Returns the set of PKs in the 'other' table associated with the record
+		whose PK is 'thisPK'. If 'otherPKs' is passed, only those PKs are checked.
+		"""
+		aux = self.AuxCursor
+		otherCol = self._assocPKColOther
+		sql = "select %s from %s where %s = ?" % (otherCol, self._assocTable,
+				self._assocPKColThis)
+		if otherPKs is None:
+			aux.execute(sql, (thisPK, ), convertQMarks=True)
+			return set(aux.getFieldVal(otherCol, row) for row in xrange(aux.RowCount))
+		ret = set()
+		for chunk in self._chunks(list(otherPKs)):
+			aux.execute("%s and %s in (%s)" % (sql, otherCol, ", ".join(["?"] * len(chunk))),
+					(thisPK, ) + tuple(chunk), convertQMarks=True)
+			ret.update(aux.getFieldVal(otherCol, row) for row in xrange(aux.RowCount))
+		return ret
+
+
+	def _mmInsertAssociations(self, thisPK, otherPKs):
+		"""Adds association records between 'thisPK' and every PK in 'otherPKs'."""
+		if not otherPKs:
+			return
+		sql = "insert into %s (%s, %s) values (?, ?)" % (self._assocTable,
+				self._assocPKColThis, self._assocPKColOther)
+		self.AuxCursor.executemany(sql, [(thisPK, otherPK) for otherPK in otherPKs],
+				convertQMarks=True)
+
+
+	def _mmDeleteAssociations(self, thisPK, otherPKs):
+		"""Removes the association records between 'thisPK' and every PK in 'otherPKs'."""
+		aux = self.AuxCursor
+		for chunk in self._chunks(list(otherPKs)):
+			sql = "delete from %s where %s = ? and %s in (%s)" % (self._assocTable,
+					self._assocPKColThis, self._assocPKColOther, ", ".join(["?"] * len(chunk)))
+			try:
+				aux.execute(sql, (thisPK, ) + tuple(chunk), convertQMarks=True)
+			except dException.NoRecordsException:
+				pass
 
 
 	def mmAddToBoth(self, thisField, thisVal, otherField, otherVal):
@@ -1369,6 +1557,9 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 		If the optional	'flds' parameter is given, the result set will be filtered
 		to only include the specified fields. rowStart specifies the starting row
 		to include, and rows is the number of rows to return.
+
+		Every row is copied; if you only need to read the data, getDataSetView()
+		is much cheaper.
 		"""
 		_currentRow = self.RowNumber
 		rowCount = self.RowCount
@@ -1403,6 +1594,40 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 		return dDataSet(ds)
 
 
+	def getDataSetView(self, flds=(), rowStart=0, rows=None, returnInternals=False,
+			_rowChangeCallback=None):
+		"""
+		Returns a read-only dDataSetView over the records of this cursor.
+
+		The parameters are the same as for getDataSet(), but no rows are copied:
+		field projection and virtual fields are resolved as each row is read. If
+		'returnInternals' is True and no fields are specified, every row exposes
+		all of its own keys. Call the view's copy() method to get a mutable
+		dDataSet.
+		"""
+		rowCount = self.RowCount
+		if rows is None:
+			rows = rowCount
+		else:
+			rows = min(rowStart + rows, rowCount)
+		if rows < 1 or rowStart > rowCount:
+			return dDataSetView()
+
+		vFieldKeys = self.VirtualFields.keys()
+		if not flds:
+			vflds = vFieldKeys
+			if returnInternals:
+				flds = None
+			else:
+				flds = [f for f in self._records[rowStart] if f not in cursor_flags]
+		else:
+			vflds = [f for f in flds if f in vFieldKeys]
+			flds = [f for f in flds if f not in vFieldKeys]
+		self._recordsViewed = True
+		return dDataSetView(self._records, flds, vflds, start=rowStart, stop=rows,
+				cursor=self, rowChangeCallback=_rowChangeCallback)
+
+
 	def appendDataSet(self, ds, updateInternals=False):
 		"""
 		Appends the rows in the passed dataset to this cursor's dataset. No checking
@@ -1414,15 +1639,24 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 		if not isinstance(kf, tuple):
 			kf = (kf,)
 		autoPopulatePK = self.AutoPopulatePK
-		for rec in ds:
-			self.new()
-			if updateInternals:
-				self.genTempAutoPK()
-				self.setNewFlag()
-			for col, val in rec.items():
-				if autoPopulatePK and (col in kf):
-					continue
-				self.setFieldVal(col, val)
+		recs = self._getMutableRecords()
+		startCount = len(recs)
+		try:
+			# Same as calling new() for each record, but without moving the
+			# record pointer every time.
+			for rec in ds:
+				row = len(recs)
+				recs.append(self._getBlankRecord())
+				if updateInternals:
+					self.genTempAutoPK(row)
+					self.setNewFlag(row)
+				for col, val in rec.items():
+					if autoPopulatePK and (col in kf):
+						continue
+					self.setFieldVal(col, val, row=row)
+		finally:
+			if len(recs) > startCount:
+				self.RowNumber = len(recs) - 1
 
 
 	def cloneRecord(self):
@@ -1609,8 +1843,12 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 			rows = []
 			if self.isChanged(allRows=False, includeNewUnchanged=includeNewUnchanged):
 				rows = [self.RowNumber]
+		startTime = queryStats._enabled and time.time()
 		for row in rows:
 			saverow(row)
+		if startTime:
+			queryStats.record("save", None, None, time.time() - startTime, len(rows),
+					self, fp=self.Table)
 
 
 	def __saverow(self, row):
@@ -1619,12 +1857,14 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 		newrec = kons.CURSOR_TMPKEY_FIELD in rec
 
 		newPKVal = None
-		if newrec and self.AutoPopulatePK:
+		returning = self.BackendObject.insertReturning
+		if newrec and self.AutoPopulatePK and not (returning and not self._compoundKey):
 			# Some backends do not provide a means to retrieve
 			# auto-generated PKs; for those, we need to create the
 			# PK before inserting the record so that we can pass it on
 			# to any linked child records. NOTE: if you are using
-			# compound PKs, this cannot be done.
+			# compound PKs, this cannot be done. Backends that support
+			# RETURNING return the generated PK with the insert instead.
 			newPKVal = self.pregenPK()
 			if newPKVal and not self._compoundKey:
 				self.setFieldVal(self.KeyField, newPKVal, row)
@@ -1634,6 +1874,7 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 		else:
 			diff = self.getRecordStatus(row)
 		aq = self.AutoQuoteNames
+		returnFields = None
 		if diff:
 			if newrec:
 				flds = ""
@@ -1673,11 +1914,15 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 					# know that we are expecting the backend to generate the PK, so send
 					# NULL as the PK Value:
 					flds = self.KeyField
-					vals = "NULL"
+					vals = [None]
 				nms = self.BackendObject.encloseNames(self.Table, aq)
 				placeHolders = len(vals) * [self.ParamPlaceholder]
 				sql = "insert into %s (%s) values (%s) " % (nms, flds, ",".join(placeHolders))
 				params = tuple(vals)
+				returnFields = returning and self._getInsertReturnFields(newPKVal)
+				if returnFields:
+					# Get the generated PK and default values with the insert.
+					sql += self.BackendObject.getInsertReturningClause(returnFields, aq)
 			else:
 				pkWhere = self.makePkWhere(row)
 				updClause, params = self.makeUpdClause(diff)
@@ -1687,14 +1932,16 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 			aux = self.AuxCursor
 			res = aux.execute(sql, params)
 
-			if newrec and self.AutoPopulatePK and (newPKVal is None):
+			if newrec and returnFields:
+				self._setInsertReturnedValues(aux, returnFields, row)
+			elif newrec and self.AutoPopulatePK and (newPKVal is None):
 				# Call the database backend-specific code to retrieve the
 				# most recently generated PK value.
 				newPKVal = aux.getLastInsertID()
 				if newPKVal and not self._compoundKey:
 					self.setFieldVal(self.KeyField, newPKVal, row)
 
-			if newrec and self._nullDefaults:
+			if newrec and self._nullDefaults and not returnFields:
 				# We need to retrieve any new default values
 				aux = self.AuxCursor
 				if not isinstance(self.KeyField, tuple):
@@ -1736,6 +1983,40 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 					self.BackendObject.noResultsOnSave()
 
 
+	def _getInsertReturnFields(self, newPKVal):
+		"""
+		Return the fields whose values an insert statement should return: the
+		generated PK, and the default values if the new record was created
+		with NULL defaults.
+		"""
+		ret = []
+		if self.AutoPopulatePK and newPKVal is None and not self._compoundKey:
+			ret.append(self.KeyField)
+		if self._nullDefaults:
+			nonUpdateFields = self.getNonUpdateFields()
+			ret.extend([ds[0] for ds in self.DataStructure
+					if ds[0] not in nonUpdateFields and ds[0] not in ret])
+		return ret
+
+
+	def _setInsertReturnedValues(self, aux, fields, row):
+		"""Store the values returned by an insert in the passed row."""
+		rows = aux.fetchall()
+		if not rows:
+			return
+		ret = rows[0]
+		if isinstance(ret, dict):
+			# Some backends change the case of the names.
+			ret = dict((fld.lower(), val) for fld, val in ret.items())
+			vals = [ret.get(fld.lower()) for fld in fields]
+		else:
+			vals = ret
+		for fld, val in zip(fields, vals):
+			if fld == self.KeyField and not val:
+				continue
+			self.setFieldVal(fld, self._correctFieldType(val, fld), row)
+
+
 	def _clearMemento(self, row=None):
 		"""Erase the memento for the passed row, or current row if none passed."""
 		if row is None:
@@ -1825,12 +2106,28 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
 	def new(self):
 		"""Add a new record to the data set."""
-		blank = self._getBlankRecord()
-		self._records = dDataSet(self._records + (blank,))
+		self._getMutableRecords().append(self._getBlankRecord())
 		# Adjust the RowCount and position
 		self.RowNumber = self.RowCount - 1
 
 
+	def _getMutableRecords(self):
+		"""
+		Returns the records as a dRecordList, so that rows can be added and
+		removed in place. After a requery, sort or filter, the records are
+		copied into a new dRecordList once; after that this costs nothing.
+		Views returned by getDataSetView() also cause one copy, so that they
+		keep the rows they were created with.
+		"""
+		recs = self._records
+		if (type(recs) is not dRecordList or recs._sourceDataSet is not None
+				or self._recordsViewed):
+			# Changing a filtered data set discards its filters, as it always has.
+			recs = self._records = dRecordList(recs)
+			self._recordsViewed = False
+		return recs
+
+
 	def cancel(self, allRows=False, ignoreNoRecords=None):
 		"""Revert any changes to the data set back to the original values."""
 		if ignoreNoRecords is None:
@@ -1881,9 +2178,7 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 				# We simply need to remove the row, and clear the memento and newrec flag.
 				self._clearMemento(row)
 				self._clearNewRecord(row)
-				recs = list(self._records)
-				del recs[recs.index(rec)]
-				self._records = dDataSet(recs)
+				del self._getMutableRecords()[row]
 				if self.RowNumber >= self.RowCount:
 					self.RowNumber = self.RowCount - 1
 				return
@@ -1894,6 +2189,77 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 			self._clearMemento(row)
 
 
+	def _chunks(self, vals):
+		"""Splits the list of values into lists small enough for one 'in' clause."""
+		size = self._batchSize
+		return [vals[pos:pos + size] for pos in xrange(0, len(vals), size)]
+
+
+	def _whereIn(self, fields, vals, table=None):
+		"""
+		Returns a list of (whereClause, params) tuples that together match the
+		records whose 'fields' contain one of the values in 'vals'. For more than
+		one field, each value is a tuple with a value for every field.
+		"""
+		bo = self.BackendObject
+		prefix = bo.getWhereTablePrefix(table or self.Table, autoQuote=self.AutoQuoteNames)
+		names = [prefix + bo.encloseNames(fld, self.AutoQuoteNames) for fld in fields]
+		ret = []
+		for chunk in self._chunks(list(vals)):
+			if len(names) == 1:
+				where = "%s in (%s)" % (names[0], ", ".join(["?"] * len(chunk)))
+				params = tuple(chunk)
+			else:
+				cond = "(%s)" % " and ".join(["%s = ?" % name for name in names])
+				where = " or ".join([cond] * len(chunk))
+				params = tuple([val for key in chunk for val in key])
+			ret.append((self._qMarkToParamPlaceholder(where), params))
+		return ret
+
+
+	def selectIn(self, selectField, fields, vals, table=None):
+		"""
+		Returns the list of 'selectField' values of the records in 'table' (by default
+		the cursor's Table) whose 'fields' contain one of the values in 'vals'.
+		"""
+		aux = self.AuxCursor
+		table = table or self.Table
+		ret = []
+		for where, params in self._whereIn(fields, vals, table):
+			aux.execute("select %s from %s where %s" % (selectField, table, where), params)
+			ret.extend([aux.getFieldVal(selectField, row) for row in xrange(aux.RowCount)])
+		return ret
+
+
+	def countIn(self, fields, vals, table=None):
+		"""
+		Returns the number of records in 'table' (by default the cursor's Table)
+		whose 'fields' contain one of the values in 'vals'.
+		"""
+		aux = self.AuxCursor
+		table = table or self.Table
+		ret = 0
+		for where, params in self._whereIn(fields, vals, table):
+			aux.execute("select count(*) as cnt from %s where %s" % (table, where), params)
+			ret += aux.getFieldVal("cnt")
+		return ret
+
+
+	def deleteIn(self, fields, vals, table=None):
+		"""
+		Deletes the records in 'table' (by default the cursor's Table) whose 'fields'
+		contain one of the values in 'vals', using one statement for every
+		_batchSize values. The cursor's data set isn't affected.
+		"""
+		aux = self.AuxCursor
+		table = table or self.Table
+		for where, params in self._whereIn(fields, vals, table):
+			try:
+				aux.execute("delete from %s where %s" % (table, where), params)
+			except dException.NoRecordsException:
+				pass
+
+
 	def delete(self, delRowNum=None):
 		"""Delete the specified row, or the currently active row."""
 		if self.RowNumber < 0 or self.RowCount == 0:
@@ -1930,12 +2296,55 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 		self._removeRow(delRowNum)
 
 
+	def deleteRows(self, rows=None):
+		"""
+		Delete the specified rows, or all rows, with one statement for every
+		_batchSize rows instead of one for every row. As in delete(), a backend
+		that reports the number of affected records will raise an error if any
+		of the records no longer exists, and nothing is deleted in that case.
+		"""
+		if rows is None:
+			rows = xrange(self.RowCount)
+		rows = set(rows)
+		if not rows:
+			return
+		keyField = self.KeyField
+		if self._compoundKey:
+			keyFields = list(keyField)
+		else:
+			keyFields = [keyField]
+		records = self._records
+		keyVals = []
+		for row in rows:
+			rec = records[row]
+			pk = self.pkExpression(rec)
+			if pk in self._newRecords:
+				del self._newRecords[pk]
+				continue
+			# The key may have been changed, but not saved yet.
+			mem = self._mementos.get(pk, {})
+			vals = tuple([mem.get(fld, rec[fld]) for fld in keyFields])
+			if not self._compoundKey:
+				vals = vals[0]
+			keyVals.append(vals)
+		if keyVals:
+			if not keyField:
+				raise dException.dException(_("No key field defined for table: ") + self.Table)
+			# Some backends (PostgreSQL) don't return the number of deleted rows,
+			# so count them before deleting.
+			if self.countIn(keyFields, keyVals) < len(keyVals):
+				# Not all the records exist any more
+				self.BackendObject.noResultsOnDelete()
+			self.deleteIn(keyFields, keyVals)
+		for row in rows:
+			self._mementos.pop(self.pkExpression(records[row]), None)
+		self._records = dRecordList([rec for row, rec in enumerate(records)
+				if row not in rows])
+		self.RowNumber = min(self.RowNumber, self.RowCount - 1)
+
+
 	def _removeRow(self, row):
-		## Since record sets are tuples and thus immutable, we need to do this
-		## little dance to remove a row.
-		lRec = list(self._records)
-		del lRec[row]
-		self._records = dDataSet(lRec)
+		del self._getMutableRecords()[row]
 		self.RowNumber = min(self.RowNumber, self.RowCount - 1)
 
 
@@ -2118,6 +2527,7 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 		return (recnum > -1)
 
 
+	@metrics.timed("cursor.seek")
 	def seek(self, val, fld=None, caseSensitive=True, near=False, movePointer=True,
 			sort=True, incremental=False):
 		"""
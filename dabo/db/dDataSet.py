@@ -4,6 +4,7 @@ import re
 import operator
 import datetime
 import hashlib
+from collections import Mapping
 
 from decimal import Decimal
 try:
@@ -29,21 +30,9 @@ from dabo.lib.utils import ustr
 
 
 
-class dDataSet(tuple):
-	""" This class assumes that its contents are not ordinary tuples, but
-	rather tuples consisting of dicts, where the dict keys are field names.
-	This is the data structure returned by the dCursorMixin class.
-
-	It is used to give these data sets the ability to be queried, joined, etc.
-	This is accomplished by using SQLite in-memory databases. If SQLite
-	and pysqlite2 are not installed on the machine this is run on, a
-	warning message will be printed out and the SQL functions will return
-	None. The data will still be usable, though.
-	"""
-	def __init__(self, sequence=None):
-		# Note that as immutable objects, tuples are created with __new__,
-		# so we must not pass the argument to the __init__ method of tuple.
-		super(dDataSet, self).__init__()
+class _dDataSetMixin(object):
+	"""Behavior shared by dDataSet and dRecordList."""
+	def _initDataSet(self):
 		self._connection = None
 		self._cursor = None
 		self._bizobj = None
@@ -67,7 +56,6 @@ class dDataSet(tuple):
 				datetime.datetime: "timestamp", Decimal: "decimal"}
 
 
-
 	def __del__(self):
 		if self._cursor is not None:
 			self._cursor.close()
@@ -75,14 +63,6 @@ class dDataSet(tuple):
 			self._connection.close()
 
 
-	def __add__(self, *args, **kwargs):
-		return dDataSet(super(dDataSet, self).__add__(*args, **kwargs))
-
-
-	def __mul__(self, *args, **kwargs):
-		return dDataSet(super(dDataSet, self).__mul__(*args, **kwargs))
-
-
 	@staticmethod
 	def _adapt_decimal(decVal):
 		"""Converts the decimal value to a string for storage"""
@@ -478,6 +458,234 @@ class dDataSet(tuple):
 
 
 
+class dDataSet(_dDataSetMixin, tuple):
+	""" This class assumes that its contents are not ordinary tuples, but
+	rather tuples consisting of dicts, where the dict keys are field names.
+	This is the data structure returned by the dCursorMixin class.
+
+	It is used to give these data sets the ability to be queried, joined, etc.
+	This is accomplished by using SQLite in-memory databases. If SQLite
+	and pysqlite2 are not installed on the machine this is run on, a
+	warning message will be printed out and the SQL functions will return
+	None. The data will still be usable, though.
+	"""
+	def __init__(self, sequence=None):
+		# Note that as immutable objects, tuples are created with __new__,
+		# so we must not pass the argument to the __init__ method of tuple.
+		super(dDataSet, self).__init__()
+		self._initDataSet()
+
+
+	def __add__(self, *args, **kwargs):
+		return dDataSet(super(dDataSet, self).__add__(*args, **kwargs))
+
+
+	def __mul__(self, *args, **kwargs):
+		return dDataSet(super(dDataSet, self).__mul__(*args, **kwargs))
+
+
+
+class dRecordList(_dDataSetMixin, list):
+	"""A mutable dDataSet, used by cursors to hold their records.
+
+	Rows can be appended and removed in place, so adding a record doesn't copy
+	the others. Apart from that it behaves like a dDataSet: it can be sorted,
+	filtered and queried, and those methods return new data sets.
+	"""
+	def __init__(self, sequence=()):
+		super(dRecordList, self).__init__(sequence)
+		self._initDataSet()
+
+
+	def __add__(self, other):
+		return dDataSet(tuple(self) + tuple(other))
+
+
+
+class dDataSetView(object):
+	"""Read-only view over a sequence of record dicts, such as the records
+	held by a cursor.
+
+	Unlike dDataSet, nothing is copied when the view is created: field
+	projection, virtual fields and row slicing are applied lazily as each row
+	is read. Rows are returned as read-only mappings. Call copy() when you
+	need a regular, mutable dDataSet.
+
+	Changes made to the underlying records after the view is created are
+	visible through the view.
+	"""
+	def __init__(self, records=None, flds=None, vflds=(), start=0, stop=None,
+			step=1, cursor=None, rowChangeCallback=None):
+		if records is None:
+			records = ()
+		if stop is None:
+			stop = len(records)
+		self._records = records
+		# When 'flds' is None, every row exposes all of its own keys.
+		if flds is None:
+			self._fields = self._fieldSet = None
+		else:
+			self._fields = tuple(flds)
+			self._fieldSet = frozenset(flds)
+		self._virtualFields = tuple(vflds)
+		self._virtualFieldSet = frozenset(vflds)
+		self._start = start
+		self._stop = stop
+		self._step = step
+		self._cursor = cursor
+		self._rowChangeCallback = rowChangeCallback
+
+
+	def __len__(self):
+		if self._step > 0:
+			ret = (self._stop - self._start + self._step - 1) // self._step
+		else:
+			ret = (self._start - self._stop - self._step - 1) // -self._step
+		return max(0, ret)
+
+
+	def __nonzero__(self):
+		return len(self) > 0
+
+
+	def __iter__(self):
+		getRow = self._getRow
+		for row in xrange(self._start, self._stop, self._step):
+			yield getRow(row)
+
+
+	def __getitem__(self, idx):
+		if isinstance(idx, slice):
+			start, stop, step = idx.indices(len(self))
+			return self.__class__(self._records, self._fields, self._virtualFields,
+					start=self._start + start * self._step,
+					stop=self._start + stop * self._step,
+					step=self._step * step, cursor=self._cursor,
+					rowChangeCallback=self._rowChangeCallback)
+		cnt = len(self)
+		if idx < 0:
+			idx += cnt
+		if not 0 <= idx < cnt:
+			raise IndexError(_("dDataSetView index out of range"))
+		return self._getRow(self._start + idx * self._step)
+
+
+	def __repr__(self):
+		return "<dDataSetView: %s rows>" % len(self)
+
+
+	def _getRow(self, row):
+		rec = self._records[row]
+		crs = self._cursor
+		if crs is not None:
+			crs._correctFieldTypesIfNeeded(rec)
+		return _dViewRecord(self, row, rec)
+
+
+	def _getVirtualFieldValue(self, fld, row):
+		crs = self._cursor
+		currentRow = crs.RowNumber
+		ret = crs.getFieldVal(fld, row, _rowChangeCallback=self._rowChangeCallback)
+		crs.RowNumber = currentRow
+		return ret
+
+
+	def copy(self):
+		"""Return a mutable dDataSet containing copies of the rows in this view."""
+		# Copies the records directly instead of reading them through _dViewRecord.
+		records = self._records
+		flds = self._fields
+		vflds = self._virtualFields
+		crs = self._cursor
+		getVirtualFieldValue = self._getVirtualFieldValue
+		ds = []
+		for row in xrange(self._start, self._stop, self._step):
+			rec = records[row]
+			if crs is not None:
+				crs._correctFieldTypesIfNeeded(rec)
+			if flds is None:
+				tmprec = dict(rec)
+			else:
+				tmprec = dict([(k, rec[k]) for k in flds if k in rec])
+			for v in vflds:
+				tmprec[v] = getVirtualFieldValue(v, row)
+			ds.append(tmprec)
+		return dDataSet(ds)
+
+
+	def _getFields(self):
+		if self._fields is None:
+			try:
+				return tuple(self[0].keys())
+			except IndexError:
+				return ()
+		return self._fields + self._virtualFields
+
+
+	Fields = property(_getFields, None, None,
+			_("The names of the fields exposed by each row of the view. Read-only.  (tuple)"))
+
+
+
+class _dViewRecord(Mapping):
+	"""Read-only mapping for a single row of a dDataSetView."""
+	__slots__ = ("_view", "_row", "_rec")
+
+	def __init__(self, view, row, rec):
+		self._view = view
+		self._row = row
+		self._rec = rec
+
+
+	def _keys(self):
+		view = self._view
+		rec = self._rec
+		if view._fields is None:
+			keys = list(rec)
+		else:
+			keys = [fld for fld in view._fields if fld in rec]
+		keys.extend(view._virtualFields)
+		return keys
+
+
+	def __getitem__(self, key):
+		view = self._view
+		rec = self._rec
+		fieldSet = view._fieldSet
+		if (fieldSet is None or key in fieldSet) and key in rec:
+			return rec[key]
+		if key in view._virtualFieldSet:
+			return view._getVirtualFieldValue(key, self._row)
+		raise KeyError(key)
+
+
+	def __contains__(self, key):
+		view = self._view
+		if key in view._virtualFieldSet:
+			return True
+		if view._fieldSet is not None and key not in view._fieldSet:
+			return False
+		return key in self._rec
+
+
+	def __iter__(self):
+		return iter(self._keys())
+
+
+	def __len__(self):
+		return len(self._keys())
+
+
+	def __repr__(self):
+		return repr(self.copy())
+
+
+	def copy(self):
+		"""Return a mutable dict containing the values in this row."""
+		return dict((key, self[key]) for key in self._keys())
+
+
+
 # class DataSetOld(tuple):
 # 	""" This class assumes that its contents are not ordinary tuples, but
 # 	rather tuples consisting of dicts, where the dict keys are field names.
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+import collections
+import re
+import threading
+import time
+import dabo
+from dabo.dLocalize import _
+
+
+_stringPat = re.compile(r"'(?:[^']|'')*'")
+_numberPat = re.compile(r"(?<![\w.])[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_listPat = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_spacePat = re.compile(r"\s+")
+
+def fingerprint(sql):
+	"""
+	Returns 'sql' with its literal values replaced by '?', lists of values
+	collapsed and whitespace normalized, so that statements which differ only
+	in their values share one fingerprint.
+	"""
+	if not sql:
+		return ""
+	ret = _stringPat.sub("?", sql)
+	ret = _numberPat.sub("?", ret)
+	ret = _listPat.sub("(?+)", ret)
+	return _spacePat.sub(" ", ret).strip()
+
+
+
+class _FingerprintStats(object):
+	__slots__ = ("count", "total", "max", "samples")
+
+	def __init__(self, sampleSize):
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+		self.samples = collections.deque(maxlen=sampleSize)
+
+
+
+class dQueryStats(object):
+	"""
+	Collects timing information for the queries run by cursors.
+
+	When enabled, dCursorMixin reports every execute(), requery() and save()
+	here with its duration, row count, SQL fingerprint, the name of the
+	owning bizobj and the thread. The numbers are aggregated per operation
+	and fingerprint (see getStats()); queries taking longer than
+	SlowQueryThreshold seconds are kept with their SQL and parameters (see
+	getSlowQueries()), and every record is passed to the functions added
+	with addHook().
+
+	While disabled, the cursors only check the Enabled flag, so there is
+	practically no overhead. The process-wide instance is dabo.db.queryStats.
+	"""
+	def __init__(self):
+		self._enabled = False
+		self._slowQueryThreshold = None
+		self._sampleSize = 1000
+		self._hooks = []
+		self._lock = threading.Lock()
+		self._stats = {}
+		self._slowQueries = collections.deque(maxlen=100)
+
+
+	def addHook(self, func):
+		"""Adds a function to be called with the dict describing each query."""
+		if func not in self._hooks:
+			self._hooks = self._hooks + [func]
+
+
+	def removeHook(self, func):
+		"""Removes a function added with addHook()."""
+		self._hooks = [hook for hook in self._hooks if hook != func]
+
+
+	def record(self, operation, sql, params, duration, rowcount, cursor=None, fp=None):
+		"""
+		Records a query that took 'duration' seconds. The fingerprint is
+		calculated from 'sql' unless passed in 'fp'; saves, which run several
+		statements, use the table name.
+		"""
+		biz = getattr(cursor, "_bizobj", None)
+		if biz is not None:
+			bizName = biz.Name
+		else:
+			bizName = None
+		if fp is None:
+			fp = fingerprint(sql)
+		info = {"operation": operation, "sql": sql, "params": params,
+				"fingerprint": fp, "duration": duration, "rowcount": rowcount,
+				"bizobj": bizName, "thread": threading.currentThread().getName(),
+				"time": time.time()}
+		key = (operation, fp)
+		threshold = self._slowQueryThreshold
+		isSlow = (threshold is not None) and (duration >= threshold)
+		with self._lock:
+			stats = self._stats.get(key)
+			if stats is None:
+				stats = self._stats[key] = _FingerprintStats(self._sampleSize)
+			stats.count += 1
+			stats.total += duration
+			stats.max = max(stats.max, duration)
+			stats.samples.append(duration)
+			if isSlow:
+				self._slowQueries.append(info)
+		if isSlow:
+			dabo.dbActivityLog.warning(_("Slow %(operation)s (%(duration).3f sec): %(sql)s, PARAMS: %(params)s")
+					% info)
+		for hook in self._hooks:
+			try:
+				hook(info)
+			except StandardError, e:
+				dabo.log.error(_("Error in query stats hook %(hook)s: %(e)s") % locals())
+
+
+	def getStats(self):
+		"""
+		Returns a dict keyed by (operation, fingerprint) tuples. Each value is a
+		dict with the 'count', 'total', 'mean', 'p50', 'p95' and 'max' durations
+		in seconds. The percentiles are calculated from the most recent
+		SampleSize durations.
+		"""
+		ret = {}
+		with self._lock:
+			for key, stats in self._stats.iteritems():
+				samples = sorted(stats.samples)
+				last = len(samples) - 1
+				ret[key] = {"count": stats.count, "total": stats.total,
+						"mean": stats.total / stats.count,
+						"p50": samples[int(round(0.5 * last))],
+						"p95": samples[int(round(0.95 * last))],
+						"max": stats.max}
+		return ret
+
+
+	def getSlowQueries(self):
+		"""Returns a list of the recorded queries that exceeded SlowQueryThreshold."""
+		with self._lock:
+			return list(self._slowQueries)
+
+
+	def reset(self):
+		"""Discards all collected statistics and slow queries."""
+		with self._lock:
+			self._stats.clear()
+			self._slowQueries.clear()
+
+
+	def _getEnabled(self):
+		return self._enabled
+
+	def _setEnabled(self, val):
+		self._enabled = bool(val)
+
+
+	def _getSampleSize(self):
+		return self._sampleSize
+
+	def _setSampleSize(self, val):
+		with self._lock:
+			self._sampleSize = val
+			self._stats.clear()
+
+
+	def _getSlowQueryLogSize(self):
+		return self._slowQueries.maxlen
+
+	def _setSlowQueryLogSize(self, val):
+		with self._lock:
+			self._slowQueries = collections.deque(self._slowQueries, maxlen=val)
+
+
+	def _getSlowQueryThreshold(self):
+		return self._slowQueryThreshold
+
+	def _setSlowQueryThreshold(self, val):
+		self._slowQueryThreshold = val
+
+
+	Enabled = property(_getEnabled, _setEnabled, None,
+			_("Are queries being timed and recorded? Default=False  (bool)"))
+
+	SampleSize = property(_getSampleSize, _setSampleSize, None,
+			_("""Number of recent durations kept for each fingerprint to calculate
+			the percentiles. Changing it discards the collected statistics.
+			Default=1000  (int)"""))
+
+	SlowQueryLogSize = property(_getSlowQueryLogSize, _setSlowQueryLogSize, None,
+			_("Maximum number of slow queries kept. Default=100  (int)"))
+
+	SlowQueryThreshold = property(_getSlowQueryThreshold, _setSlowQueryThreshold, None,
+			_("""Queries taking at least this many seconds are logged to
+			dabo.dbActivityLog and kept by getSlowQueries(). Default=None,
+			meaning no queries are considered slow.  (float)"""))
+
+
+queryStats = dQueryStats()
@@ -15,6 +15,9 @@ class Firebird(dBackend):
 	# if you need quotes for spaces and bad names, you'll have to supply
 	# them yourself.
 	nameEnclosureChar = ""
+	keepAliveSQL = "select 1 from rdb$database"
+	# Firebird 2.0 and later
+	insertReturning = True
 
 	def __init__(self):
 		dBackend.__init__(self)
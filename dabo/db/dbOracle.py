@@ -12,6 +12,8 @@ from dabo.lib.utils import ustr
 
 
 class Oracle(dBackend):
+	keepAliveSQL = "select 1 from dual"
+
 	def __init__(self):
 		import cx_Oracle as dbapi
 		dBackend.__init__(self)
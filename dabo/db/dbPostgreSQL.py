@@ -11,6 +11,7 @@ from dabo.lib.utils import ustr
 
 class Postgres(dBackend):
 	"""Class providing PostgreSQL connectivity. Uses psycopg."""
+	insertReturning = True
 
 
 	_encodings = {
@@ -12,7 +12,35 @@ from dabo.lib.utils import ustr
 
 
 class SQLite(dBackend):
-	"""Class providing SQLite connectivity. Uses sqlite3 or pysqlite2 package."""
+	"""
+	Class providing SQLite connectivity. Uses sqlite3 or pysqlite2 package.
+
+	The connection can be tuned with these custom parameters of the connect
+	info, which can also be set as elements in a .cnxml file:
+
+		| journal_mode	- DELETE, TRUNCATE, PERSIST, MEMORY, WAL or OFF
+		| synchronous	- OFF, NORMAL, FULL or EXTRA
+		| cache_size	- Page cache size: pages, or KiB if negative
+		| mmap_size		- Bytes of the file to access through memory mapping
+		| temp_store	- DEFAULT, FILE or MEMORY
+		| busy_timeout	- Milliseconds to wait for locks held by other connections
+		| read_only		- When True, the connection can't change the database
+		| shared_cache	- When True, the connection shares its page cache with
+		|				  the other shared-cache connections to the same file,
+		|				  and reads without waiting for their write locks
+
+	Read-only, shared-cache connections are well suited for reporting. Note
+	that WAL mode is stored in the database file, and doesn't work for files
+	on network drives.
+	"""
+	# Allowed values of the connection tuning pragmas; None means any int.
+	pragmaValues = (("busy_timeout", None),
+			("journal_mode", ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")),
+			("synchronous", ("OFF", "NORMAL", "FULL", "EXTRA", "0", "1", "2", "3")),
+			("cache_size", None),
+			("mmap_size", None),
+			("temp_store", ("DEFAULT", "FILE", "MEMORY", "0", "1", "2")))
+
 	def __init__(self):
 		dBackend.__init__(self)
 		self.dbModuleName = "pysqlite2"
@@ -22,6 +50,8 @@ class SQLite(dBackend):
 		except ImportError:
 			import sqlite3 as dbapi
 		self.dbapi = dbapi
+		# RETURNING was added in SQLite 3.35.
+		self.insertReturning = (dbapi.sqlite_version_info >= (3, 35, 0))
 
 
 	def getConnection(self, connectInfo, forceCreate=False, **kwargs):
@@ -66,8 +96,24 @@ class SQLite(dBackend):
 			# On Windows, path is alredy unicode.
 			pth = pth.decode(dabo.fileSystemEncoding).encode("utf-8")
 
-		# Need to specify "isolation_level=None" to have transactions working correctly.
-		self._connection = self.dbapi.connect(pth, factory=DictConnection, isolation_level=None)
+		options = dict((key.lower(), val) for key, val in kwargs.items())
+		pragmas = self._getPragmas(options)
+		sharedCache = self._isTrue(options.get("shared_cache"))
+		if sharedCache:
+			# Only affects the connections opened while it is enabled.
+			dbapi.enable_shared_cache(True)
+		try:
+			# Need to specify "isolation_level=None" to have transactions working correctly.
+			self._connection = self.dbapi.connect(pth, factory=DictConnection, isolation_level=None)
+		finally:
+			if sharedCache:
+				dbapi.enable_shared_cache(False)
+		for pragma in pragmas:
+			self._connection.execute(pragma)
+		if sharedCache:
+			self._connection.execute("PRAGMA read_uncommitted = 1")
+		if self._isTrue(options.get("read_only")):
+			self._connection.execute("PRAGMA query_only = 1")
 
 		# Non-utf8-encoded bytestrings could be in the database, and Dabo will try various encodings
 		# to deal with it. So tell sqlite not to decode with utf-8, but to just return the bytes:
@@ -80,6 +126,43 @@ class SQLite(dBackend):
 		return self._connection
 
 
+	def _getPragmas(self, options):
+		"""
+		Return the PRAGMA statements for the tuning parameters in the passed
+		dict, raising ValueError for invalid values.
+		"""
+		ret = []
+		for name, allowed in self.pragmaValues:
+			val = options.get(name)
+			if val is None or val == "":
+				continue
+			if allowed is None:
+				try:
+					val = int(val)
+				except ValueError:
+					raise ValueError(_("The '%(name)s' setting must be an integer, not '%(val)s'")
+							% locals())
+			else:
+				val = ustr(val).strip().upper()
+				if val not in allowed:
+					raise ValueError(_("Invalid '%(name)s' setting: '%(val)s'") % locals())
+			ret.append("PRAGMA %s = %s" % (name, val))
+		return ret
+
+
+	def _isTrue(self, val):
+		"""Boolean parameters in .cnxml files are strings."""
+		if isinstance(val, basestring):
+			return val.strip().lower() in ("1", "true", "yes", "on")
+		return bool(val)
+
+
+	def _applyKeepAlive(self):
+		# SQLite connections don't time out, and can only be used from the
+		# thread that created them, so there is nothing to keep alive.
+		pass
+
+
 	def getDictCursorClass(self):
 		return self._dictCursorClass
 
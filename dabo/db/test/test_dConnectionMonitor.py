@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import unittest
+import sqlite3
+import threading
+import time
+import dabo
+import dabo.db
+import dabo.dEvents as dEvents
+from dabo.db.dBackend import dBackend
+from dabo.db.dConnectionMonitor import getConnectionMonitor, stopConnectionMonitor
+
+
+def waitFor(test, timeout=5):
+	end = time.time() + timeout
+	while time.time() < end:
+		if test():
+			return True
+		time.sleep(0.05)
+	return False
+
+
+class Test_dConnectionMonitor(unittest.TestCase):
+	def setUp(self):
+		self.bo1 = self.createBackend()
+		self.bo2 = self.createBackend()
+		self.monitor = getConnectionMonitor()
+
+	def tearDown(self):
+		stopConnectionMonitor()
+		self.bo1 = self.bo2 = None
+
+	def createBackend(self):
+		# SQLite backends don't use keep-alive, so use the base class with a
+		# connection that can be shared with the monitor's thread.
+		bo = dBackend()
+		bo._connection = sqlite3.connect(":memory:", check_same_thread=False)
+		return bo
+
+	def monitorThreads(self):
+		return [th for th in threading.enumerate() if th.getName() == "dConnectionMonitor"]
+
+	def test_singleThread(self):
+		bo1 = self.bo1
+		bo2 = self.bo2
+		bo1.KeepAliveInterval = 60
+		bo2.KeepAliveInterval = 60
+		bo1.KeepAliveInterval = 30
+		self.assertEqual(self.monitor.BackendCount, 2)
+		self.assertEqual(len(self.monitorThreads()), 1)
+		bo2.KeepAliveInterval = None
+		self.assertEqual(self.monitor.BackendCount, 1)
+		self.bo1 = bo1 = None
+		self.assertEqual(self.monitor.BackendCount, 0)
+		stopConnectionMonitor()
+		self.assertFalse(self.monitor.IsRunning)
+		self.assertTrue(waitFor(lambda: not self.monitorThreads()))
+
+	def test_keepAlive(self):
+		bo = self.bo1
+		bo.lastExecuteTime = lastTime = time.time() - 100
+		bo.KeepAliveInterval = 10
+		self.assertTrue(waitFor(lambda: bo.lastExecuteTime > lastTime))
+
+	def test_unhealthy(self):
+		bo = self.bo1
+		errors = []
+		bo.bindEvent(dEvents.ConnectionUnhealthy, lambda evt: errors.append(evt.error))
+		bo._connection.close()
+		bo.lastExecuteTime = time.time() - 100
+		bo.KeepAliveInterval = 10
+		self.assertTrue(waitFor(lambda: errors))
+
+	def test_connectionInUse(self):
+		bo = self.bo1
+		errors = []
+		bo.bindEvent(dEvents.ConnectionUnhealthy, lambda evt: errors.append(evt.error))
+		bo._connection.close()
+		# A cursor executing a query holds the connection's lock; the monitor
+		# must not send its query on the connection at the same time.
+		bo._connectionLock.acquire()
+		try:
+			bo.lastExecuteTime = time.time() - 100
+			bo.KeepAliveInterval = 1
+			self.assertFalse(waitFor(lambda: errors, 1.5))
+		finally:
+			bo._connectionLock.release()
+		self.assertTrue(waitFor(lambda: errors))
+
+	def test_cursorHoldsLock(self):
+		con = dabo.db.dConnection(DbType="SQLite", Database=":memory:")
+		bo = con.getBackendObject()
+		crs = con.getDaboCursor()
+		locked = []
+		def tryLock():
+			got = bo._connectionLock.acquire(False)
+			if got:
+				bo._connectionLock.release()
+			locked.append(not got)
+		def massageDescription(cursor):
+			# Called while the query runs; try the lock from another thread.
+			th = threading.Thread(target=tryLock)
+			th.start()
+			th.join()
+		bo.massageDescription = massageDescription
+		crs.execute("select 1 as one")
+		con.close()
+		self.assertEqual(locked, [True])
+
+	def test_sqliteNotMonitored(self):
+		con = dabo.db.dConnection(DbType="SQLite", Database=":memory:")
+		con.getBackendObject().KeepAliveInterval = 10
+		self.assertEqual(self.monitor.BackendCount, 0)
+		con.close()
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -210,6 +210,42 @@ insert into %s (cfield, ifield, nfield) values (NULL, NULL, NULL)
 		self.assertEqual(cur.Record.cfield, newVal)
 		self.assertRaises(dabo.dException.FieldNotFoundException, cur.oldVal, "bogusField")
 
+	def test_getDataSetView(self):
+		cur = self.cur
+		view = cur.getDataSetView(flds=("cfield", "ifield"), rowStart=1)
+		self.assertEqual(len(view), 2)
+		self.assertEqual(view[0]["ifield"], 42)
+		self.assertEqual(sorted(view[0].keys()), ["cfield", "ifield"])
+		self.assertRaises(KeyError, view[0].__getitem__, "nfield")
+		def setViewVal():
+			view[0]["ifield"] = 0
+		self.assertRaises(TypeError, setViewVal)
+		self.assertEqual([rec["ifield"] for rec in view[1:]], [10223])
+		# The view reflects later changes to the cursor's records...
+		cur.setFieldVal("ifield", 99, row=1)
+		self.assertEqual(view[0]["ifield"], 99)
+		# ...while a copy is independent and mutable.
+		ds = view.copy()
+		self.assertTrue(isinstance(ds, dabo.db.dDataSet))
+		ds[0]["ifield"] = 7
+		self.assertEqual(cur.getFieldVal("ifield", 1), 99)
+		self.assertEqual(list(cur.getDataSet()), [rec.copy() for rec in cur.getDataSetView()])
+
+	def test_getDataSetViewAfterDelete(self):
+		cur = self.cur
+		view = cur.getDataSetView(flds=("pk", ))
+		pks = [rec["pk"] for rec in view]
+		# Adding and deleting rows doesn't change the rows of existing views.
+		cur.new()
+		cur.RowNumber = 0
+		cur.delete()
+		self.assertEqual([rec["pk"] for rec in view], pks)
+		self.assertEqual(cur.RowCount, len(pks))
+		view = cur.getDataSetView(flds=("pk", ))
+		cur.delete()
+		self.assertEqual(len(list(view)), len(pks))
+		self.assertEqual(cur.RowCount, len(pks) - 1)
+
 	## - End method unit tests -
 
 	def testMementos(self):
@@ -288,6 +324,52 @@ insert into %s (cfield, ifield, nfield) values (NULL, NULL, NULL)
 		self.assertEqual(cur.Record.ifield, 0)
 		self.assertEqual(cur.Record.nfield, 0)
 
+	def test_newInPlace(self):
+		cur = self.cur
+		cur.new()
+		recs = cur._records
+		self.assertTrue(isinstance(recs, dabo.db.dRecordList))
+		cur.new()
+		cur.genTempAutoPK()
+		cur.setNewFlag()
+		cur.new()
+		# Records are added to the same list, not copied.
+		self.assertTrue(cur._records is recs)
+		self.assertEqual(cur.RowCount, 6)
+		self.assertEqual(cur.RowNumber, 5)
+		cur.RowNumber = 4
+		cur.cancel()
+		self.assertEqual(cur.RowCount, 5)
+		self.assertTrue(cur._records is recs)
+		filtered = cur._records.filter("ifield", 42)
+		self.assertTrue(filtered._sourceDataSet is recs)
+
+	def test_appendDataSet(self):
+		cur = self.cur
+		ds = [{"cfield": "Row %s" % num, "ifield": num, "nfield": Decimal("1.5")}
+				for num in range(1000)]
+		cur.appendDataSet(ds, updateInternals=True)
+		self.assertEqual(cur.RowCount, 1003)
+		self.assertEqual(cur.RowNumber, 1002)
+		self.assertEqual(cur.getFieldVal("cfield", 3), "Row 0")
+		self.assertEqual(cur.getFieldVal("ifield", 1002), 999)
+		pks = set(cur.getPK(row) for row in range(3, 1003))
+		self.assertEqual(len(pks), 1000)
+		self.assertTrue(cur.isChanged(allRows=True))
+		self.assertEqual(len(cur._newRecords), 1000)
+
+	def test_deleteRows(self):
+		cur = self.cur
+		cur.new()
+		cur.genTempAutoPK()
+		cur.setNewFlag()
+		cur.deleteRows([0, 2, 3])
+		self.assertEqual(cur._newRecords, {})
+		self.assertEqual(cur.RowCount, 1)
+		self.assertEqual(cur.Record.cfield, "Edward Leafe")
+		cur.requery()
+		self.assertEqual(cur.RowCount, 1)
+
 	def test_datatypes(self):
 		"""
 		Make sure the datatypes in the dCursor are correct.
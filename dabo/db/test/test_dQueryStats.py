@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import unittest
+import dabo
+import dabo.db
+import dabo.biz
+from dabo.db.dQueryStats import dQueryStats, fingerprint, queryStats
+
+
+class Test_dQueryStats(unittest.TestCase):
+	def setUp(self):
+		self.con = dabo.db.dConnection(DbType="SQLite", Database=":memory:")
+		biz = self.biz = dabo.biz.dBizobj(self.con)
+		biz.Name = "custBiz"
+		biz._CurrentCursor.executescript("""
+create table cust (pk INTEGER PRIMARY KEY AUTOINCREMENT, cName CHAR, nAmount DECIMAL(8,2));
+insert into cust (cName, nAmount) values ('Ed', 1.5);
+insert into cust (cName, nAmount) values ('Paul', 23);
+""")
+		biz.KeyField = "pk"
+		biz.DataSource = "cust"
+		queryStats.reset()
+		queryStats.Enabled = True
+
+	def tearDown(self):
+		queryStats.Enabled = False
+		queryStats.SlowQueryThreshold = None
+		queryStats.reset()
+		self.biz = None
+
+	def test_fingerprint(self):
+		self.assertEqual(fingerprint("select *\n  from cust where cName = 'O''Neil' and  pk in (1, 2,3)"),
+				"select * from cust where cName = ? and pk in (?+)")
+		self.assertEqual(fingerprint("select col1 from t2 where n > -1.5e3"),
+				"select col1 from t2 where n > ?")
+
+	def test_recording(self):
+		records = []
+		queryStats.addHook(records.append)
+		try:
+			biz = self.biz
+			biz.requery()
+			biz.setFieldVal("cName", "Edward")
+			biz.save()
+		finally:
+			queryStats.removeHook(records.append)
+		ops = [rec["operation"] for rec in records]
+		self.assertTrue("requery" in ops)
+		self.assertTrue("save" in ops)
+		requery = [rec for rec in records if rec["operation"] == "requery"][0]
+		self.assertEqual(requery["rowcount"], 2)
+		self.assertEqual(requery["bizobj"], "custBiz")
+		self.assertEqual(requery["thread"], "MainThread")
+		self.assertFalse("2" in requery["fingerprint"])
+		stats = queryStats.getStats()
+		requeryStats = stats[("requery", requery["fingerprint"])]
+		self.assertEqual(requeryStats["count"], 1)
+		self.assertTrue(requeryStats["p50"] <= requeryStats["p95"] <= requeryStats["max"])
+		self.assertEqual(stats[("save", "cust")]["count"], 1)
+
+	def test_slowQueries(self):
+		queryStats.SlowQueryThreshold = 0
+		self.biz._CurrentCursor.execute("select * from cust where pk = ?", (2, ))
+		slow = queryStats.getSlowQueries()
+		self.assertEqual(slow[-1]["sql"], "select * from cust where pk = ?")
+		self.assertEqual(slow[-1]["params"], (2, ))
+		self.assertEqual(slow[-1]["rowcount"], 1)
+
+	def test_disabled(self):
+		queryStats.Enabled = False
+		self.biz.requery()
+		self.assertEqual(queryStats.getStats(), {})
+
+	def test_percentiles(self):
+		stats = dQueryStats()
+		for num in range(1, 101):
+			stats.record("execute", "select 1", None, num / 100.0, 1)
+		result = stats.getStats()[("execute", "select ?")]
+		self.assertEqual(result["count"], 100)
+		self.assertAlmostEqual(result["p50"], 0.51)
+		self.assertAlmostEqual(result["p95"], 0.95)
+		self.assertAlmostEqual(result["max"], 1.0)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import shutil
+import tempfile
+import dabo
+import dabo.db
+from dabo.dException import DBQueryException
+from dabo.lib import connParser
+
+cnxml = """<?xml version="1.0"?>
+<connectiondefs xmlns="http://www.dabodev.com" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+xsi:schemaLocation="http://www.dabodev.com conn.xsd" xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/conn.xsd">
+	<connection dbtype="SQLite">
+		<name>tuned</name>
+		<database>%s</database>
+		<journal_mode>wal</journal_mode>
+		<synchronous>NORMAL</synchronous>
+		<cache_size type="int">-4000</cache_size>
+		<temp_store>MEMORY</temp_store>
+		<busy_timeout>2500</busy_timeout>
+	</connection>
+</connectiondefs>
+"""
+
+
+class Test_dbSQLite(unittest.TestCase):
+	def setUp(self):
+		self.tempDir = tempfile.mkdtemp()
+		self.dbPath = os.path.join(self.tempDir, "test.db")
+		crs = self.connect().getDaboCursor()
+		crs.execute("create table test (pk INTEGER PRIMARY KEY, cField CHAR)")
+		crs.execute("insert into test (cField) values ('one')")
+
+	def tearDown(self):
+		shutil.rmtree(self.tempDir)
+
+	def connect(self, **kwargs):
+		return dabo.db.dConnection(DbType="SQLite", Database=self.dbPath, forceCreate=True,
+				**kwargs)
+
+	def pragma(self, con, name):
+		return con.getConnection().execute("PRAGMA %s" % name).fetchone().values()[0]
+
+	def test_pragmas(self):
+		con = self.connect(journal_mode="WAL", synchronous="normal", cache_size=-8000,
+				mmap_size=1048576, temp_store="MEMORY", busy_timeout=1234)
+		self.assertEqual(self.pragma(con, "journal_mode"), "wal")
+		self.assertEqual(self.pragma(con, "synchronous"), 1)
+		self.assertEqual(self.pragma(con, "cache_size"), -8000)
+		self.assertEqual(self.pragma(con, "temp_store"), 2)
+		self.assertEqual(self.pragma(con, "busy_timeout"), 1234)
+		self.assertRaises(ValueError, self.connect, journal_mode="fast")
+		self.assertRaises(ValueError, self.connect, cache_size="1; drop table test")
+
+	def test_cnxml(self):
+		pth = os.path.join(self.tempDir, "tuned.cnxml")
+		open(pth, "w").write(cnxml % self.dbPath)
+		connInfo = connParser.importConnections(pth)["tuned"]
+		con = dabo.db.dConnection(connInfo)
+		self.assertEqual(self.pragma(con, "journal_mode"), "wal")
+		self.assertEqual(self.pragma(con, "synchronous"), 1)
+		self.assertEqual(self.pragma(con, "cache_size"), -4000)
+		self.assertEqual(self.pragma(con, "temp_store"), 2)
+		self.assertEqual(self.pragma(con, "busy_timeout"), 2500)
+
+	def test_readOnlySharedCache(self):
+		writer = self.connect(shared_cache=True).getDaboCursor()
+		reader = self.connect(read_only="True", shared_cache="1").getDaboCursor()
+		self.assertRaises(DBQueryException, reader.execute,
+				"insert into test (cField) values ('two')")
+		# The reader doesn't wait for the writer's uncommitted changes.
+		writer.beginTransaction()
+		writer.execute("insert into test (cField) values ('two')")
+		reader.execute("select count(*) as cnt from test")
+		self.assertEqual(reader.Record.cnt, 2)
+		writer.rollbackTransaction()
+		reader.execute("select count(*) as cnt from test")
+		self.assertEqual(reader.Record.cnt, 1)
+		# The settings only apply to the connections that ask for them.
+		self.assertEqual(self.pragma(self.connect(), "read_uncommitted"), 0)
+		self.assertEqual(self.pragma(self.connect(), "query_only"), 0)
+
+
+if __name__ == "__main__":
+	unittest.main()
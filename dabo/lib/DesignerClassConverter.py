@@ -5,6 +5,9 @@ specific, since we only support wxPython, but I suppose that it could be updated
 later on to support other UI toolkits.
 """
 from datetime import datetime
+import hashlib
+import marshal
+import sys
 import time
 import os
 import re
@@ -23,9 +26,16 @@ from dabo.lib.utils import ustr
 # Doesn't matter what platform we're on; Python needs
 # newlines in its compiled code.
 LINESEP = "\n"
+# Changing this invalidates all the entries in the class cache.
+_CACHE_FORMAT = 1
 
 
 class DesignerClassConverter(dObject):
+	# Directory for the compiled class cache. If None, the 'classcache'
+	# directory in the user's Dabo data directory is used. The cache can be
+	# disabled with the dabo.cacheDesignerClasses setting.
+	cacheDir = None
+
 	def __init__(self, *args, **kwargs):
 		self._createDesignerControls = False
 		super(DesignerClassConverter, self).__init__(*args, **kwargs)
@@ -61,6 +71,9 @@ class DesignerClassConverter(dObject):
 		self._sizerTypeStack = []
 		# Location of the cdxml source file, if any
 		self._srcFile = None
+		# Files read while creating the class, other than the source itself;
+		# used to validate the class cache.
+		self._dependencies = set()
 		# Encoding to be used
 		self._encoding = dabo.getEncoding()
 
@@ -69,8 +82,20 @@ class DesignerClassConverter(dObject):
 		"""Given a text file, returns a class object that that file
 		represents. You can pass the text as either a file path,
 		a file object, or raw XML/JSON text.
+
+		The compiled class code is cached on disk, keyed by the source text,
+		and is reused as long as the code file and the files of any inherited
+		classes haven't changed either.
 		"""
+		cacheKey = self._getCacheKey(src)
+		if cacheKey:
+			cls = self._loadCachedClass(cacheKey)
+			if cls is not None:
+				return cls
 		dct = self.dictFromStoredText(src)
+		# Reading the inherited classes changes self._srcFile, so keep the path
+		# of the source itself.
+		srcFile = self._srcFile
 		# Traverse the dct, looking for superclass information
 		super = self.flattenClassDict(dct)
 		if super:
@@ -94,12 +119,118 @@ class DesignerClassConverter(dObject):
 		# jfcs added self._codeFileName to below
 		# egl - created a tmp file for the main class code that we can use
 		#   for compiling. This allows for full Python introspection.
-		compClass = compile(self.classText, self._classFileName, "exec")
+		if cacheKey:
+			# The cached copy of the code is used for introspection instead.
+			classFileName = os.path.join(self._getCacheDir(), "%s.py" % cacheKey)
+		else:
+			classFileName = self._classFileName
+		compClass = compile(self.classText, classFileName, "exec")
+		if cacheKey:
+			self._storeCachedClass(cacheKey, compClass, srcFile)
 		nmSpace = {}
 		exec compClass in nmSpace
 		return nmSpace[self.mainClassName]
 
 
+	def _getCacheDir(self):
+		ret = self.cacheDir
+		if ret is None:
+			dataDir = utils.getUserAppDataDirectory()
+			if dataDir:
+				ret = os.path.join(dataDir, "classcache")
+		return ret
+
+
+	def _getCacheKey(self, src):
+		"""
+		Returns the key for the compiled class created from 'src', or None if
+		it can't be cached. The key covers the source text and location, and
+		everything else that affects the generated code.
+		"""
+		if not dabo.cacheDesignerClasses or not isinstance(src, basestring):
+			return None
+		app = self.Application
+		if app is not None and app.SourceURL:
+			# The files are fetched from the server when they are read.
+			return None
+		if not self._getCacheDir():
+			return None
+		if src.startswith("<") or src.lstrip().startswith("{"):
+			text = src
+			srcFile = os.getcwd()
+		else:
+			try:
+				srcFile = os.path.abspath(utils.resolvePathAndUpdate(src))
+				text = open(srcFile, "rb").read()
+			except IOError:
+				return None
+		if isinstance(text, unicode):
+			text = text.encode("utf-8")
+		genFile = os.path.splitext(__file__)[0] + ".py"
+		try:
+			genTime = os.path.getmtime(genFile)
+		except OSError:
+			genTime = 0
+		hsh = hashlib.md5(text)
+		hsh.update(repr((_CACHE_FORMAT, srcFile, self._encoding, self.CreateDesignerControls,
+				dabo.__version__, sys.version, genTime)))
+		return hsh.hexdigest()
+
+
+	@staticmethod
+	def _hashFile(pth):
+		try:
+			return hashlib.md5(open(pth, "rb").read()).hexdigest()
+		except IOError:
+			return None
+
+
+	def _loadCachedClass(self, cacheKey):
+		"""
+		Returns the class for 'cacheKey' from the cache, or None if it isn't
+		cached or any of the files it depends on have changed.
+		"""
+		pth = os.path.join(self._getCacheDir(), "%s.cache" % cacheKey)
+		try:
+			fmt, clsName, deps, code = marshal.loads(open(pth, "rb").read())
+		except (IOError, EOFError, ValueError, TypeError):
+			return None
+		if fmt != _CACHE_FORMAT:
+			return None
+		for depPath, depHash in deps:
+			if self._hashFile(depPath) != depHash:
+				return None
+		self.mainClassName = clsName
+		nmSpace = {}
+		exec code in nmSpace
+		return nmSpace[clsName]
+
+
+	def _storeCachedClass(self, cacheKey, code, srcFile):
+		"""
+		Writes the compiled class code and the generated text to the cache.
+		'srcFile' is the path of the source, which is covered by the cache key
+		and so isn't stored as a dependency.
+		"""
+		cacheDir = self._getCacheDir()
+		srcFile = os.path.abspath(srcFile)
+		deps = [(pth, self._hashFile(pth)) for pth in sorted(self._dependencies)
+				if pth != srcFile]
+		data = marshal.dumps((_CACHE_FORMAT, self.mainClassName, deps, code))
+		try:
+			if not os.path.isdir(cacheDir):
+				os.makedirs(cacheDir)
+			for ext, content in (("py", self.classText), ("cache", data)):
+				pth = os.path.join(cacheDir, "%s.%s" % (cacheKey, ext))
+				tmpPth = "%s.%s.tmp" % (pth, os.getpid())
+				open(tmpPth, "wb").write(content)
+				if os.path.exists(pth) and sys.platform.startswith("win"):
+					os.remove(pth)
+				os.rename(tmpPth, pth)
+		except (IOError, OSError), e:
+			dabo.log.error(_("Could not write to the class cache: %s") % e)
+
+
 	def dictFromStoredText(self, src):
 		"""Takes either a path to a text file, an open file containing the text,
 		or the raw text itself. Determines the format of the stored text, and
@@ -122,6 +253,8 @@ class DesignerClassConverter(dObject):
 			encoding = self._encoding
 		# Get the associated code file, if any
 		codePth = "%s-code.py" % os.path.splitext(pth)[0]
+		# Recorded even if it doesn't exist, so that adding it invalidates the cache.
+		self._dependencies.add(os.path.abspath(codePth))
 		if os.path.exists(codePth):
 			try:
 				codeContent = codecs.open(codePth, "r", encoding).read()
@@ -145,6 +278,7 @@ class DesignerClassConverter(dObject):
 		except AttributeError:
 			if os.path.exists(src):
 				self._srcFile = src = utils.resolvePathAndUpdate(src)
+				self._dependencies.add(os.path.abspath(src))
 				jsonText = file(src).read()
 			else:
 				# It must be raw json
@@ -168,6 +302,7 @@ class DesignerClassConverter(dObject):
 				xml = src = utils.resolvePathAndUpdate(src)
 			if os.path.exists(src):
 				self._srcFile = src
+				self._dependencies.add(os.path.abspath(src))
 			else:
 				parseCode = False
 				self._srcFile = os.getcwd()
@@ -779,6 +914,7 @@ class DesignerClassConverter(dObject):
 		conv = DesignerClassConverter()
 		xmlDict = conv.importXmlSrc(pth)
 		conv.createClassText(xmlDict, addImports=False, specList=specList)
+		self._dependencies.update(conv._dependencies)
 		self.innerClassText += conv.classText + (2 * LINESEP)
 		self.innerClassNames.append(conv.mainClassName)
 		return conv.mainClassName
@@ -1,15 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-import urllib
-import urllib2
 import urlparse
 import sys
 import os
 import re
 import pickle
+import shutil
 from os.path import join as pathjoin
-from zipfile import ZipFile
-from cStringIO import StringIO
 
 import dabo
 import dabo.dException as dException
@@ -18,6 +15,14 @@ from dabo.dObject import dObject
 from dabo.dLocalize import _
 from dabo.lib.utils import ustr
 from dabo.lib.manifest import Manifest
+from dabo.lib import deltaSync
+
+# Only needed when talking to a server, so imported on first use.
+tempfile = dabo.LazyImport("tempfile")
+urllib = dabo.LazyImport("urllib")
+urllib2 = dabo.LazyImport("urllib2")
+ZipFile = dabo.LazyImport("zipfile", "ZipFile")
+
 jsonEncode = dabo.lib.jsonEncode
 jsonDecode = dabo.lib.jsonDecode
 
@@ -32,6 +37,8 @@ class RemoteConnector(object):
 		self._baseURL = None
 		self._authHandler = None
 		self._urlOpener = None
+		# Version token of the data last received through the delta-sync protocol
+		self._syncVersion = None
 		appDir = dabo.lib.utils.getUserAppDataDirectory()
 		self._dataDir = pathjoin(appDir, "webapps")
 
@@ -91,6 +98,28 @@ class RemoteConnector(object):
 		self.obj._storeData(data, typs, stru)
 
 
+	def _storeSyncFrame(self, frame):
+		"""Stores the data from a delta-sync frame. Returns False if a delta
+		could not be applied to the data currently held.
+		"""
+		biz = self.obj
+		kind, payload = deltaSync.decodeFrame(frame)
+		if kind == deltaSync.FRAME_DELTA:
+			if payload["base"] != self._syncVersion:
+				return False
+			try:
+				data = deltaSync.applyDelta(biz._CurrentCursor._records,
+						biz.KeyField, payload)
+			except ValueError, e:
+				dabo.log.info(_("Discarding delta for '%s': %s") % (biz.DataSource, e))
+				return False
+			biz._storeData(data, payload["types"], None)
+		else:
+			biz._storeData(payload["data"], payload["types"], payload["structure"])
+		self._syncVersion = payload["version"]
+		return True
+
+
 	def requery(self):
 		biz = self.obj
 		biz.setChildLinkFilter()
@@ -101,15 +130,29 @@ class RemoteConnector(object):
 		sql = re.sub(r"\n *", " ", sql)
 		sql = re.sub(r" += +", " = ", sql)
 		sqlparams = ustr(biz.getParams())
-		params = {"SQL": sql, "SQLParams": sqlparams, "KeyField": biz.KeyField, "_method": "GET"}
-		prm = urllib.urlencode(params)
-		try:
-			res = self.UrlOpener.open(url, data=prm)
-		except urllib2.HTTPError, e:
-			print "ERR", e
-			return
-		encdata = res.read()
-		self._storeEncodedDataSet(encdata)
+		if biz.isAnyChanged():
+			# Local changes are discarded by a requery, so don't build on them.
+			self._syncVersion = None
+		for attempt in (0, 1):
+			params = {"SQL": sql, "SQLParams": sqlparams, "KeyField": biz.KeyField,
+					"SyncProtocol": deltaSync.PROTOCOL_VERSION,
+					"SyncVersion": self._syncVersion or "", "_method": "GET"}
+			prm = urllib.urlencode(params)
+			try:
+				res = self.UrlOpener.open(url, data=prm)
+			except urllib2.HTTPError, e:
+				print "ERR", e
+				return
+			encdata = res.read()
+			if not deltaSync.isFrame(encdata):
+				# The server doesn't support delta sync.
+				self._syncVersion = None
+				self._storeEncodedDataSet(encdata)
+				return
+			if self._storeSyncFrame(encdata):
+				return
+			# The delta didn't match our data; ask for the full data set.
+			self._syncVersion = None
 
 
 	def save(self, startTransaction=False, allRows=False):
@@ -151,6 +194,7 @@ class RemoteConnector(object):
 		prm = urllib.urlencode(params)
 		res = self.UrlOpener.open(url, data=prm)
 		encdata = res.read()
+		self._syncVersion = None
 		self._storeEncodedDataSet(encdata)
 
 
@@ -161,6 +205,7 @@ class RemoteConnector(object):
 		prm = urllib.urlencode(params)
 		res = self.UrlOpener.open(url, data=prm)
 		encdata = res.read()
+		self._syncVersion = None
 		self._storeEncodedDataSet(encdata)
 
 
@@ -247,7 +292,8 @@ class RemoteConnector(object):
 		url = self._getManifestUrl(appname, "diff")
 		# Get the current manifest
 		currentMf = Manifest.getManifest(homedir)
-		params = {"current": jsonEncode(currentMf)}
+		params = {"current": jsonEncode(currentMf),
+				"hashes": jsonEncode(Manifest.getHashes(homedir))}
 		prm = urllib.urlencode(params)
 		try:
 			res = self.UrlOpener.open(url, data=prm)
@@ -292,16 +338,19 @@ class RemoteConnector(object):
 				res = self.UrlOpener.open(url)
 			except urllib2.HTTPError, e:
 				dabo.log.error(_("HTTP Error retrieving files: %s") % e)
-			# res holds a zip file
-			f = StringIO(res.read())
+			# res holds a zip file. Spool it to disk rather than memory, and
+			# extract each member straight to its file.
+			f = tempfile.TemporaryFile()
+			shutil.copyfileobj(res, f, 65536)
 			zip = ZipFile(f)
 			for pth in zip.namelist():
 				tm = chgs.get(pth)
 				dirname = os.path.split(pth)[0]
 				if dirname and not os.path.exists(dirname):
 					os.makedirs(dirname)
-				file(pth, "wb").write(zip.read(pth))
-				os.utime(pth, (tm, tm))
+				self._extractFile(zip, pth, tm)
+			zip.close()
+			f.close()
 # NOT WORKING
 # Need to find a way to handle re-importing .py files.
 # 				if pth.endswith(".py"):
@@ -321,6 +370,27 @@ class RemoteConnector(object):
 		return homedir
 
 
+	def _extractFile(self, zip, pth, tm):
+		"""Extracts 'pth' from the zip file, and gives it the modification time
+		'tm'. The file is written under a temporary name and then renamed, so
+		that its directory's time changes and the manifest scan notices it.
+		"""
+		tmpPath = "%s.dabotmp" % pth
+		src = zip.open(pth)
+		out = file(tmpPath, "wb")
+		try:
+			shutil.copyfileobj(src, out, 65536)
+		finally:
+			out.close()
+			src.close()
+		os.utime(tmpPath, (tm, tm))
+		if os.path.exists(pth) and sys.platform.startswith("win"):
+			# Windows won't rename over an existing file; elsewhere, the rename
+			# replaces it atomically.
+			os.remove(pth)
+		os.rename(tmpPath, pth)
+
+
 	# These are not handled by the local bizobjs, so just return False
 	def beginTransaction(self): return False
 	def commitTransaction(self): return False
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+Cache stores used by RemoteBizobj to keep bizobj data between web requests.
+
+A store holds one entry for each (hashval, cursorKey) pair, so a request can
+load only the cursor it needs instead of every cursor the bizobj has held.
+Entries are evicted when they have not been used for 'ttl' seconds, and the
+least recently used entries are dropped once the total size of the stored
+data exceeds 'maxSize' bytes. Either limit can be disabled by passing None.
+
+Two stores are provided:
+
+	SQLiteCacheStore: keeps entries in an indexed SQLite database file, and
+		can be shared by several server processes.
+	MemoryCacheStore: keeps entries in a dict; suited to single-process
+		servers and testing.
+"""
+import pickle
+import threading
+import time
+import zlib
+
+from dabo.dLocalize import _
+try:
+	from pysqlite2 import dbapi2 as sqlite
+except ImportError:
+	import sqlite3 as sqlite
+
+
+
+def _dumps(val):
+	return zlib.compress(pickle.dumps(val, pickle.HIGHEST_PROTOCOL))
+
+
+def _loads(data):
+	return pickle.loads(zlib.decompress(data))
+
+
+def _normalizeKey(val):
+	"""
+	Converts a cursor key to a canonical form, so that keys that compare
+	equal, such as 'a' and u'a' or 1 and 1L, give the same stored key.
+	"""
+	if isinstance(val, str):
+		try:
+			return val.decode("utf-8")
+		except UnicodeDecodeError:
+			return val
+	if isinstance(val, (bool, int, long)):
+		return int(val)
+	if isinstance(val, (tuple, list)):
+		return tuple([_normalizeKey(itm) for itm in val])
+	return val
+
+
+
+class CacheStore(object):
+	"""
+	Base class for cache stores. Subclasses must implement the storage
+	methods below; values passed to put() may be any picklable object.
+	"""
+	def __init__(self, ttl=3600, maxSize=256 * 1024 * 1024, evictInterval=60):
+		self.ttl = ttl
+		self.maxSize = maxSize
+		# Minimum number of seconds between automatic eviction passes.
+		self.evictInterval = evictInterval
+		self._lastEviction = time.time()
+
+
+	def get(self, hashval, cursorKey):
+		"""Returns the value stored for the cursor, or None if there is none."""
+		raise NotImplementedError
+
+
+	def getAll(self, hashval):
+		"""Returns a dict mapping cursor keys to values for all of the
+		cursors stored for 'hashval'.
+		"""
+		raise NotImplementedError
+
+
+	def put(self, hashval, cursorKey, value):
+		"""Stores 'value' for the cursor, replacing any earlier value."""
+		raise NotImplementedError
+
+
+	def delete(self, hashval, cursorKey=None):
+		"""Removes the entry for the cursor, or all of the entries for
+		'hashval' if no cursor key is passed.
+		"""
+		raise NotImplementedError
+
+
+	def evict(self, now=None):
+		"""Removes expired entries, and then the least recently used ones
+		until the store fits within 'maxSize'.
+		"""
+		raise NotImplementedError
+
+
+	def clear(self):
+		"""Removes all entries."""
+		raise NotImplementedError
+
+
+	def _autoEvict(self):
+		now = time.time()
+		if now - self._lastEviction >= self.evictInterval:
+			self._lastEviction = now
+			self.evict(now)
+
+
+
+class MemoryCacheStore(CacheStore):
+	"""Cache store that keeps its entries in memory."""
+	def __init__(self, *args, **kwargs):
+		super(MemoryCacheStore, self).__init__(*args, **kwargs)
+		# Maps (hashval, cursorKey) to (data, size, lastAccessed)
+		self._entries = {}
+		self._lock = threading.RLock()
+
+
+	def get(self, hashval, cursorKey):
+		with self._lock:
+			try:
+				data, size, accessed = self._entries[(hashval, cursorKey)]
+			except KeyError:
+				return None
+			self._entries[(hashval, cursorKey)] = (data, size, time.time())
+		return _loads(data)
+
+
+	def getAll(self, hashval):
+		with self._lock:
+			keys = [ck for (hv, ck) in self._entries if hv == hashval]
+		ret = {}
+		for key in keys:
+			val = self.get(hashval, key)
+			if val is not None:
+				ret[key] = val
+		return ret
+
+
+	def put(self, hashval, cursorKey, value):
+		data = _dumps(value)
+		with self._lock:
+			self._entries[(hashval, cursorKey)] = (data, len(data), time.time())
+		self._autoEvict()
+
+
+	def delete(self, hashval, cursorKey=None):
+		with self._lock:
+			if cursorKey is None:
+				for key in [key for key in self._entries if key[0] == hashval]:
+					del self._entries[key]
+			else:
+				self._entries.pop((hashval, cursorKey), None)
+
+
+	def evict(self, now=None):
+		if now is None:
+			now = time.time()
+		with self._lock:
+			entries = self._entries
+			if self.ttl is not None:
+				cutoff = now - self.ttl
+				for key in [key for key, val in entries.iteritems() if val[2] < cutoff]:
+					del entries[key]
+			if self.maxSize is not None:
+				total = sum([val[1] for val in entries.itervalues()])
+				if total > self.maxSize:
+					byAge = sorted(entries.iteritems(), key=lambda item: item[1][2])
+					for key, (data, size, accessed) in byAge:
+						if total <= self.maxSize:
+							break
+						del entries[key]
+						total -= size
+
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+
+
+
+class SQLiteCacheStore(CacheStore):
+	"""
+	Cache store that keeps its entries in a SQLite database at 'pth'. Each
+	thread gets its own connection to the database.
+	"""
+	def __init__(self, pth, *args, **kwargs):
+		super(SQLiteCacheStore, self).__init__(*args, **kwargs)
+		self.path = pth
+		self._local = threading.local()
+		self._execute("""create table if not exists cache_entry (
+				hashval text not null, cursorkey text not null, keydata blob not null,
+				data blob not null, size integer not null, accessed real not null,
+				primary key (hashval, cursorkey))""")
+		self._execute("""create index if not exists cache_entry_accessed
+				on cache_entry (accessed)""")
+
+
+	def _getConnection(self):
+		try:
+			return self._local.connection
+		except AttributeError:
+			con = self._local.connection = sqlite.connect(self.path, timeout=30)
+			con.text_factory = str
+			# With WAL, the connections of other threads can read while one writes.
+			# Losing the last writes after a power failure is fine for a cache.
+			con.execute("PRAGMA journal_mode = WAL")
+			con.execute("PRAGMA synchronous = NORMAL")
+			return con
+
+
+	def _execute(self, sql, params=()):
+		con = self._getConnection()
+		try:
+			crs = con.execute(sql, params)
+			ret = crs.fetchall()
+			con.commit()
+		except sqlite.Error, e:
+			con.rollback()
+			raise IOError(_("Cache store error: %s") % e)
+		return ret
+
+
+	def _key(self, cursorKey):
+		# Pickles of equal values can differ, so the repr of the normalized key
+		# is used for lookups; the pickled key is kept for getAll().
+		return repr(_normalizeKey(cursorKey))
+
+
+	def get(self, hashval, cursorKey):
+		key = self._key(cursorKey)
+		rows = self._execute("select data from cache_entry where hashval = ? and cursorkey = ?",
+				(hashval, key))
+		if not rows:
+			return None
+		self._execute("update cache_entry set accessed = ? where hashval = ? and cursorkey = ?",
+				(time.time(), hashval, key))
+		return _loads(str(rows[0][0]))
+
+
+	def getAll(self, hashval):
+		rows = self._execute("select keydata, data from cache_entry where hashval = ?",
+				(hashval, ))
+		if rows:
+			self._execute("update cache_entry set accessed = ? where hashval = ?",
+					(time.time(), hashval))
+		return dict([(pickle.loads(str(key)), _loads(str(data))) for key, data in rows])
+
+
+	def put(self, hashval, cursorKey, value):
+		data = _dumps(value)
+		keyData = sqlite.Binary(pickle.dumps(cursorKey, pickle.HIGHEST_PROTOCOL))
+		self._execute("""insert or replace into cache_entry
+				(hashval, cursorkey, keydata, data, size, accessed) values (?, ?, ?, ?, ?, ?)""",
+				(hashval, self._key(cursorKey), keyData, sqlite.Binary(data), len(data),
+				time.time()))
+		self._autoEvict()
+
+
+	def delete(self, hashval, cursorKey=None):
+		if cursorKey is None:
+			self._execute("delete from cache_entry where hashval = ?", (hashval, ))
+		else:
+			self._execute("delete from cache_entry where hashval = ? and cursorkey = ?",
+					(hashval, self._key(cursorKey)))
+
+
+	def evict(self, now=None):
+		if now is None:
+			now = time.time()
+		if self.ttl is not None:
+			self._execute("delete from cache_entry where accessed < ?", (now - self.ttl, ))
+		if self.maxSize is None:
+			return
+		total = self._execute("select coalesce(sum(size), 0) from cache_entry")[0][0]
+		if total <= self.maxSize:
+			return
+		# Find the access time at which the newer entries fit within maxSize.
+		cutoff = None
+		for accessed, size in self._execute(
+				"select accessed, size from cache_entry order by accessed"):
+			if total <= self.maxSize:
+				break
+			total -= size
+			cutoff = accessed
+		if cutoff is not None:
+			self._execute("delete from cache_entry where accessed <= ?", (cutoff, ))
+
+
+	def clear(self):
+		self._execute("delete from cache_entry")
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+
+
+class BoundedCache(object):
+	"""
+	Size-bounded cache of values by key. Entries never expire by themselves;
+	the owner removes them when the underlying data changes.
+
+	At most 'maxSize' entries are kept. The entries are held in two
+	generations of up to maxSize / 2 entries each: new and recently used
+	entries go into the current generation, and when it is full, the previous
+	generation is dropped and the current one takes its place. This
+	approximates least recently used eviction without any bookkeeping on
+	cache hits.
+	"""
+	def __init__(self, maxSize=10000):
+		self._current = {}
+		self._previous = {}
+		self.maxSize = maxSize
+
+
+	def __len__(self):
+		return len(self._current) + len(self._previous)
+
+
+	def __contains__(self, key):
+		return key in self._current or key in self._previous
+
+
+	def get(self, key, default=None):
+		"""Return the value stored for the key, or 'default' if there is none."""
+		try:
+			return self._current[key]
+		except KeyError:
+			pass
+		try:
+			val = self._previous.pop(key)
+		except KeyError:
+			return default
+		# It's in use, so move it to the current generation.
+		self._store(key, val)
+		return val
+
+
+	def set(self, key, val):
+		"""Store the value for the key."""
+		self._previous.pop(key, None)
+		self._store(key, val)
+
+
+	def _store(self, key, val):
+		current = self._current
+		if self._generationSize is not None and len(current) >= self._generationSize \
+				and key not in current:
+			self._previous = current
+			current = self._current = {}
+		current[key] = val
+
+
+	def clear(self):
+		"""Remove all stored entries."""
+		self._current.clear()
+		self._previous.clear()
+
+
+	def _getMaxSize(self):
+		return self._maxSize
+
+	def _setMaxSize(self, val):
+		self._maxSize = val
+		if val is None:
+			self._generationSize = None
+		else:
+			self._generationSize = max(1, val / 2)
+			# Apply the new limit right away.
+			while len(self) > val:
+				if self._previous:
+					self._previous.clear()
+				else:
+					self._previous, self._current = self._current, {}
+
+
+	maxSize = property(_getMaxSize, _setMaxSize, None,
+			"Maximum number of entries in the cache, or None for no limit.  (int)")
+
+
+
+class CellCache(BoundedCache):
+	"""
+	BoundedCache of values keyed by (row, col), as used by dGrid for its cell
+	values and attributes. The cells of a row and/or column can be removed
+	with invalidate().
+	"""
+	def __init__(self, maxSize=10000):
+		super(CellCache, self).__init__(maxSize)
+		# All of the columns that have been stored, for invalidating rows.
+		self._cols = set()
+
+
+	def get(self, row, col, default=None):
+		"""Return the value stored for the cell, or 'default' if there is none."""
+		# Same as BoundedCache.get(), inlined since it's called for every cell
+		# that is painted.
+		key = (row, col)
+		try:
+			return self._current[key]
+		except KeyError:
+			pass
+		try:
+			val = self._previous.pop(key)
+		except KeyError:
+			return default
+		self._store(key, val)
+		return val
+
+
+	def set(self, row, col, val):
+		"""Store the value for the cell."""
+		key = (row, col)
+		self._previous.pop(key, None)
+		self._store(key, val)
+		self._cols.add(col)
+
+
+	def invalidate(self, row=None, col=None):
+		"""
+		Remove the stored cells of the passed row and/or column; when neither
+		is passed, the whole cache is cleared.
+		"""
+		if row is None and col is None:
+			self.clear()
+			return
+		for cells in (self._current, self._previous):
+			if col is None:
+				for cc in self._cols:
+					cells.pop((row, cc), None)
+			elif row is None:
+				for key in [key for key in cells if key[1] == col]:
+					del cells[key]
+			else:
+				cells.pop((row, col), None)
+		if row is None:
+			self._cols.discard(col)
+
+
+	def clear(self):
+		"""Remove all stored cells."""
+		super(CellCache, self).clear()
+		self._cols.clear()
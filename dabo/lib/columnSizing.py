@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for sizing grid columns to their contents from a sample of the
+rows, instead of measuring every cell.
+"""
+import random
+
+
+
+def sampleRows(rowCount, sampleSize, seed=None):
+	"""
+	Return a sorted list of up to 'sampleSize' row numbers out of 'rowCount'
+	rows: a quarter of them from the top, a quarter from the bottom, and the
+	rest at random in between. When there aren't more rows than
+	'sampleSize', all of them are returned.
+	"""
+	if rowCount <= sampleSize:
+		return range(rowCount)
+	edge = sampleSize // 4
+	ret = range(edge) + range(rowCount - edge, rowCount)
+	ret += random.Random(seed).sample(xrange(edge, rowCount - edge), sampleSize - 2 * edge)
+	ret.sort()
+	return ret
+
+
+def widestText(texts, measure, count=20):
+	"""
+	Return the largest width of the passed texts. 'measure' is called with a
+	list of lines of text, and returns the list of their widths. Only the
+	'count' longest lines, by number of characters, are measured, since they
+	are almost always the widest.
+	"""
+	lines = set()
+	for text in texts:
+		if text:
+			lines.update(text.splitlines())
+	lines.discard(u"")
+	longest = sorted(lines, key=len, reverse=True)[:count]
+	return max(measure(longest) or [0])
@@ -5,6 +5,7 @@ from StringIO import StringIO
 import os.path
 from xmltodict import escQuote
 import dabo
+import dabo.lib
 import dabo.lib.utils as utils
 from dabo.dLocalize import _
 
@@ -115,6 +116,78 @@ def importConnections(pth=None, useHomeDir=False):
 	return ret
 
 
+class ConnectionNameCache(object):
+	"""
+	Remembers the names of the connections defined in .cnxml files, keyed by
+	the path, modification time and size of each file, so that files that
+	haven't changed don't need to be parsed until one of their connections
+	is actually used. Only the names are stored; the connection details,
+	including passwords, are always read from the files themselves.
+
+	The cache is kept in the JSON file 'pth'; call save() to write changes.
+	"""
+	def __init__(self, pth):
+		self.path = pth
+		self._entries = {}
+		self._changed = False
+		try:
+			entries = dabo.lib.jsonDecode(open(pth).read())
+		except (IOError, ValueError):
+			entries = {}
+		if isinstance(entries, dict):
+			self._entries = entries
+
+
+	def _fileKey(self, filePath):
+		try:
+			st = os.stat(filePath)
+		except OSError:
+			return None
+		return [st.st_mtime, st.st_size]
+
+
+	def getNames(self, filePath):
+		"""
+		Returns the list of connection names for 'filePath', or None if it
+		isn't cached or the file has changed since it was cached.
+		"""
+		entry = self._entries.get(os.path.abspath(filePath))
+		if entry and entry[:2] == self._fileKey(filePath):
+			return entry[2]
+		return None
+
+
+	def setNames(self, filePath, names):
+		"""Stores the connection names defined in 'filePath'."""
+		key = self._fileKey(filePath)
+		if key is not None:
+			self._entries[os.path.abspath(filePath)] = key + [sorted(names)]
+			self._changed = True
+
+
+	def save(self):
+		"""
+		Writes the cache file if anything has changed, dropping the entries
+		for files that no longer exist.
+		"""
+		if not self._changed:
+			return
+		for filePath in self._entries.keys():
+			if not os.path.exists(filePath):
+				del self._entries[filePath]
+		tmpPath = "%s.%s.tmp" % (self.path, os.getpid())
+		try:
+			open(tmpPath, "w").write(dabo.lib.jsonEncode(self._entries))
+			if os.path.exists(self.path) and sys.platform.startswith("win"):
+				os.remove(self.path)
+			os.rename(tmpPath, self.path)
+		except (IOError, OSError), e:
+			dabo.log.error(_("Could not write the connection cache '%(pth)s': %(e)s")
+					% {"pth": self.path, "e": e})
+		else:
+			self._changed = False
+
+
 def createXML(cxns, encoding=None):
 	""" Returns the XML for the passed connection info. The info
 	can either be a single dict of connection info, or a list/tuple of
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming export of cursor and bizobj data.
+
+Each format has a generator that yields the output one record at a time, and
+a write function that sends those chunks straight to a file-like object, so
+memory use stays bounded no matter how many rows are exported. Rows are read
+through getDataSetView(), so no copy of the data set is made. Typical use::
+
+	from dabo.lib import dataExport
+	f = open("customers.csv", "wb")
+	dataExport.writeCSV(custBizobj, f)
+	f.close()
+
+The source can be either a cursor or a bizobj. For bizobjs, the JSON Lines
+and XML writers can optionally include the rows of the child bizobjs; the
+record pointer is moved for each parent row so that the children are
+requeried, and is restored when the export finishes.
+"""
+import csv
+import datetime
+import json
+from cStringIO import StringIO
+from decimal import Decimal
+
+from dabo.lib.utils import ustr
+
+
+_xmlHeader = """<?xml version="1.0" encoding="%(encoding)s"?>
+<dabocursor xmlns="http://www.dabodev.com"
+xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+xsi:schemaLocation="http://www.dabodev.com dabocursor.xsd"
+xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
+	<cursor autopopulate="%(autopop)s" keyfield="%(keyfield)s" table="%(table)s">
+"""
+_xmlFooter = """	</cursor>
+</dabocursor>
+"""
+_xmlColTemplate = """<column name="%s" type="%s">%s</column>"""
+
+
+
+def _isBizobj(source):
+	return hasattr(source, "_CurrentCursor")
+
+
+def _getCursor(source):
+	if _isBizobj(source):
+		return source._CurrentCursor
+	return source
+
+
+def _iterRows(source, fields, children):
+	"""
+	Yields (record, childBizobjs) for every row in the source. The child
+	bizobjs are only returned (and requeried) when 'children' is True.
+	"""
+	view = source.getDataSetView(fields or ())
+	if view is None:
+		return
+	kids = ()
+	if children and _isBizobj(source):
+		kids = source.getChildren()
+	if not kids:
+		for rec in view:
+			yield rec, ()
+		return
+	oldRow = source.RowNumber
+	try:
+		for row, rec in enumerate(view):
+			source._moveToRowNum(row)
+			yield rec, kids
+	finally:
+		if 0 <= oldRow < source.RowCount:
+			source._moveToRowNum(oldRow)
+
+
+def _encodeChunks(chunks, encoding):
+	for chunk in chunks:
+		if isinstance(chunk, unicode):
+			chunk = chunk.encode(encoding)
+		yield chunk
+
+
+def _write(chunks, fileObj):
+	write = fileObj.write
+	for chunk in chunks:
+		write(chunk)
+
+
+def _csvValue(val, encoding):
+	if val is None:
+		return ""
+	if isinstance(val, unicode):
+		return val.encode(encoding)
+	if isinstance(val, buffer):
+		return str(val)
+	return val
+
+
+def iterCSV(source, fields=None, header=True, encoding=None, **fmtparams):
+	"""
+	Yields the data in 'source' as CSV, one line per record. Child bizobjs are
+	not included. 'fields' limits and orders the exported columns; any
+	additional keyword arguments are passed to csv.writer(). When 'fields' is
+	passed, the header is written even if there are no records.
+	"""
+	if encoding is None:
+		encoding = _getCursor(source).Encoding
+	buf = StringIO()
+	writer = csv.writer(buf, **fmtparams)
+	columns = fields
+	if header and columns is not None:
+		writer.writerow([_csvValue(col, encoding) for col in columns])
+		header = False
+		yield buf.getvalue()
+		buf.seek(0)
+		buf.truncate()
+	for rec, kids in _iterRows(source, fields, False):
+		if columns is None:
+			columns = rec.keys()
+		if header:
+			writer.writerow([_csvValue(col, encoding) for col in columns])
+			header = False
+		writer.writerow([_csvValue(rec.get(col), encoding) for col in columns])
+		yield buf.getvalue()
+		buf.seek(0)
+		buf.truncate()
+
+
+def writeCSV(source, fileObj, fields=None, header=True, encoding=None, **fmtparams):
+	"""Writes the data in 'source' to 'fileObj' as CSV. See iterCSV()."""
+	_write(iterCSV(source, fields=fields, header=header, encoding=encoding,
+			**fmtparams), fileObj)
+
+
+def _jsonDefault(val):
+	if isinstance(val, (datetime.date, datetime.datetime, datetime.time)):
+		return val.isoformat()
+	if isinstance(val, Decimal):
+		return ustr(val)
+	if isinstance(val, buffer):
+		return str(val).encode("base64")
+	return ustr(val)
+
+
+def _jsonRecord(rec, kids, childFields):
+	ret = rec.copy()
+	if kids:
+		ret["children"] = kidData = {}
+		for kid in kids:
+			kidData[kid.DataSource] = [_jsonRecord(kidRec, kidKids, childFields)
+					for kidRec, kidKids in _iterRows(kid, childFields.get(kid.DataSource),
+					True)]
+	return ret
+
+
+def iterJSONLines(source, fields=None, children=False, childFields=None,
+		encoding=None):
+	"""
+	Yields the data in 'source' in JSON Lines format: one JSON object per
+	record, each followed by a newline.
+
+	If 'children' is True and the source is a bizobj, each record gets a
+	'children' key holding a dict that maps each child's DataSource to the
+	list of its related records, nested as deeply as the bizobj hierarchy.
+	'childFields' optionally maps child DataSource names to the fields to
+	export for that child.
+	"""
+	if encoding is None:
+		encoding = _getCursor(source).Encoding
+	if childFields is None:
+		childFields = {}
+	encoder = json.JSONEncoder(ensure_ascii=False, default=_jsonDefault,
+			encoding=encoding)
+	for rec, kids in _iterRows(source, fields, children):
+		line = encoder.encode(_jsonRecord(rec, kids, childFields))
+		if isinstance(line, unicode):
+			line = line.encode(encoding)
+		yield line + "\n"
+
+
+def writeJSONLines(source, fileObj, fields=None, children=False,
+		childFields=None, encoding=None):
+	"""Writes the data in 'source' to 'fileObj' as JSON Lines. See iterJSONLines()."""
+	_write(iterJSONLines(source, fields=fields, children=children,
+			childFields=childFields, encoding=encoding), fileObj)
+
+
+def _xmlEscape(val):
+	if isinstance(val, basestring):
+		if ("\n" in val) or ("<" in val) or ("&" in val):
+			return "<![CDATA[%s]]>" % val.replace("]]>", "]]]]><![CDATA[>")
+	elif isinstance(val, buffer):
+		return str(val).encode("base64")
+	return val
+
+
+def _iterXMLRows(source, fields, children, childFields, level):
+	getType = _getCursor(source).getType
+	indent = "\t" * level
+	colIndent = "\n%s\t" % indent
+	for rec, kids in _iterRows(source, fields, children):
+		cols = [_xmlColTemplate % (key, getType(val), _xmlEscape(val))
+				for key, val in rec.iteritems()]
+		yield "%s<row>%s%s\n" % (indent, colIndent, colIndent.join(cols))
+		for kid in kids:
+			kidFields = childFields.get(kid.DataSource)
+			if not kid.RowCount:
+				yield """%s\t<child table="%s" />\n""" % (indent, kid.DataSource)
+				continue
+			yield """%s\t<child table="%s">\n""" % (indent, kid.DataSource)
+			for chunk in _iterXMLRows(kid, kidFields, True, childFields, level + 2):
+				yield chunk
+			yield "%s\t</child>\n" % indent
+		yield "%s</row>\n" % indent
+
+
+def iterXML(source, fields=None, children=False, childFields=None, encoding=None):
+	"""
+	Yields the data in 'source' in the 'dabocursor' XML format produced by
+	dCursorMixin.cursorToXML() and dBizobj.dataToXML(), one record at a time.
+
+	If 'children' is True and the source is a bizobj, the related child
+	records are nested inside each row. 'childFields' optionally maps child
+	DataSource names to the fields to export for that child.
+	"""
+	crs = _getCursor(source)
+	if encoding is None:
+		encoding = crs.Encoding
+	if childFields is None:
+		childFields = {}
+	if _isBizobj(source):
+		table = source.DataSource
+	else:
+		table = crs.Table
+	chunks = _iterXMLRows(source, fields, children, childFields, 2)
+	yield _xmlHeader % {"encoding": encoding, "autopop": source.AutoPopulatePK,
+			"keyfield": source.KeyField, "table": table}
+	for chunk in _encodeChunks(chunks, encoding):
+		yield chunk
+	yield _xmlFooter
+
+
+def writeXML(source, fileObj, fields=None, children=False, childFields=None,
+		encoding=None):
+	"""Writes the data in 'source' to 'fileObj' as dabocursor XML. See iterXML()."""
+	_write(iterXML(source, fields=fields, children=children,
+			childFields=childFields, encoding=encoding), fileObj)
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Versioned delta protocol used to refresh remote bizobjs.
+
+When a remote bizobj is requeried, the client sends the version token of the
+data it holds. The server keeps a snapshot of what it last sent to that
+client (the primary key order plus a hash of every row), runs the query, and
+answers with either:
+
+	- a FULL frame, containing the entire data set, when the client has no
+	  data yet or its version does not match the server's snapshot; or
+	- a DELTA frame, containing only the inserted, updated and deleted rows,
+	  plus the new row order if it cannot be derived from the changes.
+
+Frames are a short binary header followed by a zlib-compressed pickle of the
+payload. Servers that don't know the protocol return the old JSON-encoded
+data set, which isFrame() lets the client detect.
+
+LocalSyncServer is an in-process stand-in for the application server's
+requery handler; assign it as a RemoteConnector's UrlOpener to exercise the
+protocol without a network.
+"""
+import ast
+import hashlib
+import pickle
+import struct
+import zlib
+from cStringIO import StringIO
+
+import dabo
+from dabo.dLocalize import _
+from dabo.db.dDataSet import dDataSet
+
+# Only used by LocalSyncServer.
+cgi = dabo.LazyImport("cgi")
+urllib2 = dabo.LazyImport("urllib2")
+
+
+PROTOCOL_VERSION = 1
+FRAME_FULL = 0
+FRAME_DELTA = 1
+_frameMagic = "DSYN"
+_frameHeader = struct.Struct("!4sBB")
+
+
+
+def isFrame(data):
+	"""Returns True if 'data' is a delta-sync frame."""
+	return data[:len(_frameMagic)] == _frameMagic
+
+
+def encodeFrame(kind, payload, level=6):
+	"""Returns the framed, compressed representation of 'payload'."""
+	body = zlib.compress(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL), level)
+	return _frameHeader.pack(_frameMagic, PROTOCOL_VERSION, kind) + body
+
+
+def decodeFrame(data):
+	"""Returns a (kind, payload) tuple for the framed 'data'."""
+	magic, version, kind = _frameHeader.unpack_from(data)
+	if magic != _frameMagic:
+		raise ValueError(_("Data is not a delta-sync frame"))
+	if version > PROTOCOL_VERSION:
+		raise ValueError(_("Unsupported delta-sync protocol version: %s") % version)
+	return kind, pickle.loads(zlib.decompress(data[_frameHeader.size:]))
+
+
+def getPK(rec, keyField):
+	"""Returns the primary key value of 'rec'; compound keys become tuples."""
+	if "," in keyField:
+		return tuple([rec[fld.strip()] for fld in keyField.split(",")])
+	return rec[keyField]
+
+
+def rowHash(rec):
+	"""Returns a digest of the values in 'rec', ignoring internal 'dabo-' fields."""
+	vals = [(key, val) for key, val in sorted(rec.iteritems())
+			if not key.startswith("dabo-")]
+	return hashlib.md5(repr(vals)).digest()
+
+
+def makeSnapshot(records, keyField):
+	"""
+	Returns a (version, order, hashes) snapshot of 'records': the list of
+	primary keys in row order, a dict mapping each key to its row hash, and a
+	version token identifying the whole data set.
+	"""
+	order = []
+	hashes = {}
+	versionHash = hashlib.md5()
+	for rec in records:
+		pk = getPK(rec, keyField)
+		rh = rowHash(rec)
+		order.append(pk)
+		hashes[pk] = rh
+		versionHash.update(repr(pk))
+		versionHash.update(rh)
+	return versionHash.hexdigest(), order, hashes
+
+
+def computeDelta(snapshot, records, keyField):
+	"""
+	Compares 'records' with the earlier 'snapshot', and returns a tuple of
+	(newSnapshot, deltaPayload). The payload holds the inserted and updated
+	records, the deleted keys, and the new key order if the client would not
+	arrive at it by dropping the deleted rows and appending the inserted ones.
+	"""
+	oldVersion, oldOrder, oldHashes = snapshot
+	newSnapshot = version, order, hashes = makeSnapshot(records, keyField)
+	inserted = []
+	updated = []
+	for rec, pk in zip(records, order):
+		oldHash = oldHashes.get(pk)
+		if oldHash is None:
+			inserted.append(rec)
+		elif oldHash != hashes[pk]:
+			updated.append(rec)
+	deleted = [pk for pk in oldOrder if pk not in hashes]
+	expectedOrder = [pk for pk in oldOrder if pk in hashes]
+	expectedOrder.extend([getPK(rec, keyField) for rec in inserted])
+	payload = {"version": version, "base": oldVersion, "count": len(order),
+			"inserted": inserted, "updated": updated, "deleted": deleted,
+			"order": None}
+	if expectedOrder != order:
+		payload["order"] = order
+	return newSnapshot, payload
+
+
+def applyDelta(records, keyField, payload):
+	"""
+	Applies a delta payload to the client's 'records', and returns the
+	resulting dDataSet. Raises ValueError if the result doesn't have the
+	number of rows the server reported, which means the client's data had
+	drifted from the server's snapshot and a full refresh is needed.
+	"""
+	byPK = {}
+	order = []
+	for rec in records:
+		pk = getPK(rec, keyField)
+		byPK[pk] = rec
+		order.append(pk)
+	for pk in payload["deleted"]:
+		byPK.pop(pk, None)
+	for rec in payload["updated"]:
+		byPK[getPK(rec, keyField)] = rec
+	for rec in payload["inserted"]:
+		pk = getPK(rec, keyField)
+		if pk not in byPK:
+			order.append(pk)
+		byPK[pk] = rec
+	newOrder = payload["order"]
+	if newOrder is None:
+		newOrder = [pk for pk in order if pk in byPK]
+	try:
+		ret = [byPK[pk] for pk in newOrder]
+	except KeyError:
+		raise ValueError(_("Delta references a row the client doesn't hold"))
+	if len(ret) != payload["count"]:
+		raise ValueError(_("Row count mismatch after applying delta"))
+	return dDataSet(ret)
+
+
+
+class LocalSyncServer(object):
+	"""
+	In-process stand-in for the application server's bizobj requery handler.
+	It answers RemoteConnector.requery() calls by loading the matching
+	RemoteBizobj subclass from 'bizClasses' (a dict keyed by DataSource) and
+	returning its getSyncFrame() result. It exposes the same open() method as
+	a urllib2 opener, so it can be set as a RemoteConnector's UrlOpener.
+	"""
+	def __init__(self, bizClasses, cacheDir):
+		self.bizClasses = bizClasses
+		self.cacheDir = cacheDir
+		# Kind and size of the last frame sent; useful for tests.
+		self.lastFrameKind = None
+		self.lastFrameSize = 0
+
+
+	def open(self, url, data=None):
+		parts = url.split("/")
+		try:
+			pos = parts.index("biz")
+			hashval, ds, mthd = parts[pos + 1:pos + 4]
+		except ValueError:
+			raise urllib2.HTTPError(url, 404, _("Not Found"), None, None)
+		bizClass = self.bizClasses.get(ds)
+		if bizClass is None or mthd != "requery":
+			raise urllib2.HTTPError(url, 404, _("Not Found"), None, None)
+		params = dict(cgi.parse_qsl(data or "", keep_blank_values=True))
+		sqlParams = params.get("SQLParams")
+		if sqlParams and sqlParams != "None":
+			sqlParams = ast.literal_eval(sqlParams)
+		else:
+			sqlParams = None
+		biz = bizClass.load(hashval, ds, self.cacheDir)
+		biz.KeyField = params["KeyField"]
+		frame = biz.getSyncFrame(params["SQL"], sqlParams,
+				params.get("SyncVersion") or None)
+		self.lastFrameKind = decodeFrame(frame)[0]
+		self.lastFrameSize = len(frame)
+		return StringIO(frame)
@@ -2,9 +2,11 @@
 import string
 import types
 import traceback
+import time
 import dabo
 from dabo.dLocalize import _
 import dabo.dEvents as dEvents
+from dabo.lib import metrics
 
 
 class EventMixin(object):
@@ -71,6 +73,7 @@ class EventMixin(object):
 				eventData=eventData, *args, **kwargs)
 
 		# Now iterate the bindings, and execute the callbacks:
+		startTime = metrics.enabled and time.time()
 		if dabo.reverseEventsOrder:
 			bindings = reversed(self._EventBindings)
 		else:
@@ -83,6 +86,8 @@ class EventMixin(object):
 				# The event handler set the Continue flag to False, specifying that
 				# no more event handlers should process the event.
 				break
+		if startTime:
+			metrics.addTime("event.%s" % eventClass.__name__, startTime)
 		try:
 			self.__raisedEvents.pop()
 		except (AttributeError, IndexError):
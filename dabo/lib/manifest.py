@@ -3,6 +3,7 @@
 import sys
 import os
 import datetime
+import hashlib
 import dabo
 
 
@@ -21,78 +22,155 @@ class Manifest(object):
 	dtFormat = "%Y-%m-%d %H:%M:%S"
 
 
+	# Directory listings from earlier scans, keyed by (path, types). Each value
+	# maps a relative directory to (dirMtime, subdirs, files), where 'files'
+	# maps file names to [mtime, size, contentHash].
+	_scanCache = {}
+
+
 	@classmethod
-	def getManifest(cls, pth, extraTypes=None, restrictTypes=None):
-		"""Given a path, returns the manifest for the files on that path. Only the
-		main file types are included; if you require additional types, pass them in
-		the 'extraTypes' parameter as a list or tuple. If you don't want the standard
-		included types, pass a list/tuple of the types you want in the 'restrictTypes'
-		parameter, and only those types will be included.
-		"""
+	def _getOkTypes(cls, extraTypes, restrictTypes):
 		if restrictTypes is not None:
-			okTypes = list(restrictTypes)
-		else:
-			if extraTypes is not None:
-				okTypes = cls.includedTypes + list(extraTypes)
-			else:
-				okTypes = cls.includedTypes
+			return list(restrictTypes)
+		if extraTypes is not None:
+			return cls.includedTypes + list(extraTypes)
+		return cls.includedTypes
+
+
+	@classmethod
+	def _scan(cls, pth, okTypes, useCache=True):
+		"""Returns the directory listings for 'pth'. Directories whose mtime
+		hasn't changed since the previous scan are not listed or stat'ed again.
+		"""
 		# Make sure the path exists
 		pth = os.path.expanduser(pth)
 		if not os.path.exists(pth):
 			raise OSError("Path '%s' does not exist." % pth)
+		cacheKey = (os.path.abspath(pth), tuple(sorted(okTypes)))
+		if useCache:
+			oldListing = cls._scanCache.get(cacheKey, {})
+		else:
+			oldListing = {}
+		okTypes = set(okTypes)
+		listing = {}
+		pending = [""]
+		while pending:
+			reldir = pending.pop()
+			fullDir = os.path.join(pth, reldir)
+			dirMtime = os.stat(fullDir).st_mtime
+			cached = oldListing.get(reldir)
+			if cached and cached[0] == dirMtime:
+				subdirs, files = cached[1], cached[2]
+			else:
+				if cached:
+					oldFiles = cached[2]
+				else:
+					oldFiles = {}
+				subdirs = []
+				files = {}
+				for fname in os.listdir(fullDir):
+					fullPath = os.path.join(fullDir, fname)
+					if os.path.isdir(fullPath):
+						# Like os.walk(), don't follow links to directories.
+						if not os.path.islink(fullPath):
+							subdirs.append(fname)
+						continue
+					ext = os.path.splitext(fname)[1].split(".")[-1]
+					if ext not in okTypes:
+						continue
+					stat = os.stat(fullPath)
+					info = oldFiles.get(fname)
+					if info and (info[0], info[1]) == (stat[8], stat.st_size):
+						files[fname] = info
+					else:
+						files[fname] = [stat[8], stat.st_size, None]
+			listing[reldir] = (dirMtime, subdirs, files)
+			pending.extend([os.path.join(reldir, subdir) for subdir in subdirs])
+		cls._scanCache[cacheKey] = listing
+		return pth, listing
+
+
+	@classmethod
+	def clearCache(cls):
+		"""Discards the directory listings kept from earlier scans."""
+		cls._scanCache.clear()
 
+
+	@classmethod
+	def getManifest(cls, pth, extraTypes=None, restrictTypes=None, useCache=True):
+		"""Given a path, returns the manifest for the files on that path. Only the
+		main file types are included; if you require additional types, pass them in
+		the 'extraTypes' parameter as a list or tuple. If you don't want the standard
+		included types, pass a list/tuple of the types you want in the 'restrictTypes'
+		parameter, and only those types will be included.
+
+		The directory listings are cached, so later calls for the same path only
+		list and stat the directories whose modification time has changed. Adding,
+		removing or renaming a file changes its directory's time, but rewriting a
+		file in place does not; pass False for 'useCache' (or call clearCache())
+		to force a complete scan when files may have been edited that way.
+		"""
+		okTypes = cls._getOkTypes(extraTypes, restrictTypes)
+		pth, listing = cls._scan(pth, okTypes, useCache=useCache)
 		# Returned paths are relative to the starting path.
-		baseDirName = os.path.split(pth)[-1]
 		ret = {}
-		pathGen = os.walk(pth)
-		for dirname, subdirs, fnames in pathGen:
-			# Remove the base path and any leading separator
-			reldir = dirname.split(pth)[-1].split(os.path.sep, 1)[-1]
-			for fn in fnames:
-				ext = os.path.splitext(fn)[1].split(".")[-1]
-				if ext in okTypes:
-					fullPath = os.path.join(dirname, fn)
-					relativePath = os.path.join(reldir, fn)
-# 					modtm = datetime.datetime.fromtimestamp(os.stat(fullPath)[8])
-# 					ret[relativePath] = modtm.strftime(cls.dtFormat)
-					ret[relativePath] = os.stat(fullPath)[8]
+		for reldir, (dirMtime, subdirs, files) in listing.iteritems():
+			for fname, info in files.iteritems():
+				ret[os.path.join(reldir, fname)] = info[0]
 		return ret
 
 
 	@classmethod
-	def diff(cls, source, target):
+	def getHashes(cls, pth, extraTypes=None, restrictTypes=None):
+		"""Returns a dict mapping the relative paths in the manifest for 'pth'
+		to the MD5 digest of each file's contents. Digests are cached, and only
+		recalculated for files whose modification time or size has changed.
+		"""
+		okTypes = cls._getOkTypes(extraTypes, restrictTypes)
+		pth, listing = cls._scan(pth, okTypes)
+		ret = {}
+		for reldir, (dirMtime, subdirs, files) in listing.iteritems():
+			for fname, info in files.iteritems():
+				if info[2] is None:
+					md5 = hashlib.md5()
+					f = open(os.path.join(pth, reldir, fname), "rb")
+					try:
+						for chunk in iter(lambda: f.read(65536), ""):
+							md5.update(chunk)
+					finally:
+						f.close()
+					info[2] = md5.hexdigest()
+				ret[os.path.join(reldir, fname)] = info[2]
+		return ret
+
+
+	@classmethod
+	def diff(cls, source, target, sourceHashes=None, targetHashes=None):
 		"""Returns a dict containing the changes that need to be made to make the target
 		match the source. Files on the source that have been added or modified will be
 		included as usual. Files that have been deleted on the source will also be included,
 		but the timestamp will be empty to indicate that it no longer exists on the source.
+
+		If content hashes (as returned by getHashes()) are passed for both sides, files
+		whose contents are identical are not included, even if their timestamps differ.
 		"""
 		ret = {}
-		# These are copies of the original keys in the target. As keys from the source are
-		# processed, they will be popped from this list. Any leftover keys indicate deleted
-		# files.
-		targetKeys = target.keys()
-		# Iterate through the source. If the key exists in the target, and the source is
-		# newer than the target, add it to the return dict, and then pop the values from both
-		# key lists.
-		for srcKey, srcTimeString in source.items():
-# 			srcTime = datetime.datetime.strptime(srcTimeString, cls.dtFormat)
-			srcTime = int(srcTimeString)
+		if sourceHashes is None or targetHashes is None:
+			sourceHashes = targetHashes = {}
+		# Iterate through the source. If the key doesn't exist in the target, or the
+		# source is newer than the target, add it to the return dict.
+		for srcKey, srcTimeString in source.iteritems():
 			trgTimeString = target.get(srcKey)
 			if trgTimeString is None:
 				# New on the server
-				ret[srcKey] =srcTimeString
-			else:
-# 				trgTime = datetime.datetime.strptime(trgTimeString, cls.dtFormat)
-				trgTime = int(trgTimeString)
-				if (srcTime - trgTime) > 0.5:
+				ret[srcKey] = srcTimeString
+			elif (int(srcTimeString) - int(trgTimeString)) > 0.5:
+				srcHash = sourceHashes.get(srcKey)
+				if (srcHash is None) or (srcHash != targetHashes.get(srcKey)):
 					# It's newer; include it
-					ret[srcKey] =srcTimeString
-				# Pop it from the target keys
-				targetKeys.remove(srcKey)
-		# Ok, we've processed all the source files. Are there any target files remaining?
-		# If so, add them with no time value to indicate that they have been deleted from
-		# the source.
-		for tk in targetKeys:
+					ret[srcKey] = srcTimeString
+		# Any target files not in the source have been deleted from the source; add
+		# them with no time value.
+		for tk in set(target).difference(source):
 			ret[tk] = ""
 		return ret
-
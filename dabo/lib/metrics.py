@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Lightweight counters, timers and histograms for profiling Dabo applications.
+
+The framework reports to this module from its hot paths (event dispatch,
+bizobj requery/save/scan, cursor seek/sort, form updates, grid cell values
+and report bands), but only while collection is enabled:
+
+	from dabo.lib import metrics
+	metrics.enable()
+	...
+	print metrics.toJSON()
+	metrics.reset()
+
+Set dabo.collectMetrics to True to collect metrics from startup.
+
+While disabled, each instrumentation point only checks the module-level
+'enabled' flag, so the overhead is close to nothing. Instrumented code uses
+this pattern, which avoids even calling time.time() when disabled:
+
+	startTime = metrics.enabled and time.time()
+	...
+	if startTime:
+		metrics.addTime("myOperation", startTime)
+
+Timer names are dotted strings such as "biz.requery" or "event.Hit".
+"""
+import bisect
+import functools
+import threading
+import time
+import dabo
+from dabo.lib import jsonEncode
+
+# Checked by all instrumentation points; use enable() and disable() to change it.
+enabled = dabo.collectMetrics
+
+# Upper bounds, in seconds, of the buckets for the timer histograms. A final
+# bucket holds everything slower than the last bound.
+timeBuckets = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+
+
+class _Distribution(object):
+	"""Summary of observed values: count, total, min, max and bucket counts."""
+	__slots__ = ("count", "total", "min", "max", "buckets")
+
+	def __init__(self, numBuckets):
+		self.count = 0
+		self.total = 0.0
+		self.min = None
+		self.max = None
+		self.buckets = [0] * numBuckets
+
+
+	def add(self, val, bounds):
+		self.count += 1
+		self.total += val
+		if self.min is None or val < self.min:
+			self.min = val
+		if self.max is None or val > self.max:
+			self.max = val
+		self.buckets[bisect.bisect_left(bounds, val)] += 1
+
+
+	def toDict(self, bounds):
+		labels = ["<=%s" % bound for bound in bounds] + [">%s" % bounds[-1]]
+		return {"count": self.count, "total": self.total,
+				"mean": self.total / self.count if self.count else 0.0,
+				"min": self.min, "max": self.max,
+				"buckets": dict(zip(labels, self.buckets))}
+
+
+
+class MetricsRegistry(object):
+	"""
+	Holds named counters, timers and histograms. Timers are histograms of
+	durations in seconds using the timeBuckets bounds; other histograms use
+	the bounds passed to setHistogramBuckets(), or timeBuckets by default.
+	"""
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._counters = {}
+		self._timers = {}
+		self._histograms = {}
+		self._histogramBounds = {}
+
+
+	def count(self, name, num=1):
+		"""Adds 'num' to the named counter."""
+		with self._lock:
+			self._counters[name] = self._counters.get(name, 0) + num
+
+
+	def addTime(self, name, startTime, endTime=None):
+		"""Records the time elapsed since 'startTime' for the named timer."""
+		if endTime is None:
+			endTime = time.time()
+		self.addDuration(name, endTime - startTime)
+
+
+	def addDuration(self, name, duration):
+		"""Records a duration in seconds for the named timer."""
+		with self._lock:
+			dist = self._timers.get(name)
+			if dist is None:
+				dist = self._timers[name] = _Distribution(len(timeBuckets) + 1)
+			dist.add(duration, timeBuckets)
+
+
+	def observe(self, name, val):
+		"""Records a value for the named histogram."""
+		with self._lock:
+			bounds = self._histogramBounds.get(name, timeBuckets)
+			dist = self._histograms.get(name)
+			if dist is None:
+				dist = self._histograms[name] = _Distribution(len(bounds) + 1)
+			dist.add(val, bounds)
+
+
+	def setHistogramBuckets(self, name, bounds):
+		"""
+		Sets the ascending bucket upper bounds for the named histogram.
+		Any values already recorded for it are discarded.
+		"""
+		with self._lock:
+			self._histogramBounds[name] = tuple(sorted(bounds))
+			self._histograms.pop(name, None)
+
+
+	def snapshot(self):
+		"""
+		Returns a dict with 'counters', 'timers' and 'histograms' keys. Each
+		timer and histogram is a dict with its 'count', 'total', 'mean', 'min',
+		'max' and 'buckets', which maps each bucket label to its count.
+		"""
+		with self._lock:
+			return {"counters": dict(self._counters),
+					"timers": dict((name, dist.toDict(timeBuckets))
+						for name, dist in self._timers.iteritems()),
+					"histograms": dict((name,
+						dist.toDict(self._histogramBounds.get(name, timeBuckets)))
+						for name, dist in self._histograms.iteritems())}
+
+
+	def reset(self):
+		"""Discards all the recorded values."""
+		with self._lock:
+			self._counters.clear()
+			self._timers.clear()
+			self._histograms.clear()
+
+
+
+class _Timer(object):
+	def __init__(self, name):
+		self.name = name
+		self.startTime = None
+
+	def __enter__(self):
+		if enabled:
+			self.startTime = time.time()
+		return self
+
+	def __exit__(self, excType, excVal, tb):
+		if self.startTime is not None:
+			registry.addTime(self.name, self.startTime)
+			self.startTime = None
+
+
+
+registry = MetricsRegistry()
+
+
+def enable():
+	"""Starts collecting metrics."""
+	global enabled
+	enabled = True
+
+
+def disable():
+	"""Stops collecting metrics. The values recorded so far are kept."""
+	global enabled
+	enabled = False
+
+
+def count(name, num=1):
+	"""Adds 'num' to the named counter, if metrics are enabled."""
+	if enabled:
+		registry.count(name, num)
+
+
+def addTime(name, startTime):
+	"""Records the time elapsed since 'startTime' for the named timer."""
+	registry.addTime(name, startTime)
+
+
+def observe(name, val):
+	"""Records a value for the named histogram, if metrics are enabled."""
+	if enabled:
+		registry.observe(name, val)
+
+
+def timer(name):
+	"""
+	Returns a context manager that records the time spent in its block
+	for the named timer:
+
+		with metrics.timer("myapp.import"):
+			importFiles()
+	"""
+	return _Timer(name)
+
+
+def timed(name):
+	"""
+	Decorator that records the duration of each call for the named timer.
+
+	While metrics are disabled, the wrapper only checks the 'enabled' flag
+	and calls the function. The wrapped function is kept in the wrapper's
+	__wrapped__ attribute, for getting its signature.
+	"""
+	def decorator(func):
+		@functools.wraps(func)
+		def wrapper(*args, **kwargs):
+			if not enabled:
+				return func(*args, **kwargs)
+			startTime = time.time()
+			try:
+				return func(*args, **kwargs)
+			finally:
+				registry.addTime(name, startTime)
+		wrapper.__wrapped__ = func
+		return wrapper
+	return decorator
+
+
+def snapshot():
+	"""Returns the current values; see MetricsRegistry.snapshot()."""
+	return registry.snapshot()
+
+
+def toJSON():
+	"""Returns the current values as a JSON string."""
+	return jsonEncode(registry.snapshot())
+
+
+def reset():
+	"""Discards all the recorded values."""
+	registry.reset()
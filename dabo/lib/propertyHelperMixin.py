@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 import string
-from dabo.dLocalize import _
+from dabo.dLocalize import _, LazyTranslation
 
 
 class PropertyHelperMixin(object):
@@ -333,7 +333,10 @@ class PropertyHelperMixin(object):
 			else:
 				d["writable"] = False
 
-			d["doc"] = propRef.__doc__
+			doc = propRef.__doc__
+			if isinstance(doc, LazyTranslation):
+				doc = unicode(doc)
+			d["doc"] = doc
 			d["type"] = type(propVal)
 			d["definedIn"] = None
 			for o in classRef.__mro__:
@@ -10,6 +10,7 @@ import sys
 import os
 from dabo.dLocalize import _
 from dabo.lib.dates import getStringFromDate
+from dabo.lib import metrics
 
 ######################################################
 # Very first thing: check for required libraries:
@@ -2222,6 +2223,7 @@ class ReportWriter(object):
 				self.Variables[varName] = vv["value"]
 
 
+		@metrics.timed("report.band")
 		def printBand(band, y=None, group=None, deferred=None):
 			"""Generic function for printing any band."""
 			_form = self.ReportForm
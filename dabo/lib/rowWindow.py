@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import itertools
+
+
+
+class ListRowSource(object):
+	"""
+	Paging data source that serves the rows of a list of records (dicts)
+	kept in memory.
+
+	Any object with the same two methods can be used as the data source of a
+	RowWindow or of a grid's VirtualDataSource:
+
+		getRowCount(): Returns the total number of rows.
+		getRows(start, count): Returns a sequence of up to 'count' records,
+			starting with row 'start'. Each record maps field names to values.
+
+	A source backed by a database would run a count query for the first, and
+	a query limited to the requested rows (for example with LIMIT and
+	OFFSET) for the second.
+	"""
+	def __init__(self, records):
+		self.records = records
+
+
+	def getRowCount(self):
+		return len(self.records)
+
+
+	def getRows(self, start, count):
+		return self.records[start:start + count]
+
+
+
+class RowWindow(object):
+	"""
+	Keeps the rows of a paging data source that are in use, for displaying a
+	large number of rows without loading all of them.
+
+	Rows are fetched in pages of 'pageSize' rows. When a row that isn't
+	loaded is requested, the pages covering it and 'prefetch' rows on each
+	side of it are scheduled for loading, and the caller gets a placeholder
+	value until they arrive. At most 'maxPages' pages are kept; the ones
+	used the longest time ago are dropped first, so that memory use depends
+	on the size of the viewport and not on the number of rows. By default,
+	twice the number of pages needed for one row and its prefetched rows
+	are kept, and at least 10.
+
+	'loader' is called with a function without arguments that loads the
+	pending pages; it can defer the call, for example until the current paint
+	is done. By default, the pages are loaded right away. 'onLoaded' is called
+	with the first and last row number of every range of rows that has been
+	loaded.
+	"""
+	def __init__(self, source, pageSize=100, prefetch=50, maxPages=None, loader=None,
+			onLoaded=None):
+		self.source = source
+		self.pageSize = pageSize
+		self.prefetch = prefetch
+		self.maxPages = maxPages
+		self.loader = loader
+		self.onLoaded = onLoaded
+		self._clock = itertools.count()
+		self.invalidate()
+
+
+	def invalidate(self):
+		"""Drop all the loaded rows, and get the number of rows from the source again."""
+		# Page number: list of records
+		self._pages = {}
+		# Page number: value of self._clock when the page was last used
+		self._used = {}
+		self._pending = set()
+		self._loadScheduled = False
+		self._rowCount = None
+
+
+	def _getRowCount(self):
+		if self._rowCount is None:
+			self._rowCount = self.source.getRowCount()
+		return self._rowCount
+
+
+	def _getLoadedRowCount(self):
+		return sum([len(page) for page in self._pages.itervalues()])
+
+
+	def getRecord(self, row):
+		"""
+		Return the record of the row, or None if it isn't loaded yet. In that
+		case, the row is scheduled for loading.
+		"""
+		pageSize = self.pageSize
+		pageNum = row // pageSize
+		page = self._pages.get(pageNum)
+		if page is None:
+			self.requestRows(row - self.prefetch, row + self.prefetch)
+			page = self._pages.get(pageNum)
+			if page is None:
+				return None
+		self._used[pageNum] = self._clock.next()
+		try:
+			return page[row - pageNum * pageSize]
+		except IndexError:
+			return None
+
+
+	def getValue(self, row, field, default=None):
+		"""
+		Return the value of the field in the row. If the row isn't loaded yet,
+		it is scheduled for loading and 'default' is returned.
+		"""
+		rec = self.getRecord(row)
+		if rec is None:
+			return default
+		return rec.get(field, default)
+
+
+	def getLoadedRows(self):
+		"""
+		Return the sorted list of the numbers of the rows that are loaded. No
+		rows are scheduled for loading.
+		"""
+		ret = []
+		pageSize = self.pageSize
+		for pageNum in sorted(self._pages):
+			start = pageNum * pageSize
+			ret.extend(xrange(start, start + len(self._pages[pageNum])))
+		return ret
+
+
+	def requestRows(self, first, last):
+		"""Schedule the pages covering the rows from 'first' to 'last' for loading."""
+		first = max(first, 0)
+		last = min(last, self.RowCount - 1)
+		if last < first:
+			return
+		pages = self._pages
+		for pageNum in xrange(first // self.pageSize, last // self.pageSize + 1):
+			if pageNum not in pages:
+				self._pending.add(pageNum)
+		if self._pending and not self._loadScheduled:
+			self._loadScheduled = True
+			if self.loader is None:
+				self.loadPending()
+			else:
+				self.loader(self.loadPending)
+
+
+	def loadPending(self):
+		"""Load the pages that have been requested, with one call per range of pages."""
+		self._loadScheduled = False
+		pending = sorted(self._pending)
+		self._pending.clear()
+		pageSize = self.pageSize
+		# Group consecutive pages.
+		ranges = []
+		for pageNum in pending:
+			if ranges and ranges[-1][1] == pageNum - 1:
+				ranges[-1][1] = pageNum
+			else:
+				ranges.append([pageNum, pageNum])
+		for firstPage, lastPage in ranges:
+			start = firstPage * pageSize
+			rows = list(self.source.getRows(start, (lastPage - firstPage + 1) * pageSize))
+			for pageNum in xrange(firstPage, lastPage + 1):
+				offset = (pageNum - firstPage) * pageSize
+				self._pages[pageNum] = rows[offset:offset + pageSize]
+				self._used[pageNum] = self._clock.next()
+			self._evict()
+			if self.onLoaded is not None and rows:
+				self.onLoaded(start, start + len(rows) - 1)
+
+
+	def _evict(self):
+		"""Drop the pages used the longest time ago while there are more than maxPages."""
+		maxPages = self.maxPages
+		if maxPages is None:
+			maxPages = max(10, 2 * (2 * self.prefetch // self.pageSize + 2))
+		excess = len(self._pages) - maxPages
+		if excess <= 0:
+			return
+		used = self._used
+		for pageNum in sorted(self._pages, key=used.get)[:excess]:
+			del self._pages[pageNum]
+			del used[pageNum]
+
+
+	LoadedRowCount = property(_getLoadedRowCount, None, None,
+			"Number of rows currently held in memory.  (int)")
+
+	RowCount = property(_getRowCount, None, None,
+			"Total number of rows in the data source.  (int)")
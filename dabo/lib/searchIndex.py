@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import bisect
+import datetime
+import sys
+from dabo.lib.utils import ustr
+
+_maxChar = unichr(sys.maxunicode)
+
+
+class SearchIndex(object):
+	"""
+	Sorted index of the values of a column, used by the grid's incremental
+	search. It is built once from a sequence of (value, row) pairs, and
+	answers prefix and nearest-value lookups with a binary search instead of
+	scanning all the rows.
+
+	String values are compared as unicode and matched by prefix,
+	case-insensitively unless 'caseSensitive' is True. Dates and times are
+	matched by the prefix of their string representation, and other values by
+	equality, after converting the search string to their type. None values
+	never match.
+	"""
+	def __init__(self, values, caseSensitive=False):
+		self.caseSensitive = caseSensitive
+		values = [(val, row) for val, row in values if val is not None]
+		# The type of the first value determines how the column is searched.
+		first = values[0][0] if values else None
+		self._type = type(first)
+		self.compString = True
+		if first is None or isinstance(first, basestring):
+			values = [(ustr(val), row) for val, row in values if isinstance(val, basestring)]
+		elif isinstance(first, (datetime.datetime, datetime.date, datetime.time)):
+			values = [(ustr(val), row) for val, row in values]
+		else:
+			self.compString = False
+		if self.compString and not caseSensitive:
+			values = [(val.lower(), row) for val, row in values]
+		values.sort()
+		self._keys = [val for val, row in values]
+		self._rows = [row for val, row in values]
+
+
+	def __len__(self):
+		return len(self._keys)
+
+
+	def _convert(self, srchVal):
+		"""Convert the search string to the type of the indexed values."""
+		if self.compString:
+			srchVal = ustr(srchVal)
+			if not self.caseSensitive:
+				srchVal = srchVal.lower()
+			return srchVal
+		typ = self._type
+		if typ in (int, long, float):
+			try:
+				return typ(srchVal)
+			except ValueError:
+				return typ(0)
+		return srchVal
+
+
+	def find(self, srchVal, near=False):
+		"""
+		Return the row number of the first row whose value starts with (for
+		strings) or equals 'srchVal'. When there isn't any and 'near' is True,
+		the row with the next greater value is returned, or the row with the
+		greatest value if all are smaller. Otherwise, None is returned.
+		"""
+		keys = self._keys
+		if not keys:
+			return None
+		srchVal = self._convert(srchVal)
+		pos = bisect.bisect_left(keys, srchVal)
+		end = pos
+		if self.compString:
+			# All values starting with srchVal sort before srchVal followed by the
+			# highest character.
+			end = bisect.bisect_left(keys, srchVal + _maxChar, pos)
+		elif pos < len(keys) and keys[pos] == srchVal:
+			# The rows are sorted within equal values, so the first is the lowest.
+			end = pos + 1
+		if end > pos:
+			# Of all the matching values, use the one in the topmost row.
+			return min(self._rows[pos:end])
+		if near:
+			return self._rows[min(pos, len(keys) - 1)]
+		return None
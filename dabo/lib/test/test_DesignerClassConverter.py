@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import unittest
+import tempfile
+import shutil
+import os
+import dabo
+from dabo.lib.DesignerClassConverter import DesignerClassConverter
+
+
+class CountingConverter(DesignerClassConverter):
+	"""Generates a trivial class, and counts how many times it was generated."""
+	builds = 0
+
+	def createClassText(self, dct, addImports=True, specList=[]):
+		CountingConverter.builds += 1
+		self.mainClassName = "GeneratedClass"
+		self.classText = "class GeneratedClass(object):\n\tcaption = %r\n" % (
+				dct.get("attributes", {}).get("Caption"),)
+
+
+
+class Test_ClassCache(unittest.TestCase):
+	def setUp(self):
+		self._saveCacheDir = DesignerClassConverter.cacheDir
+		self._saveCacheSetting = dabo.cacheDesignerClasses
+		self.tempDir = tempfile.mkdtemp()
+		DesignerClassConverter.cacheDir = os.path.join(self.tempDir, "cache")
+		dabo.cacheDesignerClasses = True
+		CountingConverter.builds = 0
+		self.basePath = os.path.join(self.tempDir, "base.cdxml")
+		self.formPath = os.path.join(self.tempDir, "form.cdxml")
+		self.write(self.basePath, '<dForm classID="2" Caption="Base" />')
+		self.write(self.formPath, '<dForm classID="1" designerClass="%s" Caption="Form" />'
+				% self.basePath)
+
+	def tearDown(self):
+		DesignerClassConverter.cacheDir = self._saveCacheDir
+		dabo.cacheDesignerClasses = self._saveCacheSetting
+		shutil.rmtree(self.tempDir)
+
+	def write(self, pth, text):
+		open(pth, "w").write(text)
+
+	def load(self):
+		return CountingConverter().classFromText(self.formPath)
+
+	def test_cacheHit(self):
+		cls = self.load()
+		self.assertEqual(cls.caption, "Form")
+		self.assertEqual(CountingConverter.builds, 1)
+		cls = self.load()
+		self.assertEqual(cls.caption, "Form")
+		self.assertEqual(CountingConverter.builds, 1)
+
+	def test_sourceChanged(self):
+		self.load()
+		self.write(self.formPath, '<dForm classID="1" designerClass="%s" Caption="Changed" />'
+				% self.basePath)
+		cls = self.load()
+		self.assertEqual(cls.caption, "Changed")
+		self.assertEqual(CountingConverter.builds, 2)
+
+	def test_inheritedClassChanged(self):
+		self.load()
+		self.write(self.basePath, '<dForm classID="2" Caption="Base" Width="200" />')
+		self.load()
+		self.assertEqual(CountingConverter.builds, 2)
+		self.load()
+		self.assertEqual(CountingConverter.builds, 2)
+
+	def test_codeFileAdded(self):
+		self.load()
+		self.write(os.path.join(self.tempDir, "base-code.py"),
+				"## *!* ## Dabo Code ID: dForm-dForm\ndef afterInit(self):\n\tpass\n")
+		self.load()
+		self.assertEqual(CountingConverter.builds, 2)
+
+	def test_cacheDisabled(self):
+		dabo.cacheDesignerClasses = False
+		self.load()
+		self.load()
+		self.assertEqual(CountingConverter.builds, 2)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import unittest
+import tempfile
+import shutil
+import os
+import time
+import dabo
+import dabo.db
+import dabo.biz
+from dabo.lib import cacheStore
+
+
+class Test_CacheStore(object):
+	def test_putGet(self):
+		store = self.store
+		self.assertEqual(store.get("abc", None), None)
+		store.put("abc", None, [1, 2, 3])
+		store.put("abc", 42, {"x": u"y"})
+		store.put("def", None, "other")
+		self.assertEqual(store.get("abc", None), [1, 2, 3])
+		self.assertEqual(store.get("abc", 42), {"x": u"y"})
+		self.assertEqual(store.getAll("abc"), {None: [1, 2, 3], 42: {"x": u"y"}})
+		store.put("abc", 42, "replaced")
+		self.assertEqual(store.get("abc", 42), "replaced")
+		store.delete("abc", 42)
+		self.assertEqual(store.getAll("abc"), {None: [1, 2, 3]})
+		store.delete("abc")
+		self.assertEqual(store.getAll("abc"), {})
+		self.assertEqual(store.get("def", None), "other")
+
+	def test_equalKeys(self):
+		store = self.store
+		store.put("abc", "a", 1)
+		self.assertEqual(store.get("abc", u"a"), 1)
+		store.put("abc", u"a", 2)
+		store.put("abc", (1, "x"), 3)
+		self.assertEqual(store.get("abc", (1L, u"x")), 3)
+		self.assertEqual(store.getAll("abc"), {"a": 2, (1, "x"): 3})
+		store.delete("abc", u"a")
+		self.assertEqual(store.get("abc", "a"), None)
+
+	def test_evictTTL(self):
+		store = self.store
+		store.ttl = 100
+		store.put("old", None, 1)
+		store.put("new", None, 2)
+		store.evict(time.time() + 50)
+		self.assertEqual(store.get("old", None), 1)
+		store.evict(time.time() + 150)
+		self.assertEqual(store.get("old", None), None)
+		self.assertEqual(store.get("new", None), None)
+
+	def test_evictSize(self):
+		store = self.store
+		store.ttl = None
+		for num in range(5):
+			store.put("h%s" % num, None, os.urandom(1000))
+			time.sleep(0.01)
+		# Using an entry makes it the most recently used.
+		store.get("h0", None)
+		store.maxSize = 2500
+		store.evict()
+		kept = [num for num in range(5) if store.get("h%s" % num, None) is not None]
+		self.assertEqual(kept, [0, 4])
+
+
+
+class Test_MemoryCacheStore(Test_CacheStore, unittest.TestCase):
+	def setUp(self):
+		self.store = cacheStore.MemoryCacheStore()
+
+
+
+class Test_SQLiteCacheStore(Test_CacheStore, unittest.TestCase):
+	def setUp(self):
+		self.tempDir = tempfile.mkdtemp()
+		self.store = cacheStore.SQLiteCacheStore(os.path.join(self.tempDir, "cache.db"))
+
+	def tearDown(self):
+		self.store = None
+		shutil.rmtree(self.tempDir)
+
+
+
+class ServerBiz(dabo.biz.RemoteBizobj):
+	connection = None
+
+	def defineConnection(self):
+		self.setConnection(self.connection)
+
+
+
+class Test_RemoteBizobjCache(unittest.TestCase):
+	def setUp(self):
+		con = ServerBiz.connection = dabo.db.dConnection(DbType="SQLite", Database=":memory:")
+		con.getDaboCursor().executescript("""
+create table child (pk INTEGER PRIMARY KEY AUTOINCREMENT, parent_fk INT, cInvNum CHAR);
+insert into child (parent_fk, cInvNum) values (1, "IN00023");
+insert into child (parent_fk, cInvNum) values (1, "IN00455");
+insert into child (parent_fk, cInvNum) values (3, "IN00024");
+""")
+		ServerBiz.cacheDir = None
+		ServerBiz.cacheStore = cacheStore.MemoryCacheStore()
+
+	def tearDown(self):
+		ServerBiz.connection = ServerBiz.cacheDir = ServerBiz.cacheStore = None
+
+	def test_partialLoad(self):
+		biz = ServerBiz.load("hash1", "child")
+		biz.KeyField = "pk"
+		for fk in (1, 3):
+			biz._CurrentCursor = fk
+			biz.UserSQL = "select * from child where parent_fk = %s" % fk
+			biz.requery()
+		biz.storeToCache("hash1")
+		full = ServerBiz.load("hash1", "child")
+		self.assertEqual(sorted(full._cursorDictReference().keys()), [None, 1, 3])
+		part = ServerBiz.load("hash1", "child", cursorKey=1)
+		self.assertEqual(part._CurrentCursorKey, 1)
+		self.assertFalse(3 in part._cursorDictReference())
+		self.assertEqual(part.KeyField, "pk")
+		self.assertEqual(part.RowCount, 2)
+		self.assertEqual(part.getFieldVal("cInvNum", 1), "IN00455")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import unittest
+from dabo.lib.cellCache import BoundedCache, CellCache
+
+
+class Test_CellCache(unittest.TestCase):
+	def test_eviction(self):
+		cache = CellCache(maxSize=4)
+		cache.set(0, 0, "a")
+		cache.set(0, 1, "b")
+		cache.set(1, 0, None)
+		self.assertEqual(len(cache), 3)
+		# Using (0, 0) keeps it; (0, 1) is dropped when the generation is full.
+		self.assertEqual(cache.get(0, 0), "a")
+		self.assertEqual(cache.get(1, 0, "missing"), None)
+		cache.set(1, 1, "d")
+		cache.set(2, 0, "e")
+		self.assertTrue(len(cache) <= 4)
+		self.assertEqual(cache.get(0, 1, "missing"), "missing")
+		self.assertEqual(cache.get(2, 0), "e")
+		for row in range(100):
+			cache.set(row, 5, row)
+			self.assertTrue(len(cache) <= 4)
+		self.assertEqual(cache.get(99, 5), 99)
+		cache.maxSize = 2
+		self.assertTrue(len(cache) <= 2)
+		self.assertEqual(cache.get(99, 5), 99)
+
+	def test_invalidate(self):
+		cache = CellCache()
+		for row in range(5):
+			for col in range(3):
+				cache.set(row, col, (row, col))
+		cache.invalidate(row=2)
+		self.assertEqual(len(cache), 12)
+		self.assertFalse((2, 1) in cache)
+		cache.invalidate(col=1)
+		self.assertEqual(len(cache), 8)
+		self.assertFalse((0, 1) in cache)
+		cache.invalidate(3, 2)
+		self.assertFalse((3, 2) in cache)
+		self.assertTrue((3, 0) in cache)
+		cache.clear()
+		self.assertEqual(len(cache), 0)
+
+	def test_unbounded(self):
+		cache = CellCache(maxSize=None)
+		for row in range(20000):
+			cache.set(row, 0, row)
+		self.assertEqual(len(cache), 20000)
+
+
+
+class Test_BoundedCache(unittest.TestCase):
+	def test_keys(self):
+		cache = BoundedCache(maxSize=4)
+		cache.set(("font", "a"), 1)
+		cache.set(("font", "b"), 2)
+		self.assertEqual(cache.get(("font", "a")), 1)
+		self.assertEqual(cache.get(("font", "c"), "missing"), "missing")
+		for num in range(100):
+			cache.set(num, num)
+			self.assertTrue(len(cache) <= 4)
+		self.assertEqual(cache.get(99), 99)
+		cache.clear()
+		self.assertEqual(len(cache), 0)
+
+	def test_unbounded(self):
+		cache = BoundedCache(maxSize=4)
+		cache.maxSize = None
+		for num in range(1000):
+			cache.set(num, num)
+		self.assertEqual(len(cache), 1000)
+		cache.maxSize = 10
+		self.assertTrue(len(cache) <= 10)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import unittest
+import dabo
+from dabo.lib.columnSizing import sampleRows, widestText
+
+
+class Test_columnSizing(unittest.TestCase):
+	def test_sampleRows(self):
+		self.assertEqual(sampleRows(5, 200), [0, 1, 2, 3, 4])
+		rows = sampleRows(100000, 200, seed=3)
+		self.assertEqual(len(rows), 200)
+		self.assertEqual(len(set(rows)), 200)
+		self.assertEqual(rows, sorted(rows))
+		self.assertEqual(rows[:50], range(50))
+		self.assertEqual(rows[-50:], range(99950, 100000))
+		self.assertEqual(rows, sampleRows(100000, 200, seed=3))
+
+	def test_widestText(self):
+		measured = []
+		def measure(lines):
+			measured.extend(lines)
+			return [len(line) * 7 for line in lines]
+		texts = ["a", "", None, "abc", "abc", "ab\nabcdefg", "abcd"]
+		self.assertEqual(widestText(texts, measure), 49)
+		self.assertEqual(sorted(measured), ["a", "ab", "abc", "abcd", "abcdefg"])
+		del measured[:]
+		self.assertEqual(widestText(texts, measure, count=2), 49)
+		self.assertEqual(measured, ["abcdefg", "abcd"])
+		self.assertEqual(widestText([None, ""], measure), 0)
+
+
+if __name__ == "__main__":
+	unittest.main()
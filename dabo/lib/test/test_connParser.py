@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import shutil
+import tempfile
+import time
+import dabo
+from dabo.dApp import dApp
+from dabo.lib import connParser
+
+
+def writeConnFile(pth, names):
+	cxns = [{"dbtype": "SQLite", "name": name, "host": "", "database": ":memory:",
+			"user": "", "password": "", "port": ""} for name in names]
+	open(pth, "w").write(connParser.createXML(cxns, encoding="utf-8"))
+
+
+class Test_ConnectionNameCache(unittest.TestCase):
+	def setUp(self):
+		self.tempDir = tempfile.mkdtemp()
+		self.cacheFile = os.path.join(self.tempDir, "names.json")
+		self.connFile = os.path.join(self.tempDir, "conn.cnxml")
+		writeConnFile(self.connFile, ["one", "two"])
+
+	def tearDown(self):
+		shutil.rmtree(self.tempDir)
+
+	def createApp(self):
+		app = dApp()
+		app._getConnectionNameCache = lambda: connParser.ConnectionNameCache(self.cacheFile)
+		return app
+
+	def test_cache(self):
+		cache = connParser.ConnectionNameCache(self.cacheFile)
+		self.assertEqual(cache.getNames(self.connFile), None)
+		cache.setNames(self.connFile, ["two", "one"])
+		cache.save()
+		cache = connParser.ConnectionNameCache(self.cacheFile)
+		self.assertEqual(cache.getNames(self.connFile), ["one", "two"])
+		# A changed file is no longer cached.
+		writeConnFile(self.connFile, ["one", "two", "three"])
+		self.assertEqual(cache.getNames(self.connFile), None)
+
+	def test_lazyLoading(self):
+		app = self.createApp()
+		app._initDB(self.tempDir)
+		self.assertEqual(sorted(app.dbConnectionDefs), ["one", "two"])
+		# The second time, the unchanged file isn't parsed.
+		app = self.createApp()
+		parsed = []
+		getConnectionsFromFile = app.getConnectionsFromFile
+		def trackParsing(pth):
+			parsed.append(pth)
+			return getConnectionsFromFile(pth)
+		app.getConnectionsFromFile = trackParsing
+		app._initDB(self.tempDir)
+		self.assertEqual(parsed, [])
+		self.assertEqual(app.dbConnectionDefs, {})
+		self.assertEqual(sorted(app.getConnectionNames()), ["one", "two"])
+		con = app.getConnectionByName("two")
+		self.assertEqual(con.ConnectInfo.Name, "two")
+		self.assertEqual(parsed, [self.connFile])
+		self.assertEqual(sorted(app.dbConnectionDefs), ["one", "two"])
+		# Changed files are parsed again.
+		time.sleep(0.01)
+		writeConnFile(self.connFile, ["three"])
+		app = self.createApp()
+		app._initDB(self.tempDir)
+		self.assertEqual(sorted(app.dbConnectionDefs), ["three"])
+
+
+if __name__ == "__main__":
+	unittest.main()
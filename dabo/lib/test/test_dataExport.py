@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import unittest
+import json
+from cStringIO import StringIO
+from xml.dom import minidom
+import dabo
+import dabo.db
+import dabo.biz
+from dabo.lib import dataExport
+
+
+class Test_dataExport(unittest.TestCase):
+	def setUp(self):
+		self.con = dabo.db.dConnection(DbType="SQLite", Database=":memory:")
+		biz = self.biz = dabo.biz.dBizobj(self.con)
+		biz._CurrentCursor.executescript("""
+create table parent (pk INTEGER PRIMARY KEY AUTOINCREMENT, cField CHAR, iField INT);
+insert into parent (cField, iField) values ("Paul Keith McNett", 23);
+insert into parent (cField, iField) values ("Edward, ""Ed"" Leafe", 42);
+insert into parent (cField, iField) values ("<Carl> & Karsten", 10223);
+
+create table child (pk INTEGER PRIMARY KEY AUTOINCREMENT, parent_fk INT, cInvNum CHAR);
+insert into child (parent_fk, cInvNum) values (1, "IN00023");
+insert into child (parent_fk, cInvNum) values (1, "IN00455");
+insert into child (parent_fk, cInvNum) values (3, "IN00024");
+""")
+		biz.KeyField = "pk"
+		biz.DataSource = "parent"
+		child = self.child = dabo.biz.dBizobj(self.con)
+		child.KeyField = "pk"
+		child.DataSource = "child"
+		child.LinkField = "parent_fk"
+		biz.addChild(child)
+		biz.requery()
+
+	def tearDown(self):
+		self.biz = self.child = None
+
+	def test_writeCSV(self):
+		out = StringIO()
+		dataExport.writeCSV(self.biz._CurrentCursor, out, fields=("pk", "cField"))
+		lines = out.getvalue().splitlines()
+		self.assertEqual(len(lines), 4)
+		self.assertEqual(lines[0], "pk,cField")
+		self.assertEqual(lines[1], "1,Paul Keith McNett")
+		self.assertEqual(lines[2], '2,"Edward, ""Ed"" Leafe"')
+
+	def test_writeCSVNoRecords(self):
+		self.biz.setWhereClause("pk < 0")
+		self.biz.requery()
+		out = StringIO()
+		dataExport.writeCSV(self.biz, out, fields=("pk", "cField"))
+		self.assertEqual(out.getvalue().splitlines(), ["pk,cField"])
+
+	def test_writeJSONLines(self):
+		biz = self.biz
+		biz.RowNumber = 1
+		out = StringIO()
+		dataExport.writeJSONLines(biz, out, children=True)
+		recs = [json.loads(ln) for ln in out.getvalue().splitlines()]
+		self.assertEqual([rec["iField"] for rec in recs], [23, 42, 10223])
+		self.assertEqual([len(rec["children"]["child"]) for rec in recs], [2, 0, 1])
+		self.assertEqual(recs[0]["children"]["child"][1]["cInvNum"], "IN00455")
+		# The record pointer is restored after the export.
+		self.assertEqual(biz.RowNumber, 1)
+		self.assertEqual(self.child.RowCount, 0)
+
+	def test_writeXML(self):
+		out = StringIO()
+		dataExport.writeXML(self.biz._CurrentCursor, out)
+		# Same layout as cursorToXML(), minus the cursor's internal flag fields.
+		expected = [ln for ln in self.biz._CurrentCursor.cursorToXML().splitlines()
+				if ln and "dabo-" not in ln]
+		self.assertEqual(out.getvalue().splitlines(), expected)
+		out = StringIO()
+		dataExport.writeXML(self.biz, out, children=True)
+		dom = minidom.parseString(out.getvalue())
+		rows = dom.getElementsByTagName("cursor")[0].childNodes
+		rows = [node for node in rows if node.nodeType == node.ELEMENT_NODE]
+		self.assertEqual(len(rows), 3)
+		cols = dict((col.getAttribute("name"), col.firstChild.data)
+				for col in rows[2].getElementsByTagName("column")[:3])
+		self.assertEqual(cols["cField"], "<Carl> & Karsten")
+		self.assertEqual(len(rows[0].getElementsByTagName("row")), 2)
+		self.assertEqual(len(rows[1].getElementsByTagName("row")), 0)
+
+
+if __name__ == "__main__":
+	unittest.main()
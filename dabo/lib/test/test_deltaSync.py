@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import unittest
+import tempfile
+import shutil
+import dabo
+import dabo.db
+import dabo.biz
+from dabo.lib import deltaSync
+from dabo.lib.RemoteConnector import RemoteConnector
+
+
+class ServerBiz(dabo.biz.RemoteBizobj):
+	connection = None
+
+	def defineConnection(self):
+		self.setConnection(self.connection)
+
+
+
+class Test_deltaSync(unittest.TestCase):
+	def setUp(self):
+		self.cacheDir = tempfile.mkdtemp()
+		serverCon = dabo.db.dConnection(DbType="SQLite", Database=":memory:")
+		self.serverCursor = serverCon.getDaboCursor()
+		self.serverCursor.executescript("""
+create table parent (pk INTEGER PRIMARY KEY AUTOINCREMENT, cField CHAR, iField INT);
+insert into parent (cField, iField) values ("Paul Keith McNett", 23);
+insert into parent (cField, iField) values ("Edward Leafe", 42);
+insert into parent (cField, iField) values ("Carl Karsten", 10223);
+""")
+		ServerBiz.connection = serverCon
+		ServerBiz.cacheDir = ServerBiz.cacheStore = None
+		clientCon = dabo.db.dConnection(DbType="SQLite", Database=":memory:")
+		biz = self.biz = dabo.biz.dBizobj(clientCon)
+		biz.KeyField = "pk"
+		biz.DataSource = "parent"
+		self.server = deltaSync.LocalSyncServer({"parent": ServerBiz}, self.cacheDir)
+		rc = self.connector = RemoteConnector(biz)
+		rc._baseURL = "http://localhost"
+		rc._urlOpener = self.server
+
+	def tearDown(self):
+		ServerBiz.connection = ServerBiz.cacheDir = ServerBiz.cacheStore = None
+		self.biz = self.connector = self.server = None
+		shutil.rmtree(self.cacheDir)
+
+	def serverExec(self, sql):
+		self.serverCursor.execute(sql)
+		self.serverCursor.commitTransaction()
+
+	def test_frames(self):
+		frame = deltaSync.encodeFrame(deltaSync.FRAME_DELTA, {"a": [1, 2]})
+		self.assertTrue(deltaSync.isFrame(frame))
+		self.assertFalse(deltaSync.isFrame('["json"]'))
+		self.assertEqual(deltaSync.decodeFrame(frame), (deltaSync.FRAME_DELTA, {"a": [1, 2]}))
+
+	def test_computeAndApplyDelta(self):
+		old = [{"pk": 1, "c": u"a"}, {"pk": 2, "c": u"b"}, {"pk": 3, "c": u"c"}]
+		new = [{"pk": 3, "c": u"c"}, {"pk": 1, "c": u"A"}, {"pk": 4, "c": u"d"}]
+		snapshot = deltaSync.makeSnapshot(old, "pk")
+		newSnapshot, payload = deltaSync.computeDelta(snapshot, new, "pk")
+		self.assertEqual(newSnapshot, deltaSync.makeSnapshot(new, "pk"))
+		self.assertEqual(payload["inserted"], [{"pk": 4, "c": u"d"}])
+		self.assertEqual(payload["updated"], [{"pk": 1, "c": u"A"}])
+		self.assertEqual(payload["deleted"], [2])
+		self.assertEqual(payload["order"], [3, 1, 4])
+		self.assertEqual(list(deltaSync.applyDelta(old, "pk", payload)), new)
+		# Without a reordering, a client holding an extra row can't use the delta.
+		snapshot, payload = deltaSync.computeDelta(newSnapshot, new[:2], "pk")
+		self.assertEqual(payload["order"], None)
+		self.assertEqual(list(deltaSync.applyDelta(new, "pk", payload)), new[:2])
+		self.assertRaises(ValueError, deltaSync.applyDelta,
+				new + [{"pk": 9, "c": u"x"}], "pk", payload)
+
+	def test_requery(self):
+		biz = self.biz
+		rc = self.connector
+		rc.requery()
+		self.assertEqual(self.server.lastFrameKind, deltaSync.FRAME_FULL)
+		self.assertEqual(biz.RowCount, 3)
+		fullSize = self.server.lastFrameSize
+		# Nothing changed: an empty delta.
+		rc.requery()
+		self.assertEqual(self.server.lastFrameKind, deltaSync.FRAME_DELTA)
+		self.assertEqual(biz.RowCount, 3)
+		self.serverExec("update parent set iField = 99 where pk = 2")
+		self.serverExec("delete from parent where pk = 1")
+		self.serverExec("insert into parent (cField, iField) values ('Nate', 7)")
+		rc.requery()
+		self.assertEqual(self.server.lastFrameKind, deltaSync.FRAME_DELTA)
+		self.assertTrue(self.server.lastFrameSize < fullSize)
+		self.assertEqual([rec["pk"] for rec in biz.getDataSet()], [2, 3, 4])
+		self.assertEqual(biz.getFieldVal("iField", 0), 99)
+		self.assertEqual(biz.getFieldVal("cField", 2), "Nate")
+		# A client that lost its data gets the full set again.
+		rc._syncVersion = None
+		rc.requery()
+		self.assertEqual(self.server.lastFrameKind, deltaSync.FRAME_FULL)
+		self.assertEqual(biz.RowCount, 3)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import unittest
+import tempfile
+import shutil
+import os
+import time
+import hashlib
+import dabo
+from dabo.lib.manifest import Manifest
+
+
+class Test_Manifest(unittest.TestCase):
+	def setUp(self):
+		self.tempDir = tempfile.mkdtemp()
+		os.makedirs(os.path.join(self.tempDir, "a", "b"))
+		self.writeFile("main.py", "print 1")
+		self.writeFile(os.path.join("a", "form.cdxml"), "<form />")
+		self.writeFile(os.path.join("a", "b", "notes.txt"), "notes")
+		self.writeFile(os.path.join("a", "ignored.pyc"), "xx")
+		Manifest.clearCache()
+
+	def tearDown(self):
+		Manifest.clearCache()
+		shutil.rmtree(self.tempDir)
+
+	def writeFile(self, relpath, content, tm=None):
+		pth = os.path.join(self.tempDir, relpath)
+		f = open(pth, "w")
+		f.write(content)
+		f.close()
+		if tm is not None:
+			os.utime(pth, (tm, tm))
+
+	def test_getManifest(self):
+		mf = Manifest.getManifest(self.tempDir)
+		self.assertEqual(sorted(mf.keys()), ["a/b/notes.txt", "a/form.cdxml", "main.py"])
+		self.assertEqual(mf["main.py"], int(os.stat(os.path.join(self.tempDir, "main.py")).st_mtime))
+		# A new file changes its directory's mtime, so the cached scan sees it.
+		self.writeFile(os.path.join("a", "b", "added.py"), "pass")
+		os.utime(os.path.join(self.tempDir, "a", "b"), (time.time() + 5, time.time() + 5))
+		mf = Manifest.getManifest(self.tempDir)
+		self.assertTrue("a/b/added.py" in mf)
+		self.assertEqual(Manifest.getManifest(self.tempDir, useCache=False), mf)
+
+	def test_diff(self):
+		source = {"same.py": 100, "newer.py": 200, "added.py": 300}
+		target = {"same.py": 100, "newer.py": 150, "deleted.py": 100}
+		self.assertEqual(Manifest.diff(source, target),
+				{"newer.py": 200, "added.py": 300, "deleted.py": ""})
+		# Identical contents aren't sent just because the timestamp changed.
+		hashes = {"same.py": "1", "newer.py": "2", "added.py": "3"}
+		self.assertEqual(Manifest.diff(source, target, hashes, {"newer.py": "2"}),
+				{"added.py": 300, "deleted.py": ""})
+
+	def test_getHashes(self):
+		hashes = Manifest.getHashes(self.tempDir)
+		self.assertEqual(hashes["main.py"], hashlib.md5("print 1").hexdigest())
+		# Rewriting in place with a new time and size updates the hash.
+		self.writeFile("main.py", "print 22", tm=time.time() + 10)
+		Manifest.clearCache()
+		self.assertNotEqual(Manifest.getHashes(self.tempDir)["main.py"], hashes["main.py"])
+
+
+if __name__ == "__main__":
+	unittest.main()
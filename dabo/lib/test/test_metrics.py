@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import unittest
+import inspect
+import time
+import dabo
+import dabo.db
+import dabo.biz
+import dabo.dEvents as dEvents
+from dabo.dObject import dObject
+from dabo.lib import metrics
+from dabo.lib import jsonDecode
+
+
+class Test_Metrics(unittest.TestCase):
+	def setUp(self):
+		metrics.reset()
+		metrics.enable()
+
+	def tearDown(self):
+		metrics.disable()
+		metrics.reset()
+
+	def test_registry(self):
+		metrics.count("things")
+		metrics.count("things", 2)
+		metrics.registry.addDuration("work", 0.002)
+		metrics.registry.addDuration("work", 0.2)
+		with metrics.timer("block"):
+			pass
+		metrics.registry.setHistogramBuckets("sizes", (10, 100))
+		for val in (5, 50, 500):
+			metrics.observe("sizes", val)
+		snap = metrics.snapshot()
+		self.assertEqual(snap["counters"], {"things": 3})
+		work = snap["timers"]["work"]
+		self.assertEqual(work["count"], 2)
+		self.assertAlmostEqual(work["mean"], 0.101)
+		self.assertAlmostEqual(work["max"], 0.2)
+		self.assertEqual(work["buckets"]["<=0.005"], 1)
+		self.assertEqual(work["buckets"]["<=0.5"], 1)
+		self.assertEqual(snap["timers"]["block"]["count"], 1)
+		self.assertEqual(snap["histograms"]["sizes"]["buckets"],
+				{"<=10": 1, "<=100": 1, ">100": 1})
+		self.assertEqual(jsonDecode(metrics.toJSON())["counters"], {"things": 3})
+		metrics.reset()
+		self.assertEqual(metrics.snapshot(),
+				{"counters": {}, "timers": {}, "histograms": {}})
+
+	def test_timed(self):
+		@metrics.timed("func")
+		def func(val, default=None):
+			if val:
+				raise ValueError
+			return 42
+		self.assertEqual(func(False), 42)
+		self.assertRaises(ValueError, func, True)
+		self.assertEqual(metrics.snapshot()["timers"]["func"]["count"], 2)
+		self.assertEqual(inspect.getargspec(func.__wrapped__),
+				(["val", "default"], None, None, (None, )))
+
+	def test_timedDisabled(self):
+		metrics.disable()
+		@metrics.timed("func")
+		def func(val):
+			return val
+		self.assertEqual(func(1), 1)
+		self.assertEqual(metrics.snapshot()["timers"], {})
+		# Functions decorated while metrics are disabled are timed once enabled.
+		metrics.enable()
+		self.assertEqual(func(1), 1)
+		self.assertEqual(metrics.snapshot()["timers"]["func"]["count"], 1)
+
+	def test_disabled(self):
+		metrics.disable()
+		metrics.count("things")
+		metrics.observe("sizes", 1)
+		with metrics.timer("block"):
+			pass
+		obj = dObject()
+		obj.bindEvent(dEvents.Hit, lambda evt: None)
+		obj.raiseEvent(dEvents.Hit)
+		self.assertEqual(metrics.snapshot(),
+				{"counters": {}, "timers": {}, "histograms": {}})
+
+	def test_instrumentation(self):
+		obj = dObject()
+		obj.bindEvent(dEvents.Hit, lambda evt: None)
+		obj.raiseEvent(dEvents.Hit)
+		con = dabo.db.dConnection(DbType="SQLite", Database=":memory:")
+		biz = dabo.biz.dBizobj(con)
+		crs = biz._CurrentCursor
+		crs.execute("create table cust (pk INTEGER PRIMARY KEY AUTOINCREMENT, cName CHAR)")
+		crs.execute("insert into cust (cName) values ('Ed')")
+		crs.execute("insert into cust (cName) values ('Paul')")
+		biz.KeyField = "pk"
+		biz.DataSource = "cust"
+		biz.requery()
+		biz.scan(lambda: None)
+		biz.sort("cName")
+		biz.seek("Paul", "cName")
+		biz.setFieldVal("cName", "Pauline")
+		biz.save()
+		timers = metrics.snapshot()["timers"]
+		for name in ("event.Hit", "biz.requery", "biz.scan", "biz.save",
+				"cursor.sort", "cursor.seek"):
+			self.assertEqual(timers[name]["count"], 1, name)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import unittest
+import dabo
+from dabo.lib.rowWindow import ListRowSource, RowWindow
+
+
+class CountingSource(ListRowSource):
+	def __init__(self, records):
+		super(CountingSource, self).__init__(records)
+		self.calls = []
+
+	def getRows(self, start, count):
+		self.calls.append((start, count))
+		return super(CountingSource, self).getRows(start, count)
+
+
+class Test_RowWindow(unittest.TestCase):
+	def setUp(self):
+		self.source = CountingSource([{"pk": num, "cName": "Name %s" % num}
+				for num in xrange(1000)])
+
+	def test_synchronous(self):
+		loaded = []
+		win = RowWindow(self.source, pageSize=10, prefetch=15, maxPages=4,
+				onLoaded=lambda first, last: loaded.append((first, last)))
+		self.assertEqual(win.RowCount, 1000)
+		self.assertEqual(win.LoadedRowCount, 0)
+		self.assertEqual(win.getValue(500, "cName"), "Name 500")
+		# Rows 485 to 515 are covered by pages 48 to 51, loaded with one call.
+		self.assertEqual(self.source.calls, [(480, 40)])
+		self.assertEqual(loaded, [(480, 519)])
+		self.assertEqual(win.LoadedRowCount, 40)
+		self.assertEqual(win.getValue(519, "pk"), 519)
+		self.assertEqual(win.getValue(519, "missing", "x"), "x")
+		self.assertEqual(len(self.source.calls), 1)
+		# Memory stays bounded: the pages used the longest time ago are dropped.
+		win.getRecord(530)
+		self.assertEqual(self.source.calls[-1], (520, 30))
+		self.assertEqual(win.LoadedRowCount, 40)
+		self.assertEqual(win.getValue(519, "pk"), 519)
+		self.assertEqual(win.getValue(999, "pk"), 999)
+		self.assertEqual(self.source.calls[-1], (980, 20))
+		self.assertEqual(win.getRecord(1000), None)
+		self.assertEqual(win.getValue(0, "pk"), 0)
+		self.assertEqual(self.source.calls[-1], (0, 20))
+		win = RowWindow(self.source, pageSize=10, prefetch=200)
+		win.getRecord(500)
+		win.getRecord(900)
+		# By default, enough pages are kept for both requests.
+		self.assertEqual(win.LoadedRowCount, 700)
+
+	def test_loadedRows(self):
+		scheduled = []
+		win = RowWindow(self.source, pageSize=10, prefetch=5, loader=scheduled.append)
+		self.assertEqual(win.getLoadedRows(), [])
+		win.getRecord(12)
+		self.assertEqual(win.getLoadedRows(), [])
+		scheduled.pop()()
+		self.assertEqual(win.getLoadedRows(), range(20))
+		win.getRecord(995)
+		scheduled.pop()()
+		self.assertEqual(win.getLoadedRows(), range(20) + range(990, 1000))
+		# Listing the rows doesn't load any.
+		calls = len(self.source.calls)
+		win.getLoadedRows()
+		self.assertEqual(len(self.source.calls), calls)
+		self.assertEqual(scheduled, [])
+
+	def test_deferred(self):
+		scheduled = []
+		win = RowWindow(self.source, pageSize=10, prefetch=5, loader=scheduled.append)
+		# Placeholders are returned until the loader runs.
+		self.assertEqual(win.getValue(0, "pk", "..."), "...")
+		self.assertEqual(win.getValue(12, "pk", "..."), "...")
+		self.assertEqual(win.getValue(35, "pk", "..."), "...")
+		self.assertEqual(len(scheduled), 1)
+		self.assertEqual(self.source.calls, [])
+		scheduled.pop()()
+		self.assertEqual(self.source.calls, [(0, 20), (30, 20)])
+		self.assertEqual(win.getValue(12, "pk", "..."), 12)
+		self.assertEqual(win.getValue(35, "pk", "..."), 35)
+		# Changed data is read again after invalidating.
+		self.source.records = self.source.records[:20]
+		win.invalidate()
+		self.assertEqual(win.RowCount, 20)
+		self.assertEqual(win.getValue(35, "pk", "..."), "...")
+		self.assertEqual(scheduled, [])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import unittest
+import datetime
+import dabo
+from dabo.lib.searchIndex import SearchIndex
+
+
+class Test_SearchIndex(unittest.TestCase):
+	def index(self, vals, caseSensitive=False):
+		return SearchIndex([(val, row) for row, val in enumerate(vals)], caseSensitive)
+
+	def test_strings(self):
+		idx = self.index(["Carol", "alice", None, "Bob", "bobby", "Alfred"])
+		self.assertEqual(len(idx), 5)
+		self.assertEqual(idx.find("al"), 1)
+		self.assertEqual(idx.find("ALF"), 5)
+		self.assertEqual(idx.find("b"), 3)
+		self.assertEqual(idx.find("bobb"), 4)
+		self.assertEqual(idx.find("az"), None)
+		self.assertEqual(idx.find("az", near=True), 3)
+		self.assertEqual(idx.find("zed", near=True), 0)
+		idx = self.index(["Carol", "alice", "Bob", "bobby"], caseSensitive=True)
+		self.assertEqual(idx.find("b"), 3)
+		self.assertEqual(idx.find("B"), 2)
+		self.assertEqual(idx.find("Al"), None)
+
+	def test_numbers(self):
+		idx = self.index([None, 0, 30, 10, 20, 10])
+		self.assertEqual(idx.find("10"), 3)
+		self.assertEqual(idx.find("0"), 1)
+		self.assertEqual(idx.find("x"), 1)
+		self.assertEqual(idx.find("15"), None)
+		self.assertEqual(idx.find("15", near=True), 4)
+		self.assertEqual(idx.find("99", near=True), 2)
+		self.assertEqual(self.index([1.5, 2.5]).find("2.5"), 1)
+
+	def test_dates(self):
+		idx = self.index([datetime.date(2010, 5, 1), datetime.date(2009, 1, 2)])
+		self.assertEqual(idx.find("2009"), 1)
+		self.assertEqual(idx.find("2010-05"), 0)
+
+	def test_empty(self):
+		self.assertEqual(self.index([]).find("a", near=True), None)
+		self.assertEqual(self.index([None, None]).find("a", near=True), None)
+
+
+if __name__ == "__main__":
+	unittest.main()
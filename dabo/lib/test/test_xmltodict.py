@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import unittest
+from cStringIO import StringIO
+import dabo
+from dabo.lib.xmltodict import xmltodict, dicttoxml, dicttoxmlfile, escape
+
+
+class Test_xmltodict(unittest.TestCase):
+	def setUp(self):
+		self.dct = {"name": "dForm", "attributes": {"Caption": u"Jos\xe9's <form>",
+				"Width": "400"},
+				"code": {"onHit": "def onHit(self, evt):\n\tif a < b and c > d:\n\t\tpass\n"},
+				"properties": {"Total": {"getter": "_getTotal", "setter": "None"}},
+				"children": [
+					{"name": "dLabel", "attributes": {"Caption": "A & B"}},
+					{"name": "dPanel", "children": [{"name": "cdata", "cdata": "Some text"}]},
+				]}
+
+	def test_roundTrip(self):
+		xml = dicttoxml(self.dct)
+		self.assertTrue(xml.startswith("<?xml"))
+		dct = xmltodict(xml)
+		self.assertEqual(dct["name"], "dForm")
+		self.assertEqual(dct["attributes"]["Caption"], u"Jos\xe9's <form>")
+		self.assertEqual(dct["code"], self.dct["code"])
+		self.assertEqual(dct["properties"], self.dct["properties"])
+		self.assertEqual(dct["children"][0]["attributes"]["Caption"], "A & B")
+		self.assertEqual(dct["children"][1]["children"][0]["cdata"], "Some text")
+
+	def test_largeCode(self):
+		code = "\n".join("\tx = %s < 3" % num for num in range(20000)) + "\n"
+		children = [{"name": "item%s" % num, "cdata": "value %s" % num}
+				for num in range(2000)]
+		dct = xmltodict(dicttoxml({"name": "root", "code": {"big": code},
+				"children": children}))
+		self.assertEqual(dct["code"]["big"], code.strip() + "\n")
+		self.assertEqual(len(dct["children"]), 2000)
+		self.assertEqual(dct["children"][-1]["cdata"], "value 1999")
+
+	def test_streaming(self):
+		out = StringIO()
+		linesep = {0: "\n\n", 1: "\n"}
+		dicttoxmlfile(self.dct, out, linesep=linesep)
+		self.assertEqual(out.getvalue(), dicttoxml(self.dct, linesep=linesep))
+
+	def test_escape(self):
+		self.assertEqual(escape(u"a<b>&\xe9\"'"), "a&#060;b&#062;&amp;&amp;&#233;&quot;&apos;")
+		self.assertEqual(escape("plain"), "plain")
+
+
+if __name__ == "__main__":
+	unittest.main()
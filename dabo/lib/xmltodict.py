@@ -6,6 +6,7 @@ This was copied and modified from John Bair's recipe at aspn.activestate.com:
 	http://aspn.activestate.com/ASPN/Cookbook/Python/Recipe/149368
 """
 import os
+import re
 import string
 import locale
 import codecs
@@ -38,14 +39,17 @@ class Xml2Obj(object):
 	def __init__(self, encoding=None):
 		self.root = None
 		self.nodeStack = []
+		# Lists of the character data chunks of the elements in nodeStack,
+		# joined into their 'cdata' when the element ends.
+		self._cdataStack = []
 		self.attsToSkip = []
 		self._inCode = False
 		self._mthdName = ""
-		self._mthdCode = ""
+		self._mthdCode = []
 		self._codeDict = None
 		self._inProp = False
 		self._propName = ""
-		self._propData = ""
+		self._propData = []
 		self._propDict = None
 		self._currPropAtt = ""
 		self._currPropDict = None
@@ -69,7 +73,7 @@ class Xml2Obj(object):
 			# These are the custom property definitions
 			self._inProp = True
 			self._propName = ""
-			self._propData = ""
+			self._propData = []
 			parent = self.nodeStack[-1]
 			if "properties" not in parent:
 				parent["properties"] = {}
@@ -108,6 +112,7 @@ class Xml2Obj(object):
 				else:
 					self.root = element
 				self.nodeStack.append(element)
+				self._cdataStack.append(None)
 
 
 	def EndElement(self, name):
@@ -118,12 +123,12 @@ class Xml2Obj(object):
 				self._codeDict = None
 			else:
 				# End of an individual method
-				mth = self._mthdCode.strip()
+				mth = "".join(self._mthdCode).strip()
 				if not mth.endswith("\n"):
 					mth += "\n"
 				self._codeDict[self._mthdName] = mth
 				self._mthdName = ""
-				self._mthdCode = ""
+				self._mthdCode = []
 		elif self._inProp:
 			if name == "properties":
 				self._inProp = False
@@ -134,29 +139,31 @@ class Xml2Obj(object):
 				self._propName = ""
 			else:
 				# end of a property attribute
-				self._currPropDict[self._currPropAtt] = self._propData
-				self._propData = self._currPropAtt = ""
+				self._currPropDict[self._currPropAtt] = "".join(self._propData)
+				self._propData = []
+				self._currPropAtt = ""
 		else:
-			self.nodeStack = self.nodeStack[:-1]
+			element = self.nodeStack.pop()
+			cdata = self._cdataStack.pop()
+			if cdata is not None:
+				element["cdata"] = "".join(cdata)
 
 
 	def CharacterData(self, data):
 		"""SAX character data event handler"""
 		if self._inCode or data.strip():
 			data = data.replace("&lt;", "<").replace("&gt;",">")
-			data = data	#.encode()
+			# The chunks are collected in lists and joined at the end of the
+			# element, which keeps parsing linear for large code blocks.
 			if self._inCode:
-				if self._mthdCode:
-					self._mthdCode += data
-				else:
-					self._mthdCode = data
+				self._mthdCode.append(data)
 			elif self._inProp:
-				self._propData += data
+				self._propData.append(data)
 			else:
-				element = self.nodeStack[-1]
-				if "cdata" not in element:
-					element["cdata"] = ""
-				element["cdata"] += data
+				cdata = self._cdataStack[-1]
+				if cdata is None:
+					cdata = self._cdataStack[-1] = []
+				cdata.append(data)
 
 
 	def Parse(self, xml):
@@ -243,17 +250,17 @@ def escape(val, escapeAmp=True):
 	# Escape any internal quotes
 	val = val.replace('"', '&quot;').replace("'", "&apos;")
 	# Escape any high-order characters
-	chars = []
-	for pos, char in enumerate(list(val)):
-		if ord(char) > 127:
-			chars.append("&#%s;" % ord(char))
-		else:
-				chars.append(char)
-	val = "".join(chars)
+	val = _highOrderPat.sub(_charRef, val)
 	val = val.replace("<", "&#060;").replace(">", "&#062;")
 	return val
 
 
+_highOrderPat = re.compile(u"[^\x00-\x7f]")
+
+def _charRef(match):
+	return "&#%s;" % ord(match.group())
+
+
 def unescape(val):
 	"""
 	Reverse the escape() process to re-create the original values. The parser
@@ -263,40 +270,57 @@ def unescape(val):
 	return val
 
 
-def dicttoxml(dct, level=0, header=None, linesep=None):
+class _XmlOutput(object):
 	"""
-	Given a Python dictionary, return an xml string.
-
-	The dictionary must be in the format returned by dicttoxml(), with keys
-	on "attributes", "code", "cdata", "name", and "children".
-
-	Send your own XML header, otherwise a default one will be used.
-
-	The linesep argument is a dictionary, with keys on levels, allowing the
-	developer to add extra whitespace depending on the level.
+	Collects the pieces of XML written by _writeDictXml(). They are kept in
+	a list and, if 'out' is passed, written to it every so often, so that
+	the complete text doesn't need to be kept in memory.
 	"""
-	att = ""
-	ret = ""
-
+	def __init__(self, out=None, bufferSize=1000):
+		self.out = out
+		self.bufferSize = bufferSize
+		self.parts = []
+		# The last piece written, used to decide how to indent closing tags.
+		self.last = ""
+
+	def write(self, txt):
+		if txt:
+			self.parts.append(txt)
+			self.last = txt
+			if self.out is not None and len(self.parts) >= self.bufferSize:
+				self.flush()
+
+	def flush(self):
+		if self.out is not None and self.parts:
+			self.out.write("".join(self.parts))
+			self.parts = []
+
+	def getvalue(self):
+		return "".join(self.parts)
+
+
+def _writeDictXml(dct, level, linesep, output):
+	write = output.write
+	att = []
 	if "attributes" in dct:
 		for key, val in dct["attributes"].items():
 			# Some keys are already handled.
 			noEscape = key in ("sizerInfo",)
 			val = escQuote(val, noEscape)
-			att += " %s=%s" % (key, val)
-	ret += "%s<%s%s" % ("\t" * level, dct["name"], att)
+			att.append(" %s=%s" % (key, val))
+	write("%s<%s%s" % ("\t" * level, dct["name"], "".join(att)))
 
 	if (("cdata" not in dct) and ("children" not in dct) and ("code" not in dct)
 			and ("properties" not in dct)):
-		ret += " />%s" % eol
+		write(" />%s" % eol)
 	else:
-		ret += ">"
+		write(">")
 		if "cdata" in dct:
-			ret += "%s" % dct["cdata"].replace("<", "&lt;").replace(">", "&gt;")
+			write(dct["cdata"].replace("<", "&lt;").replace(">", "&gt;"))
 
 		if "code" in dct:
 			if len(dct["code"].keys()):
-				ret += "%s%s<code>%s" % (eol, "\t" * (level+1), eol)
+				write("%s%s<code>%s" % (eol, "\t" * (level+1), eol))
 				methodTab = "\t" * (level+2)
 				for mthd, cd in dct["code"].items():
 					# Convert \n's in the code to eol:
@@ -305,44 +329,74 @@ def dicttoxml(dct, level=0, header=None, linesep=None):
 					if not cd.endswith(eol):
 						cd += eol
 
-					ret += "%s<%s><![CDATA[%s%s]]>%s%s</%s>%s" % (methodTab,
+					write("%s<%s><![CDATA[%s%s]]>%s%s</%s>%s" % (methodTab,
 							mthd, eol, cd, eol,
-							methodTab, mthd, eol)
-				ret += "%s</code>%s"	% ("\t" * (level+1), eol)
+							methodTab, mthd, eol))
+				write("%s</code>%s" % ("\t" * (level+1), eol))
 
 		if "properties" in dct:
 			if len(dct["properties"].keys()):
-				ret += "%s%s<properties>%s" % (eol, "\t" * (level+1), eol)
+				write("%s%s<properties>%s" % (eol, "\t" * (level+1), eol))
 				currTab = "\t" * (level+2)
 				for prop, val in dct["properties"].items():
-					ret += "%s<%s>%s" % (currTab, prop, eol)
+					write("%s<%s>%s" % (currTab, prop, eol))
 					for propItm, itmVal in val.items():
 						itmTab = "\t" * (level+3)
-						ret += "%s<%s>%s</%s>%s" % (itmTab, propItm, itmVal,
-								propItm, eol)
-					ret += "%s</%s>%s" % (currTab, prop, eol)
-				ret += "%s</properties>%s"	% ("\t" * (level+1), eol)
+						write("%s<%s>%s</%s>%s" % (itmTab, propItm, itmVal,
+								propItm, eol))
+					write("%s</%s>%s" % (currTab, prop, eol))
+				write("%s</properties>%s" % ("\t" * (level+1), eol))
 
 		if ("children" in dct) and dct["children"]:
-			ret += eol
+			write(eol)
 			for child in dct["children"]:
-				ret += dicttoxml(child, level+1, linesep=linesep)
+				_writeDictXml(child, level+1, linesep, output)
 		indnt = ""
-		if ret.endswith(eol):
+		if output.last.endswith(eol):
 			# Indent the closing tag
 			indnt = ("\t" * level)
-		ret += "%s</%s>%s" % (indnt, dct["name"], eol)
+		write("%s</%s>%s" % (indnt, dct["name"], eol))
 
 		if linesep:
-			ret += linesep.get(level, "")
+			write(linesep.get(level, ""))
+
+
+def _xmlHeader(header):
+	if header is None:
+		header = '<?xml version="1.0" encoding="%s" standalone="no"?>%s' \
+				% (default_encoding, eol)
+	return header
 
+
+def dicttoxml(dct, level=0, header=None, linesep=None):
+	"""
+	Given a Python dictionary, return an xml string.
+
+	The dictionary must be in the format returned by dicttoxml(), with keys
+	on "attributes", "code", "cdata", "name", and "children".
+
+	Send your own XML header, otherwise a default one will be used.
+
+	The linesep argument is a dictionary, with keys on levels, allowing the
+	developer to add extra whitespace depending on the level.
+	"""
+	output = _XmlOutput()
 	if level == 0:
-		if header is None:
-			header = '<?xml version="1.0" encoding="%s" standalone="no"?>%s' \
-					% (default_encoding, eol)
-		ret = header + ret
+		output.write(_xmlHeader(header))
+	_writeDictXml(dct, level, linesep, output)
+	return output.getvalue()
 
-	return ret
+
+def dicttoxmlfile(dct, out, header=None, linesep=None):
+	"""
+	Writes the xml for a Python dictionary to the file-like object 'out',
+	as it is generated, instead of returning it as one string. The arguments
+	are the same as for dicttoxml().
+	"""
+	output = _XmlOutput(out)
+	output.write(_xmlHeader(header))
+	_writeDictXml(dct, 0, linesep, output)
+	output.flush()
 
 
 def flattenClassDict(cd, retDict=None):
@@ -242,6 +242,39 @@ copyLineSeparator = "\n"
 # Turn to False for better 'import dabo' performance from inside web apps, for example.
 implicitImports = True
 
+# When set to True along with implicitImports, the modules and classes that
+# implicitImports makes available (dabo.db, dabo.biz, dabo.ui, dabo.dApp, etc.)
+# aren't imported until they are first used. This makes 'import dabo' much
+# faster for scripts and servers that only use part of the framework.
+lazyImports = False
+
+# When set to True, dApp remembers the connection names defined in each .cnxml
+# file, and only parses the files that have changed when the app starts. The
+# others are parsed when one of their connections is first requested.
+cacheConnectionNames = True
+
+# When set to True, the code compiled for .cdxml forms and classes is cached on
+# disk, so that opening them again doesn't need to regenerate it.
+cacheDesignerClasses = True
+
+# Custom connection parameters for the SQLite preference database; see the
+# dbSQLite.SQLite class for the available settings. For example, WAL mode lets
+# other running apps read their preferences while one app saves:
+#	preferenceDbOptions = {"journal_mode": "WAL", "synchronous": "NORMAL",
+#			"busy_timeout": 5000}
+# WAL mode is stored in the database file, and doesn't work when the home
+# directory is on a network drive.
+preferenceDbOptions = {}
+
+# Maximum number of text extents cached by dabo.ui.getTextExtents(), which is
+# used for measuring text when sizing grid columns, labels and drawn text. Set
+# it to None for no limit.
+textExtentCacheSize = 10000
+
+# When set to True, dabo.lib.metrics collects metrics from the start. They
+# can also be turned on at any time with metrics.enable().
+collectMetrics = False
+
 # Setting to determine if we call dLocalize.install("dabo") when dabo is imported.
 localizeDabo = True
 
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import unittest
+import dabo
+from dabo import dLocalize
+from dabo.dLocalize import _, lazy_
+
+
+class Test_dLocalize(unittest.TestCase):
+	def setUp(self):
+		self._catalog = dLocalize._catalog
+		self._domains = dict(dLocalize._domains)
+		dLocalize.install("dabo")
+
+	def tearDown(self):
+		dLocalize._catalog = self._catalog
+		dLocalize._domains.clear()
+		dLocalize._domains.update(self._domains)
+
+	def test_translate(self):
+		dLocalize.setLanguage("de")
+		self.assertEqual(_("OK"), u"Best\xe4tigen")
+		self.assertEqual(_("No such message"), u"No such message")
+		self.assertTrue(isinstance(_("No such message"), unicode))
+		dLocalize.setLanguage("english")
+		self.assertEqual(_("OK"), u"OK")
+
+	def test_catalogCache(self):
+		dLocalize.setLanguage("de")
+		catalog = dLocalize._catalog
+		dLocalize.setLanguage("fr")
+		self.assertFalse(dLocalize._catalog is catalog)
+		dLocalize.setLanguage("de")
+		self.assertTrue(dLocalize._catalog is catalog)
+
+	def test_noCatalog(self):
+		dLocalize._catalog = None
+		self.assertEqual(_("OK"), "OK")
+		self.assertTrue(isinstance(_("OK"), str))
+
+	def test_lazy(self):
+		msg = lazy_("OK")
+		dLocalize.setLanguage("de")
+		self.assertEqual(unicode(msg), u"Best\xe4tigen")
+		self.assertEqual(msg, u"Best\xe4tigen")
+		self.assertEqual(u"%s!" % msg, u"Best\xe4tigen!")
+		self.assertEqual(msg + "!", u"Best\xe4tigen!")
+		self.assertEqual(msg.upper(), u"BEST\xc4TIGEN")
+		dLocalize.setLanguage("en")
+		self.assertEqual(str(msg), "OK")
+		self.assertEqual(lazy_("Value: %s") % 42, u"Value: 42")
+		self.assertEqual(msg, lazy_("OK"))
+
+	def test_lazyHash(self):
+		msg = lazy_("OK")
+		for lang in ("de", "en"):
+			dLocalize.setLanguage(lang)
+			self.assertEqual(msg, _("OK"))
+			self.assertEqual(hash(msg), hash(_("OK")))
+			self.assertTrue(msg in set([_("OK")]))
+			self.assertEqual({_("OK"): 1}.get(msg), 1)
+
+
+if __name__ == "__main__":
+	unittest.main()
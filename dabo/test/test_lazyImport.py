@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import dabo
+from dabo.lib import jsonDecode
+
+daboDir = os.path.dirname(os.path.dirname(os.path.abspath(dabo.__file__)))
+
+# Run in a fresh interpreter: records the time spent importing each module,
+# including the modules it imports, and the modules loaded after the
+# statements in 'code' have run.
+profileScript = """
+import __builtin__
+import sys
+import time
+times = {}
+_import = __builtin__.__import__
+def timedImport(name, *args, **kwargs):
+	before = set(sys.modules)
+	start = time.time()
+	try:
+		return _import(name, *args, **kwargs)
+	finally:
+		elapsed = time.time() - start
+		for mod in set(sys.modules) - before:
+			if sys.modules[mod] is not None and mod not in times:
+				times[mod] = elapsed
+__builtin__.__import__ = timedImport
+start = time.time()
+import dabo
+total = time.time() - start
+__builtin__.__import__ = _import
+%s
+import json
+print json.dumps({"total": total, "times": times,
+		"modules": sorted(mod for mod in sys.modules if sys.modules[mod] is not None)})
+"""
+
+
+class Test_LazyImport(unittest.TestCase):
+	def setUp(self):
+		self.tempDir = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.tempDir)
+
+	def runScript(self, lazy, script):
+		"""Runs the script in a new process, using the 'lazyImports' setting, and returns its output."""
+		open(os.path.join(self.tempDir, "settings_override.py"), "w").write(
+				"lazyImports = %s\n" % lazy)
+		env = dict(os.environ)
+		env["PYTHONPATH"] = os.pathsep.join((self.tempDir, daboDir))
+		proc = subprocess.Popen([sys.executable, "-c", script],
+				cwd=self.tempDir, env=env, stdout=subprocess.PIPE,
+				stderr=subprocess.PIPE)
+		out, err = proc.communicate()
+		self.assertEqual(proc.returncode, 0, err)
+		return out
+
+	def profileImport(self, lazy, code=""):
+		"""
+		Imports dabo in a new process, using the 'lazyImports' setting, and
+		returns a dict with the 'total' import time, the cumulative import
+		'times' per module, and the loaded 'modules'.
+		"""
+		out = self.runScript(lazy, profileScript % code)
+		return jsonDecode(out.splitlines()[-1])
+
+	def test_lazyModules(self):
+		lazy = self.profileImport(True)["modules"]
+		for mod in ("dabo.db", "dabo.biz", "dabo.ui", "dabo.dApp", "urllib2"):
+			self.assertFalse(mod in lazy, mod)
+		eager = self.profileImport(False)["modules"]
+		self.assertTrue("dabo.dApp" in eager)
+		self.assertFalse("urllib2" in eager)
+
+	def test_firstAccess(self):
+		code = """
+assert "dabo.db" not in sys.modules
+con = dabo.db.dConnection(DbType="SQLite", Database=":memory:")
+assert type(dabo.db).__name__ == "module"
+assert dabo.dEvents.Hit.__name__ == "Hit"
+assert "dabo.dApp" not in sys.modules
+# dabo.biz imports the dApp and dPref modules.
+assert dabo.biz.dBizobj.__name__ == "dBizobj"
+assert dabo.dApp.__name__ == "dApp"
+assert isinstance(dabo.dApp, type), dabo.dApp
+assert isinstance(dabo.dPref, type), dabo.dPref
+"""
+		self.profileImport(True, code)
+
+	def test_submoduleImport(self):
+		# Importing a module that loads dabo.dApp and dabo.dPref still leaves the
+		# classes in the dabo namespace.
+		self.runScript(True, """
+import __builtin__
+import sys
+_import = __builtin__.__import__
+import dabo
+# No import hook is needed.
+assert __builtin__.__import__ is _import
+import dabo.biz
+assert "dabo.dApp" in sys.modules
+assert isinstance(dabo.dApp, type), dabo.dApp
+assert isinstance(dabo.dPref, type), dabo.dPref
+from dabo.dApp import dApp
+assert dabo.dApp is dApp
+assert __builtin__.__import__ is _import
+""")
+
+	def test_logFiles(self):
+		self.runScript(True, """
+import dabo
+dabo.setMainLogFile("main.log")
+dabo.setDbLogFile("db.log")
+assert dabo.dbFileLogHandler is not None
+dabo.setMainLogFile(None)
+dabo.setDbLogFile(None)
+assert dabo.dbFileLogHandler is None
+""")
+
+	def test_importTime(self):
+		eager = self.profileImport(False)
+		lazy = self.profileImport(True)
+		# The slowest modules, for comparison when this fails.
+		slowest = sorted(eager["times"].items(), key=lambda item: -item[1])[:10]
+		self.assertTrue(lazy["total"] < eager["total"],
+				"lazy: %.3f sec, eager: %.3f sec; slowest eager imports: %s"
+				% (lazy["total"], eager["total"], slowest))
+		self.assertTrue(len(lazy["modules"]) < len(eager["modules"]))
+
+
+if __name__ == "__main__":
+	unittest.main()
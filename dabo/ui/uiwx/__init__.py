@@ -13,6 +13,7 @@ import dabo
 from dabo.dLocalize import _
 from dabo.lib.utils import ustr
 from dabo.lib import utils
+from dabo.lib.cellCache import BoundedCache
 import dabo.dEvents as dEvents
 import dKeys
 
@@ -1686,17 +1687,69 @@ def setPositionInSizer(obj, pos):
 	sz.setPositionInSizer(obj, pos)
 
 
-def fontMetricFromFont(txt, font):
+# DC used for measuring text, created when first needed.
+_measureDC = None
+# (font description, text): (width, height)
+_textExtents = BoundedCache(dabo.textExtentCacheSize)
+
+
+def _getMeasureDC():
+	global _measureDC
+	if _measureDC is None:
+		_measureDC = wx.MemoryDC()
+		_measureDC.SelectObject(wx.EmptyBitmap(1, 1))
+	return _measureDC
+
+
+def getTextExtents(texts, font):
+	"""
+	Return a list with the (width, height) of each of the passed texts when
+	drawn in the font, which can be a dFont or a wx.Font.
+
+	The extents are cached by font and text, and the ones that aren't cached
+	are measured in a single DC kept for that purpose, so this is much faster
+	than creating a window to measure the texts. The cache holds up to
+	dabo.textExtentCacheSize extents, dropping the ones not used recently; set
+	it to None for no limit.
+	"""
 	if isinstance(font, dabo.ui.dFont):
 		font = font._nativeFont
-	wind = wx.Frame(None)
-	dc = wx.ClientDC(wind)
-	dc.SetFont(font)
-	ret = dc.GetTextExtent(txt)
-	wind.Destroy()
+	fontKey = font.GetNativeFontInfoDesc()
+	cache = _textExtents
+	if cache.maxSize != dabo.textExtentCacheSize:
+		cache.maxSize = dabo.textExtentCacheSize
+	dc = None
+	ret = []
+	for txt in texts:
+		key = (fontKey, txt)
+		ext = cache.get(key)
+		if ext is None:
+			if dc is None:
+				dc = _getMeasureDC()
+				dc.SetFont(font)
+			ext = dc.GetTextExtent(txt)
+			cache.set(key, ext)
+		ret.append(ext)
 	return ret
 
 
+def getTextExtent(txt, font):
+	"""
+	Return the (width, height) of the text when drawn in the font, which can
+	be a dFont or a wx.Font. See getTextExtents() for measuring many texts.
+	"""
+	return getTextExtents((txt,), font)[0]
+
+
+def clearTextExtentCache():
+	"""Remove all the cached text extents."""
+	_textExtents.clear()
+
+
+def fontMetricFromFont(txt, font):
+	return getTextExtent(txt, font)
+
+
 def fontMetricFromDrawObject(obj):
 	"""Given a drawn text object, returns the width and height of the text."""
 	return fontMetric(txt=obj.Text, face=obj.FontFace, size=obj.FontSize,
@@ -1721,17 +1774,15 @@ def fontMetric(txt=None, wind=None, face=None, size=None, bold=None,
 	"""
 	if wind is None:
 		wind = dabo.dAppRef.ActiveForm
-	needToRelease = False
-	if wind is None:
-		# Need to create one
-		wind = wx.Frame(None)
-		needToRelease = True
 	if txt is None:
 		try:
 			txt = wind.Caption
 		except AttributeError:
 			raise ValueError("No text supplied to fontMetric call")
-	fnt = wind.GetFont()
+	if wind is None:
+		fnt = wx.SystemSettings.GetFont(wx.SYS_DEFAULT_GUI_FONT)
+	else:
+		fnt = wind.GetFont()
 	if face is not None:
 		fnt.SetFaceName(face)
 	if size is not None:
@@ -1740,21 +1791,7 @@ def fontMetric(txt=None, wind=None, face=None, size=None, bold=None,
 		fnt.SetWeight(wx.BOLD)
 	if italic is not None:
 		fnt.SetStyle(wx.ITALIC)
-
-	if not isinstance(wind, (dabo.ui.dForm, wx.Frame)):
-		try:
-			wind = wind.Form
-		except AttributeError:
-			try:
-				wind = wind.Parent
-			except AttributeError:
-				pass
-	dc = wx.ClientDC(wind)
-	dc.SetFont(fnt)
-	ret = dc.GetTextExtent(txt)
-	if needToRelease:
-		wind.Destroy()
-	return ret
+	return getTextExtent(txt, fnt)
 
 
 def saveScreenShot(obj=None, imgType=None, pth=None, delaySeconds=None):
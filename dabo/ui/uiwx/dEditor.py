@@ -1224,7 +1224,8 @@ class dEditor(dcm.dDataControlMixin, stc.StyledTextCtrl):
 
 		if obj is not None:
 			try:
-				args = inspect.getargspec(obj)
+				# Decorators such as metrics.timed() keep the decorated function here.
+				args = inspect.getargspec(getattr(obj, "__wrapped__", obj))
 				try:
 					sarg = args[0][0]
 				except IndexError:
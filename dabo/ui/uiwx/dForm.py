@@ -11,6 +11,7 @@ import dFormMixin as fm
 import dabo.dException as dException
 from dabo.dLocalize import _
 from dabo.lib.utils import ustr
+from dabo.lib import metrics
 from dDialog import dDialog
 
 
@@ -112,6 +113,7 @@ class BaseForm(fm.dFormMixin):
 			## Call update() after interval; send 0 to tell update to do it immediately.
 			dabo.ui.callAfterInterval(interval, self.update, 0)
 		else:
+			startTime = metrics.enabled and time.time()
 			try:
 				super(BaseForm, self).update()
 			except TypeError:
@@ -119,6 +121,8 @@ class BaseForm(fm.dFormMixin):
 				#   <type 'exceptions.TypeError'>: super(type, obj): obj must be an instance
 				#   or subtype of type
 				pass
+			if startTime:
+				metrics.addTime("form.update", startTime)
 
 
 	def confirmChanges(self, bizobjs=None):
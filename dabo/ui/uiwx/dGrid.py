@@ -20,6 +20,11 @@ import dabo.dEvents as dEvents
 import dabo.dException as dException
 from dabo.dLocalize import _, n_
 from dabo.lib.utils import ustr
+from dabo.lib import metrics
+from dabo.lib.cellCache import CellCache
+from dabo.lib.searchIndex import SearchIndex
+from dabo.lib.rowWindow import RowWindow
+from dabo.lib.columnSizing import sampleRows, widestText
 import dControlMixin as cm
 import dKeys
 import dUICursors
@@ -38,17 +43,50 @@ decimalPoint = None
 
 
 
+# Marks a cell that isn't in the cache, since None is a valid cell value.
+_noValue = object()
+
+
 class dGridDataTable(wx.grid.PyGridTableBase):
 
 	def __init__(self, parent):
 		super(dGridDataTable, self).__init__()
-		self._clearCache()
 		self.grid = parent
+		# The cell values and attributes are cached until the bizobj reports that
+		# they have changed, or the grid is refreshed.
+		self.__cachedVals = CellCache(parent.CellCacheSize)
+		self.__cachedAttrs = CellCache(parent.CellCacheSize)
+		self._watchedBizobj = None
 		self._initTable()
 
-	def _clearCache(self):
-		self.__cachedVals = {}
-		self.__cachedAttrs = {}
+	def _clearCache(self, row=None):
+		"""Clear the cached values and attributes of the passed row, or of all rows."""
+		self.__cachedVals.invalidate(row)
+		self.__cachedAttrs.invalidate(row)
+
+	def _setCacheSize(self, val):
+		self.__cachedVals.maxSize = self.__cachedAttrs.maxSize = val
+		self._clearCache()
+
+	def _watchBizobj(self, bizobj):
+		"""Listen to data changes of the passed bizobj instead of the previous one."""
+		if bizobj is self._watchedBizobj:
+			return
+		if self._watchedBizobj is not None:
+			self._watchedBizobj.removeDataChangeListener(self)
+		self._watchedBizobj = bizobj
+		if bizobj is not None:
+			bizobj.addDataChangeListener(self)
+		self._clearCache()
+		self.grid._clearSearchIndexes()
+
+	def bizobjDataChanged(self, bizobj, row, field):
+		"""Called by the bizobj when its data changes."""
+		if bizobj is self._watchedBizobj:
+			# Dynamic properties and virtual fields can depend on any field in the
+			# row, so the whole row is cleared.
+			self._clearCache(row)
+			self.grid._clearSearchIndexes()
 
 	def _initTable(self):
 		self.colDefs = []
@@ -62,11 +100,9 @@ class dGridDataTable(wx.grid.PyGridTableBase):
 			# Empty grid so far, no biggie:
 			return self.grid._defaultGridColAttr.Clone()
 
-		cv = self.__cachedAttrs.get((row, col))
-		if cv:
-			diff = time.time() - cv[1]
-			if diff < 10:  ## if it's been less than this # of seconds.
-				return cv[0].Clone()
+		cv = self.__cachedAttrs.get(row, col)
+		if cv is not None:
+			return cv.Clone()
 
 		dcol = self.grid.Columns[col]
 		dcol._updateCellDynamicProps(row)
@@ -92,8 +128,11 @@ class dGridDataTable(wx.grid.PyGridTableBase):
 
 		# Prevents overwriting when a long cell has None in the one next to it.
 		attr.SetOverflow(False)
-		self.__cachedAttrs[(row, col)] = (attr.Clone(), time.time())
-		return attr
+		if self.grid._rowWindow is not None:
+			# The rows of a VirtualDataSource can't be edited.
+			attr.SetReadOnly(True)
+		self.__cachedAttrs.set(row, col, attr)
+		return attr.Clone()
 
 
 	def GetRowLabelValue(self, row):
@@ -219,7 +258,17 @@ class dGridDataTable(wx.grid.PyGridTableBase):
 		# Get the data from the grid.
 		bizobj = self.grid.getBizobj()
 
-		if bizobj:
+		self._watchBizobj(bizobj)
+		window = self.grid._rowWindow
+		if window is not None:
+			# Virtual rows: only the number of rows is read here.
+			self._bizobj = None
+			window.invalidate()
+			_newRowCount = window.RowCount
+			if _oldRowCount is None:
+				# Rows are appended, as for DataSet grids.
+				_oldRowCount = 0
+		elif bizobj:
 			dataSet = bizobj
 			_newRowCount = dataSet.RowCount
 			self._bizobj = bizobj
@@ -257,7 +306,10 @@ class dGridDataTable(wx.grid.PyGridTableBase):
 
 			if width is None or (width < 0):
 				# 3) Have the grid autosize:
-				self.grid.autoSizeCol(gridCol)
+				if self.grid.AutoSizeInIdle:
+					self.grid._autoSizeColLater(gridCol)
+				else:
+					self.grid.autoSizeCol(gridCol)
 			else:
 				col.Width = width
 
@@ -299,24 +351,34 @@ class dGridDataTable(wx.grid.PyGridTableBase):
 			dynamicUpdate=True, _fromGridEditor=False):
 		col = self._convertWxColNumToDaboColNum(col)
 		if useCache and not _fromGridEditor:
-			cv = self.__cachedVals.get((row, col))
-			if cv:
-				diff = time.time() - cv[1]
-				if diff < 10:  ## if it's been less than this # of seconds.
-					return cv[0]
+			cv = self.__cachedVals.get(row, col, _noValue)
+			if cv is not _noValue:
+				if metrics.enabled:
+					metrics.count("grid.GetValue.cached")
+				return cv
 
 		if col is None:
 			# No corresponding Dabo column for this column; must be not visible.
 			return ""
 
+		startTime = metrics.enabled and time.time()
 		bizobj = self.grid.getBizobj()
+		if bizobj is not self._watchedBizobj:
+			self._watchBizobj(bizobj)
 		col_obj = self.grid.Columns[col]
 		field = col_obj.DataField
 		if dynamicUpdate:
 			col_obj._updateDynamicProps()
 			col_obj._updateCellDynamicProps(row)
 		ret = ""
-		if bizobj:
+		window = self.grid._rowWindow
+		if window is not None:
+			ret = window.getValue(row, field, _noValue)
+			if ret is _noValue:
+				# The row is being loaded; it is repainted when it arrives.
+				return self.grid.VirtualPlaceholder
+			ret = self.getStringValue(ret)
+		elif bizobj:
 			if field and (row < bizobj.RowCount):
 				try:
 					ret = bizobj.getFieldVal(field, row)
@@ -332,7 +394,9 @@ class dGridDataTable(wx.grid.PyGridTableBase):
 		if ret is None and convertNoneToString:
 			ret = self.grid.NoneDisplay
 		if not _fromGridEditor:
-			self.__cachedVals[(row, col)] = (ret, time.time())
+			self.__cachedVals.set(row, col, ret)
+		if startTime:
+			metrics.addTime("grid.GetValue", startTime)
 		return ret
 
 
@@ -350,7 +414,7 @@ class dGridDataTable(wx.grid.PyGridTableBase):
 		self.grid._setCellValue(row, col, value)
 		if not _fromGridEditor:
 			# Update the cache
-			self.__cachedVals[(row, col)] = (value, time.time())
+			self.__cachedVals.set(row, col, value)
 		self.grid.afterCellEdit(row, col)
 
 
@@ -1902,6 +1966,20 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 		# Track the last row and col selected
 		self._lastRow = self._lastCol = None
 		self._alternateRowColoring = False
+		self._cellCacheSize = 10000
+		# Pages of rows read from the VirtualDataSource.
+		self._rowWindow = None
+		self._virtualPlaceholder = "..."
+		self._virtualPrefetch = 50
+		self._autoSizeSampleSize = 200
+		self._autoSizeInIdle = False
+		# Columns waiting to be auto-sized in idle time.
+		self._pendingAutoSize = []
+		# Columns to auto-size when rows of the VirtualDataSource are loaded.
+		self._autoSizeOnLoad = set()
+		# Sorted column values used by the incremental search, keyed by
+		# (DataField, searchCaseSensitive).
+		self._searchIndexes = {}
 		self._rowColorEven = "white"
 		self._rowColorOdd = (212, 255, 212)		# very light green
 
@@ -2075,6 +2153,9 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 			return
 		self.__inRefresh = True
 		self._Table._clearCache()  ## Make sure the proper values are filled into the cells
+		if self.getBizobj() is None:
+			# Bizobj-backed grids clear their indexes when the bizobj's data changes.
+			self._clearSearchIndexes()
 
 		# Force invisible column dynamic properties to update (possible to make Visible again):
 		invisible_cols = [c._updateDynamicProps() for c in self.Columns if not c.Visible]
@@ -2119,11 +2200,14 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 			biz = self.getBizobj()
 			if isinstance(val, float) and (issubclass(column.DataType, Decimal) or column.DataType == "decimal"):
 				val = Decimal(ustr(val))
+			if self._rowWindow is not None:
+				raise ValueError(_("The rows of a VirtualDataSource can't be edited"))
 			if biz:
 				biz.RowNumber = row
 				biz.setFieldVal(fld, val)
 			else:
 				self.DataSet[row][fld] = val
+			self._clearSearchIndexes()
 		except StandardError, e:
 			dabo.log.error("Cannot update data set: %s" % e)
 
@@ -2249,6 +2333,7 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 			self._addEmptyRows()
 		tbl.setColumns(self.Columns)
 		self._tableRows = tbl.fillTable(force)
+		self._clearSearchIndexes()
 		if not self._sortRestored:
 			dabo.ui.callAfter(self._restoreSort)
 			self._sortRestored = True
@@ -2394,7 +2479,7 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 		bizobj = self.getBizobj()
 
 		if bizobj:
-			data = bizobj.getDataSet(rows=1)
+			data = bizobj.getDataSetView(rows=1)
 			if data:
 				firstRec = data[0]
 			else:
@@ -2608,7 +2693,7 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 			self.lockDisplay()
 
 		## This function will get used in both if/elif below:
-		def _setColSize(idx):
+		def _setColSize(idx, autoWidth=None):
 			sortIconSize = self.SortIndicatorSize
 			sortIconBuffer = sortIconSize / 2
 			## breathing room around header caption:
@@ -2620,23 +2705,34 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 				## wx knows nothing about Dabo's invisible columns
 				return
 			idx = self._convertDaboColNumToWxColNum(idx)
-			autoWidth = self.GetColSize(idx)
+			if autoWidth is None:
+				autoWidth = self.GetColSize(idx)
 
 			# Account for the width of the header caption:
-			cw = dabo.ui.fontMetricFromFont(colObj.Caption,
-					colObj.HeaderFont._nativeFont)[0] + capBuffer
+			cw = dabo.ui.getTextExtent(colObj.Caption, colObj.HeaderFont._nativeFont)[0] + capBuffer
 			w = max(autoWidth, cw)
 			w = min(w, maxWidth)
 			colObj.Width = w
 			if persist:
 				colObj._persist("Width")
 
-		try:
-			self.AutoSizeColumn(self._convertDaboColNumToWxColNum(colNum), setAsMin=False)
-		except (TypeError, wx.PyAssertionError):
-			pass
-		if colNum > -1:
-			_setColSize(colNum)
+		sampleSize = self.AutoSizeSampleSize
+		if colNum > -1 and sampleSize and (self.RowCount > sampleSize
+				or self._rowWindow is not None):
+			# Only measure the values of a sample of the rows.
+			width = self._getSampledColWidth(colNum, sampleSize)
+			if width is None:
+				# No virtual rows are loaded yet.
+				self._autoSizeOnLoad.add(colNum)
+			else:
+				_setColSize(colNum, width)
+		else:
+			try:
+				self.AutoSizeColumn(self._convertDaboColNumToWxColNum(colNum), setAsMin=False)
+			except (TypeError, wx.PyAssertionError):
+				pass
+			if colNum > -1:
+				_setColSize(colNum)
 
 		if not self._inAutoSizeLoop:
 			self.refresh()
@@ -2644,6 +2740,51 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 			self._updateColumnWidths()
 
 
+	def _getSampledColWidth(self, colNum, sampleSize):
+		"""
+		Return the width needed by the widest value of the column in a sample of
+		rows. For a VirtualDataSource, only the rows that are loaded are
+		measured, and None is returned when there aren't any.
+		"""
+		wxCol = self._convertDaboColNumToWxColNum(colNum)
+		if wxCol is None:
+			return 0
+		if self._rowWindow is not None:
+			# The other rows would only give placeholders, and schedule loads.
+			loaded = self._rowWindow.getLoadedRows()
+			if not loaded:
+				return None
+			rows = [loaded[idx] for idx in sampleRows(len(loaded), sampleSize, seed=colNum)]
+		else:
+			rows = sampleRows(self.RowCount, sampleSize, seed=colNum)
+		getValue = self._Table.GetValue
+		texts = [ustr(getValue(row, wxCol, dynamicUpdate=False)) for row in rows]
+		font = self.Columns[colNum].Font._nativeFont
+		# Leave room for the cell margins, as wx does.
+		def measure(lines):
+			return [wd for wd, ht in dabo.ui.getTextExtents(lines, font)]
+		return widestText(texts, measure) + 10
+
+
+	def _autoSizeColLater(self, colNum):
+		"""Auto-size the column when the application is idle."""
+		if not self._pendingAutoSize:
+			dabo.ui.callAfter(self._autoSizePending)
+		if colNum not in self._pendingAutoSize:
+			self._pendingAutoSize.append(colNum)
+
+
+	def _autoSizePending(self):
+		"""Auto-size the next pending column, and leave the rest for later events."""
+		if not self or not self._pendingAutoSize:
+			return
+		colNum = self._pendingAutoSize.pop(0)
+		if colNum < len(self.Columns):
+			self.autoSizeCol(colNum)
+		if self._pendingAutoSize:
+			dabo.ui.callAfter(self._autoSizePending)
+
+
 	def _paintHeader(self, updateBox=None):
 		"""
 		This method handles all of the display for the header, including writing
@@ -3081,8 +3222,9 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 		if self.RowCount <= 0:
 			# Nothing to seek within!
 			return
-		if not (self.Searchable and self.Columns[gridCol].Searchable):
-			# Doesn't apply to this column.
+		if not (self.Searchable and self.Columns[gridCol].Searchable) \
+				or self._rowWindow is not None:
+			# Doesn't apply to this column, or would have to load all the rows.
 			self.currSearchStr = ""
 			return
 		newRow = self.CurrentRow
@@ -3091,87 +3233,21 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 		self.currSearchStr = ""
 		near = self.searchNearest
 		caseSensitive = self.searchCaseSensitive
-		# Copy the specified field vals and their row numbers to a list, and
-		# add those lists to the sort list
-		sortList = []
-		for i in range(0, self.RowCount):
+		# The index of the column's values is kept until the data changes, so
+		# that the following keystrokes don't have to read all the rows again.
+		key = (fld, caseSensitive)
+		index = self._searchIndexes.get(key)
+		if index is None:
 			if biz:
-				val = biz.getFieldVal(fld, i, _forceNoCallback=True)
-			else:
-				val = self.DataSet[i][fld]
-			sortList.append( [val, i] )
-
-		# Determine if we are seeking string values
-		compString = False
-		for row in sortList:
-			if row[0] is not None:
-				compString = isinstance(row[0], basestring)
-				break
-
-		if not compString:
-			# coerce srchVal to be the same type as the field type
-			listval = sortList[0][0]
-			if isinstance(listval, int):
-				try:
-					srchVal = int(srchVal)
-				except ValueError:
-					srchVal = int(0)
-			elif isinstance(listval, long):
-				try:
-					srchVal = long(srchVal)
-				except ValueError:
-					srchVal = long(0)
-			elif isinstance(listval, float):
-				try:
-					srchVal = float(srchVal)
-				except ValueError:
-					srchVal = float(0)
-			elif isinstance(listval, (datetime.datetime, datetime.date, datetime.time)):
-				# We need to convert the sort vals into strings
-				sortList = [(ustr(vv), i) for vv, i in sortList]
-				compString = True
-
-		# Now iterate through the list to find the matching value. I know that
-		# there are more efficient search algorithms, but for this purpose, we'll
-		# just use brute force
-		if compString:
-			if caseSensitive:
-				mtchs = [vv for vv in sortList
-						if isinstance(vv[0], basestring) and vv[0].startswith(srchVal)]
+				vals = [(biz.getFieldVal(fld, i, _forceNoCallback=True), i)
+						for i in xrange(self.RowCount)]
 			else:
-				srchVal = srchVal.lower()
-				mtchs = [vv for vv in sortList
-						if isinstance(vv[0], basestring) and vv[0].lower().startswith(srchVal)]
-		else:
-			mtchs = [vv for vv in sortList
-					if vv[0] == srchVal]
-		if mtchs:
-			# The row num is the second element. We want the first row in
-			# the list, since it will still be sorted.
-			newRow = mtchs[0][1]
-		else:
-			for fldval, row in sortList:
-				if not compString or caseSensitive:
-					match = (fldval == srchVal)
-				else:
-					# Case-insensitive string search.
-					match = (isinstance(fldval, basestring) and fldval.lower() == srchVal)
-				if match:
-					newRow = row
-					break
-				else:
-					if near:
-						newRow = row
-					# If we are doing a near search, see if the row is less than the
-					# requested matching value. If so, update the value of 'ret'. If not,
-					# we have passed the matching value, so there's no point in
-					# continuing the search, but we mu
-					if compString and not caseSensitive and isinstance(fldval, basestring):
-						toofar = fldval.lower() > srchVal
-					else:
-						toofar = fldval > srchVal
-					if toofar:
-						break
+				ds = self.DataSet
+				vals = [(ds[i][fld], i) for i in xrange(self.RowCount)]
+			index = self._searchIndexes[key] = SearchIndex(vals, caseSensitive)
+		row = index.find(srchVal, near)
+		if row is not None:
+			newRow = row
 		self.CurrentRow = newRow
 
 		if self.Form is not None:
@@ -3185,6 +3261,29 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 		self.currSearchStr = ""
 
 
+	def _loadVirtualRows(self, func):
+		"""Load the requested rows of the VirtualDataSource after the current paint."""
+		dabo.ui.callAfter(func)
+
+
+	def _onVirtualRowsLoaded(self, first, last):
+		"""
+		Repaint the placeholders of the rows that have been loaded, and auto-size
+		the columns that were waiting for rows to measure.
+		"""
+		if self:
+			self.Refresh()
+			cols, self._autoSizeOnLoad = self._autoSizeOnLoad, set()
+			for colNum in sorted(cols):
+				if colNum < len(self.Columns):
+					self._autoSizeColLater(colNum)
+
+
+	def _clearSearchIndexes(self):
+		"""Discard the indexes built by the incremental search."""
+		self._searchIndexes = {}
+
+
 	def addToSearchStr(self, key):
 		"""
 		Add a character to the current incremental search.
@@ -4497,6 +4596,20 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 			self._properties["AlternateRowColoring"] = val
 
 
+	def _getAutoSizeInIdle(self):
+		return self._autoSizeInIdle
+
+	def _setAutoSizeInIdle(self, val):
+		self._autoSizeInIdle = bool(val)
+
+
+	def _getAutoSizeSampleSize(self):
+		return self._autoSizeSampleSize
+
+	def _setAutoSizeSampleSize(self, val):
+		self._autoSizeSampleSize = val
+
+
 	def _getAutoAdjustHeaderHeight(self):
 		return self._autoAdjustHeaderHeight
 
@@ -4521,6 +4634,17 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 			self._properties["CellHighlightWidth"] = val
 
 
+	def _getCellCacheSize(self):
+		return self._cellCacheSize
+
+	def _setCellCacheSize(self, val):
+		if self._constructed():
+			self._cellCacheSize = val
+			self._Table._setCacheSize(val)
+		else:
+			self._properties["CellCacheSize"] = val
+
+
 	def _getColumns(self):
 		return self._columns
 
@@ -4837,6 +4961,8 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 
 
 	def _getRowCount(self):
+		if self._rowWindow is not None:
+			return self._rowWindow.RowCount
 		try:
 			self._tableRows = self.getBizobj().RowCount
 		except AttributeError:
@@ -5142,6 +5268,43 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 			self._properties["VerticalHeaders"] = val
 
 
+	def _getVirtualDataSource(self):
+		if self._rowWindow is None:
+			return None
+		return self._rowWindow.source
+
+	def _setVirtualDataSource(self, val):
+		if self._constructed():
+			if val is None:
+				self._rowWindow = None
+			else:
+				if self.DataSource is not None:
+					raise ValueError(_("Cannot set VirtualDataSource: DataSource defined."))
+				# Make sure the grid's table is initialized first.
+				self._getTable()
+				self._rowWindow = RowWindow(val, prefetch=self._virtualPrefetch,
+						loader=self._loadVirtualRows, onLoaded=self._onVirtualRowsLoaded)
+			self.fillGrid(True)
+		else:
+			self._properties["VirtualDataSource"] = val
+
+
+	def _getVirtualPlaceholder(self):
+		return self._virtualPlaceholder
+
+	def _setVirtualPlaceholder(self, val):
+		self._virtualPlaceholder = val
+
+
+	def _getVirtualPrefetch(self):
+		return self._virtualPrefetch
+
+	def _setVirtualPrefetch(self, val):
+		self._virtualPrefetch = val
+		if self._rowWindow is not None:
+			self._rowWindow.prefetch = val
+
+
 	def _getVerticalScrolling(self):
 		return self.GetScrollPixelsPerUnit()[1] > 0
 
@@ -5185,6 +5348,17 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 			_("""When True, alternate rows of the grid are colored according to
 			the RowColorOdd and RowColorEven properties	 (bool)"""))
 
+	AutoSizeInIdle = property(_getAutoSizeInIdle, _setAutoSizeInIdle, None,
+			_("""When True, columns without a width that are auto-sized when the grid
+			is filled are sized one at a time in later events, so that the grid is
+			shown first. Default=False.  (bool)"""))
+
+	AutoSizeSampleSize = property(_getAutoSizeSampleSize, _setAutoSizeSampleSize, None,
+			_("""When the grid has more rows than this, auto-sizing a column only
+			measures the values of this many rows: some at the top, some at the
+			bottom, and the rest picked at random. Set to None to always measure
+			every row. Default=200.  (int)"""))
+
 	AutoAdjustHeaderHeight = property(_getAutoAdjustHeaderHeight,
 			_setAutoAdjustHeaderHeight, None,
 			_("""When True, changing the VerticalHeaders property will adjust the HeaderHeight
@@ -5193,6 +5367,10 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 	CellHighlightWidth = property(_getCellHighlightWidth, _setCellHighlightWidth, None,
 			_("Specifies the width of the cell highlight box."))
 
+	CellCacheSize = property(_getCellCacheSize, _setCellCacheSize, None,
+			_("""Maximum number of cells whose values and attributes are cached. The
+			least recently used cells are dropped when there are more. Default=10000.  (int)"""))
+
 	Children = property(_getColumns, None, None,
 			_("List of dColumns, same as self.Columns.	(list)"))
 
@@ -5420,6 +5598,22 @@ class dGrid(cm.dControlMixin, wx.grid.Grid):
 	VerticalScrolling = property(_getVerticalScrolling, _setVerticalScrolling, None,
 			_("Is scrolling enabled in the vertical direction?	(bool)"))
 
+	VirtualDataSource = property(_getVirtualDataSource, _setVirtualDataSource, None,
+			_("""Paging data source whose rows are loaded as they are displayed,
+			instead of all at once. It must have getRowCount() and getRows(start, count)
+			methods; see dabo.lib.rowWindow.ListRowSource. Only the rows around the
+			visible ones are kept in memory. The rows are read-only, and can't be
+			searched incrementally. Can't be used with DataSource. Default=None.
+			(object)"""))
+
+	VirtualPlaceholder = property(_getVirtualPlaceholder, _setVirtualPlaceholder, None,
+			_("""Text displayed in the cells of rows of the VirtualDataSource that are
+			still being loaded. Default="...".  (str)"""))
+
+	VirtualPrefetch = property(_getVirtualPrefetch, _setVirtualPrefetch, None,
+			_("""Number of rows of the VirtualDataSource loaded before and after the
+			rows that are displayed. Default=50.  (int)"""))
+
 	_Table = property(_getTable, _setTable, None,
 			_("Reference to the internal table class  (dGridDataTable)") )
 
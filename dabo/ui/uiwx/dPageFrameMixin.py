@@ -8,12 +8,12 @@ if __name__ == "__main__":
 import dControlMixin as cm
 from dPage import dPage
 import dabo.dEvents as dEvents
-from dabo.dLocalize import _
+from dabo.dLocalize import _, lazy_
 from dabo.lib.utils import ustr
 from dabo.ui import makeDynamicProperty
 
 
-MSG_SMART_FOCUS_ABUSE = _("The '%s' control must inherit from dPage to use the UseSmartFocus feature.")
+MSG_SMART_FOCUS_ABUSE = lazy_("The '%s' control must inherit from dPage to use the UseSmartFocus feature.")
 
 
 class dPageFrameMixin(cm.dControlMixin):
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import unittest
+import dabo
+from dabo.dApp import dApp
+
+
+class Test_TextExtent(unittest.TestCase):
+	def setUp(self):
+		app = self.app = dApp(MainFormClass=None)
+		app.setup()
+		self.font = dabo.ui.dFont(Size=10)
+		dabo.ui.clearTextExtentCache()
+
+	def tearDown(self):
+		dabo.ui.clearTextExtentCache()
+		self.app = None
+
+	def testBatch(self):
+		texts = ["", "i", "WWWW", "WWWW"]
+		exts = dabo.ui.getTextExtents(texts, self.font)
+		self.assertEqual(len(exts), 4)
+		self.assertEqual(exts[2], exts[3])
+		self.assertTrue(exts[1][0] < exts[2][0])
+		self.assertEqual(dabo.ui.getTextExtent("WWWW", self.font._nativeFont), exts[2])
+		self.assertEqual(dabo.ui.fontMetricFromFont("WWWW", self.font), exts[2])
+
+	def testFontKey(self):
+		small = dabo.ui.getTextExtent("Some text", self.font)
+		big = dabo.ui.getTextExtent("Some text", dabo.ui.dFont(Size=20))
+		self.assertTrue(small[0] < big[0])
+
+	def testCacheSize(self):
+		size = dabo.textExtentCacheSize
+		dabo.textExtentCacheSize = 10
+		try:
+			exts = dabo.ui.getTextExtents(["text %s" % num for num in range(100)], self.font)
+			self.assertEqual(len(exts), 100)
+			self.assertTrue(len(dabo.ui.uiwx._textExtents) <= 10)
+			dabo.textExtentCacheSize = None
+			dabo.ui.getTextExtents(["text %s" % num for num in range(100)], self.font)
+			self.assertEqual(len(dabo.ui.uiwx._textExtents), 100)
+		finally:
+			dabo.textExtentCacheSize = size
+
+
+if __name__ == "__main__":
+	unittest.main()
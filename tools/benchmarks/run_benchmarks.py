@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Runs the Dabo performance benchmarks, and optionally compares the results
+with a stored baseline.
+
+Usage: python run_benchmarks.py [options] [scenario ...]
+
+Options:
+	-o FILE, --output=FILE      Write the results to FILE as JSON
+	-b FILE, --baseline=FILE    Compare the results with those in FILE
+	-t PCT, --threshold=PCT     Percentage a scenario may be slower than the
+	                            baseline before it counts as a regression
+	                            (default 20)
+	-r NUM, --repeat=NUM        Number of timed runs of each scenario (default 3)
+	-s NUM, --scale=NUM         Multiplier for the row counts (default 1.0)
+	-l, --list                  List the scenarios and exit
+
+Without scenario names, all scenarios are run. The best (lowest) time of
+the repetitions is used for comparisons. When a baseline is given, the exit
+status is 1 if any scenario regressed beyond the threshold.
+
+Typical use is to save a baseline before making a change:
+
+	python run_benchmarks.py -o baseline.json
+
+and to compare with it afterwards:
+
+	python run_benchmarks.py -b baseline.json
+"""
+import gc
+import getopt
+import os
+import platform
+import sys
+import time
+
+# Allow running from a source checkout without installing Dabo.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+import dabo
+from dabo.lib import jsonEncode, jsonDecode
+import scenarios
+
+
+def runScenario(func, rows, repeat):
+	"""Returns a list of the durations of 'repeat' runs of the scenario."""
+	times = []
+	for num in xrange(repeat):
+		run = func(rows)
+		gc.collect()
+		gcEnabled = gc.isenabled()
+		gc.disable()
+		try:
+			start = time.time()
+			run()
+			times.append(time.time() - start)
+		finally:
+			if gcEnabled:
+				gc.enable()
+		run = None
+	return times
+
+
+def runAll(names=None, repeat=3, scale=1.0, out=sys.stdout):
+	"""Runs the scenarios, and returns the results dict."""
+	results = {}
+	skipped = {}
+	try:
+		for name, rows, func in scenarios.scenarios:
+			if names and name not in names:
+				continue
+			rows = max(1, int(rows * scale))
+			try:
+				times = runScenario(func, rows, repeat)
+			except scenarios.SkipScenario, e:
+				skipped[name] = str(e)
+				print >> out, "%-16s skipped: %s" % (name, e)
+				continue
+			times.sort()
+			results[name] = {"rows": rows, "best": times[0],
+					"median": times[len(times) / 2], "times": times}
+			print >> out, "%-16s %8d rows %10.4f sec (median %.4f)" % (name, rows,
+					times[0], times[len(times) / 2])
+	finally:
+		scenarios.cleanup()
+	return {"version": 1, "time": time.time(),
+			"python": platform.python_version(), "platform": platform.platform(),
+			"dabo": dabo.__version__, "repeat": repeat, "scale": scale,
+			"results": results, "skipped": skipped}
+
+
+def compare(current, baseline, threshold=20, out=sys.stdout):
+	"""
+	Compares the results of two runs, and returns a list of the names of the
+	scenarios that are more than 'threshold' percent slower than in the
+	baseline. Scenarios run with different row counts aren't compared.
+	"""
+	regressions = []
+	baseResults = baseline.get("results", {})
+	for name, result in sorted(current["results"].items()):
+		base = baseResults.get(name)
+		if base is None:
+			print >> out, "%-16s not in baseline" % name
+			continue
+		if base["rows"] != result["rows"]:
+			print >> out, "%-16s row counts differ (%s vs. %s); not compared" % (name,
+					base["rows"], result["rows"])
+			continue
+		change = 100.0 * (result["best"] - base["best"]) / (base["best"] or 1e-9)
+		if change > threshold:
+			regressions.append(name)
+			flag = "REGRESSION"
+		else:
+			flag = ""
+		print >> out, "%-16s %10.4f -> %10.4f sec %+7.1f%% %s" % (name, base["best"],
+				result["best"], change, flag)
+	return regressions
+
+
+def main(args):
+	try:
+		opts, names = getopt.getopt(args, "o:b:t:r:s:l",
+				["output=", "baseline=", "threshold=", "repeat=", "scale=", "list"])
+	except getopt.GetoptError, e:
+		print >> sys.stderr, e
+		print >> sys.stderr, __doc__
+		return 2
+	output = baseline = None
+	threshold = 20
+	repeat = 3
+	scale = 1.0
+	for opt, val in opts:
+		if opt in ("-o", "--output"):
+			output = val
+		elif opt in ("-b", "--baseline"):
+			baseline = val
+		elif opt in ("-t", "--threshold"):
+			threshold = float(val)
+		elif opt in ("-r", "--repeat"):
+			repeat = int(val)
+		elif opt in ("-s", "--scale"):
+			scale = float(val)
+		elif opt in ("-l", "--list"):
+			for name, rows, func in scenarios.scenarios:
+				print "%-16s %8d rows" % (name, rows)
+			return 0
+	known = [scen[0] for scen in scenarios.scenarios]
+	for name in names:
+		if name not in known:
+			print >> sys.stderr, "Unknown scenario: %s" % name
+			return 2
+
+	current = runAll(names, repeat=repeat, scale=scale)
+	if output:
+		open(output, "w").write(jsonEncode(current))
+	if baseline:
+		print
+		regressions = compare(current, jsonDecode(open(baseline).read()), threshold)
+		if regressions:
+			print "\nRegressed by more than %s%%: %s" % (threshold, ", ".join(regressions))
+			return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv[1:]))
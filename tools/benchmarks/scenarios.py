@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark scenarios for run_benchmarks.py.
+
+Each scenario is a function decorated with @scenario. It is called with the
+number of rows to use, does its setup, and returns a function without
+arguments that performs the timed work. Scenarios are called again for every
+repetition, so the timed function may change the data it was given.
+
+A scenario that can't run in the current environment (for example, because
+ReportLab isn't installed) raises SkipScenario.
+"""
+import itertools
+import os
+import random
+import shutil
+import tempfile
+import dabo
+import dabo.db
+import dabo.biz
+from dabo.db.dDataSet import dDataSet
+
+# Ordered list of (name, defaultRows, func) tuples.
+scenarios = []
+# Temp directory holding the generated databases; removed by cleanup().
+_tempDir = None
+_databases = {}
+_copyCount = itertools.count()
+
+
+class SkipScenario(Exception):
+	pass
+
+
+def scenario(name, rows):
+	"""Registers the decorated function as a scenario using 'rows' rows by default."""
+	def decorator(func):
+		scenarios.append((name, rows, func))
+		return func
+	return decorator
+
+
+def cleanup():
+	"""Removes the generated databases."""
+	global _tempDir
+	if _tempDir:
+		shutil.rmtree(_tempDir, True)
+	_tempDir = None
+	_databases.clear()
+
+
+def getDatabase(rows, children=0):
+	"""
+	Returns the path of a SQLite database with a 'cust' table of 'rows' rows,
+	and an 'orders' table with 'children' rows for every customer. The data
+	is always the same for the same arguments; each database is only built
+	once, and the returned path is a fresh copy that may be modified.
+	"""
+	global _tempDir
+	if _tempDir is None:
+		_tempDir = tempfile.mkdtemp(prefix="dabobench")
+	key = (rows, children)
+	master = _databases.get(key)
+	if master is None:
+		master = _databases[key] = os.path.join(_tempDir, "master_%s_%s.db" % key)
+		con = dabo.db.dConnection(DbType="SQLite", Database=master, forceCreate=True)
+		crs = con.getDaboCursor()
+		crs.executescript("""
+create table cust (pk INTEGER PRIMARY KEY, cName CHAR, cCity CHAR,
+		iQty INT, nPrice DECIMAL(8,2), dDate DATE);
+create table orders (pk INTEGER PRIMARY KEY, cust_fk INT, cItem CHAR, nAmount DECIMAL(8,2));
+create index orders_cust on orders (cust_fk);
+""")
+		rand = random.Random(rows)
+		aux = crs.AuxCursor
+		aux.executemany("insert into cust (pk, cName, cCity, iQty, nPrice, dDate) "
+				"values (?, ?, ?, ?, ?, '2010-05-01')",
+				((num, "Name %07d" % rand.randint(0, rows), "City %s" % (num % 100),
+				num, num / 100.0) for num in xrange(1, rows + 1)))
+		aux.executemany("insert into orders (cust_fk, cItem, nAmount) values (?, ?, ?)",
+				((num / children + 1, "Item %s" % num, num % 1000)
+				for num in xrange(rows * children)))
+		con.close()
+	pth = os.path.join(_tempDir, "bench%s.db" % _copyCount.next())
+	shutil.copyfile(master, pth)
+	return pth
+
+
+def getBizobj(rows, children=0):
+	con = dabo.db.dConnection(DbType="SQLite", Database=getDatabase(rows, children))
+	biz = dabo.biz.dBizobj(con)
+	biz.KeyField = "pk"
+	biz.DataSource = "cust"
+	# The default limit would silently cap every requery at 1000 rows.
+	biz.setLimit(None)
+	return biz
+
+
+def checkRowCount(biz, rows):
+	"""Makes sure the benchmark works with the number of rows it reports."""
+	assert biz.RowCount == rows, "Expected %s rows, got %s" % (rows, biz.RowCount)
+
+
+def getDataSet(rows):
+	rand = random.Random(rows)
+	return dDataSet([{"pk": num, "cName": "Name %07d" % rand.randint(0, rows),
+			"cCity": "City %s" % (num % 100), "iQty": num}
+			for num in xrange(rows)])
+
+
+@scenario("requery", 100000)
+def requeryScenario(rows):
+	biz = getBizobj(rows)
+	def run():
+		biz.requery()
+		checkRowCount(biz, rows)
+	return run
+
+
+@scenario("saveAll", 10000)
+def saveAllScenario(rows):
+	biz = getBizobj(rows)
+	biz.requery()
+	checkRowCount(biz, rows)
+	for row in xrange(rows):
+		biz.setFieldVal("cCity", "Edited %s" % row, row=row)
+	return biz.saveAll
+
+
+@scenario("saveNew", 2000)
+def saveNewScenario(rows):
+	biz = getBizobj(0)
+	# NULL defaults make the save read back the values filled in by the database.
+	biz.DefaultValues = None
+	biz.requery()
+	for row in xrange(rows):
+		biz.new()
+		biz.setFieldVal("cName", "New %s" % row)
+	# Saves through the cursor, to leave out the bizobj's per-record overhead.
+	return lambda: biz._CurrentCursor.save(allRows=True)
+
+
+def _concurrentScenario(**options):
+	"""
+	One thread saves 'rows' single-row transactions while another keeps
+	querying the table; both use connections with the passed SQLite options.
+	"""
+	def setup(rows):
+		import threading
+		pth = getDatabase(10000)
+		done = threading.Event()
+		def connect():
+			return dabo.db.dConnection(DbType="SQLite", Database=pth, busy_timeout=10000,
+					**options).getDaboCursor()
+		def read():
+			crs = connect()
+			while not done.isSet():
+				crs.execute("select sum(iQty) as total from cust")
+		def run():
+			crs = connect()
+			reader = threading.Thread(target=read)
+			reader.start()
+			try:
+				for num in xrange(rows):
+					crs.beginTransaction()
+					crs.execute("update cust set iQty = iQty + 1 where pk = ?", (num % 10000 + 1,))
+					crs.commitTransaction()
+			finally:
+				done.set()
+				reader.join()
+		return run
+	return setup
+
+scenario("concurrentDefault", 2000)(_concurrentScenario())
+scenario("concurrentWAL", 2000)(_concurrentScenario(journal_mode="WAL", synchronous="NORMAL"))
+
+
+@scenario("seek", 100000)
+def seekScenario(rows):
+	biz = getBizobj(rows)
+	biz.requery()
+	checkRowCount(biz, rows)
+	rand = random.Random(0)
+	vals = ["Name %07d" % rand.randint(0, rows) for num in xrange(100)]
+	def run():
+		for val in vals:
+			biz.seek(val, "cName", near=True)
+	return run
+
+
+@scenario("locate", 10000)
+def locateScenario(rows):
+	biz = getBizobj(rows)
+	biz.requery()
+	checkRowCount(biz, rows)
+	rand = random.Random(0)
+	vals = [rand.randint(1, rows) for num in xrange(100)]
+	def run():
+		for val in vals:
+			biz.locate(val, "pk")
+	return run
+
+
+@scenario("parentChild", 1000)
+def parentChildScenario(rows):
+	parent = getBizobj(rows, children=10)
+	child = dabo.biz.dBizobj(parent.Connection)
+	child.KeyField = "pk"
+	child.DataSource = "orders"
+	child.LinkField = "cust_fk"
+	parent.addChild(child)
+	parent.requery()
+	checkRowCount(parent, rows)
+	def run():
+		for row in xrange(parent.RowCount):
+			parent.RowNumber = row
+	return run
+
+
+def _scanFamily(rows):
+	parent = getBizobj(rows, children=2)
+	child = dabo.biz.dBizobj(parent.Connection)
+	child.KeyField = "pk"
+	child.DataSource = "orders"
+	child.LinkField = "cust_fk"
+	parent.addChild(child)
+	parent.requery()
+	checkRowCount(parent, rows)
+	return parent
+
+
+@scenario("scan", 20000)
+def scanScenario(rows):
+	parent = _scanFamily(rows)
+	def update():
+		parent.setFieldVal("iQty", parent.getFieldVal("iQty") + 1)
+	return lambda: parent.scan(update)
+
+
+@scenario("scanRecords", 20000)
+def scanRecordsScenario(rows):
+	parent = _scanFamily(rows)
+	def run():
+		for rec in parent.scanRecords():
+			rec.iQty = rec.iQty + 1
+	return run
+
+
+@scenario("deleteAll", 5000)
+def deleteAllScenario(rows):
+	parent = getBizobj(rows, children=2)
+	child = dabo.biz.dBizobj(parent.Connection)
+	child.KeyField = "pk"
+	child.DataSource = "orders"
+	child.LinkField = "cust_fk"
+	parent.addChild(child)
+	parent.requery()
+	checkRowCount(parent, rows)
+	return parent.deleteAll
+
+
+@scenario("appendDataSet", 20000)
+def appendDataSetScenario(rows):
+	biz = getBizobj(0)
+	biz.requery()
+	crs = biz._CurrentCursor
+	ds = getDataSet(rows)
+	return lambda: crs.appendDataSet(ds, updateInternals=True)
+
+
+@scenario("dataSetSort", 100000)
+def dataSetSortScenario(rows):
+	ds = getDataSet(rows)
+	return lambda: ds.sort("cName")
+
+
+@scenario("dataSetFilter", 100000)
+def dataSetFilterScenario(rows):
+	ds = getDataSet(rows)
+	return lambda: ds.filter("cCity", "City 42")
+
+
+@scenario("dataSetJoin", 10000)
+def dataSetJoinScenario(rows):
+	ds = getDataSet(rows)
+	orders = dDataSet([{"pk": num, "cust_fk": num % rows, "nAmount": num % 1000}
+			for num in xrange(rows * 5)])
+	return lambda: ds.execute("select dataset.cName, sum(o.nAmount) as total "
+			"from dataset join o on o.cust_fk = dataset.pk group by dataset.cName",
+			cursorDict={"o": orders})
+
+
+@scenario("report", 20)
+def reportScenario(rows):
+	try:
+		from dabo.lib.reportWriter import ReportWriter
+	except ImportError:
+		raise SkipScenario("ReportLab or PIL is not installed")
+	demoDir = os.path.join(os.path.dirname(dabo.__file__), "lib", "reporting_tests",
+			"invoice_demo")
+	rw = ReportWriter()
+	rw.ReportFormFile = os.path.join(demoDir, "invoice.rfxml")
+	# The rows are copies of the test cursor stored in the report form.
+	rw.UseTestCursor = True
+	rw.Cursor = rw.Cursor * rows
+	rw.OutputFile = os.path.join(tempfile.gettempdir(), "dabobench_invoice.pdf")
+	return rw.write
+
+
+@scenario("prefs", 1000)
+def prefsScenario(rows):
+	from dabo.dPref import dPref
+	pth = getDatabase(0)
+	def run():
+		pref = dPref(key="bench", prefDb=pth)
+		for num in xrange(rows):
+			pref.setValue("setting%s" % (num % 50), num)
+			pref.getValue("setting%s" % ((num * 7) % 50))
+	return run
+
+
+def _largestFile(exts):
+	"""Returns the path of the largest file with one of the extensions in the source tree."""
+	root = os.path.dirname(os.path.dirname(os.path.abspath(dabo.__file__)))
+	ret = None
+	size = -1
+	for dirPath, dirNames, fileNames in os.walk(root):
+		for fileName in fileNames:
+			if os.path.splitext(fileName)[1] in exts:
+				pth = os.path.join(dirPath, fileName)
+				if os.path.getsize(pth) > size:
+					ret, size = pth, os.path.getsize(pth)
+	return ret
+
+
+@scenario("xmlParse", 20)
+def xmlParseScenario(rows):
+	from dabo.lib.xmltodict import xmltodict
+	xml = open(_largestFile((".cdxml", ".rfxml"))).read()
+	def run():
+		for num in xrange(rows):
+			xmltodict(xml)
+	return run
+
+
+@scenario("xmlWrite", 20)
+def xmlWriteScenario(rows):
+	from dabo.lib.xmltodict import xmltodict, dicttoxml
+	dct = xmltodict(open(_largestFile((".cdxml", ".rfxml"))).read())
+	def run():
+		for num in xrange(rows):
+			dicttoxml(dct)
+	return run
+
+
+@scenario("cellCache", 100000)
+def cellCacheScenario(rows):
+	"""Scrolls through a grid of 'rows' rows and 10 columns, painting 40 rows at a time."""
+	from dabo.lib.cellCache import CellCache
+	cache = CellCache(10000)
+	def run():
+		for top in xrange(0, rows, 20):
+			for row in xrange(top, min(top + 40, rows)):
+				for col in xrange(10):
+					if cache.get(row, col) is None:
+						cache.set(row, col, row)
+	return run
+
+
+@scenario("rowWindow", 100000)
+def rowWindowScenario(rows):
+	"""Scrolls through 'rows' virtual rows, reading 4 fields of 40 rows at a time."""
+	from dabo.lib.rowWindow import ListRowSource, RowWindow
+	source = ListRowSource(getDataSet(rows))
+	flds = ("pk", "cName", "cCity", "iQty")
+	def run():
+		win = RowWindow(source)
+		for top in xrange(0, rows, 20):
+			for row in xrange(top, min(top + 40, rows)):
+				for fld in flds:
+					win.getValue(row, fld)
+	return run
+
+
+@scenario("incSearch", 50000)
+def incSearchScenario(rows):
+	"""Types 100 searches, one keystroke at a time, in a column of 'rows' rows, indexing it once."""
+	from dabo.lib.searchIndex import SearchIndex
+	biz = getBizobj(rows)
+	biz.requery()
+	checkRowCount(biz, rows)
+	rand = random.Random(0)
+	srches = ["name %07d" % rand.randint(0, rows) for num in xrange(100)]
+	def run():
+		index = SearchIndex([(biz.getFieldVal("cName", row), row) for row in xrange(rows)])
+		for srch in srches:
+			for size in xrange(1, len(srch) + 1):
+				index.find(srch[:size], near=True)
+	return run
+
+
+@scenario("translate", 100000)
+def translateScenario(rows):
+	from dabo import dLocalize
+	dLocalize.install("dabo")
+	dLocalize.setLanguage("de")
+	# Half of the messages are in the catalog.
+	msgs = [msg for msg in dLocalize._catalog if msg][:100]
+	msgs += ["Untranslated message %s" % num for num in xrange(len(msgs))]
+	_ = dLocalize._
+	def run():
+		for num in xrange(rows / len(msgs)):
+			for msg in msgs:
+				_(msg)
+	return run
+
+
+def _exportScenario(funcName):
+	def setup(rows):
+		from dabo.lib import dataExport
+		biz = getBizobj(rows)
+		biz.requery()
+		checkRowCount(biz, rows)
+		func = getattr(dataExport, funcName)
+		def run():
+			out = open(os.devnull, "wb")
+			func(biz._CurrentCursor, out)
+			out.close()
+		return run
+	return setup
+
+scenario("exportCSV", 100000)(_exportScenario("writeCSV"))
+scenario("exportJSONLines", 100000)(_exportScenario("writeJSONLines"))
+scenario("exportXML", 100000)(_exportScenario("writeXML"))
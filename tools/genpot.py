@@ -20,7 +20,7 @@ def processLoc(proj, drct, xtra=None):
 			processLoc(proj, drct, newXtra)
 		else:
 			if fname.endswith(".py"):
-				os.system("xgettext -d dabo -L Python %s" % fullname)
+				os.system("xgettext -d dabo -L Python -k lazy_ %s" % fullname)
 
 
 def main():